@@ -8,6 +8,9 @@ from maya import cmds
 # Duplicate selected object over surface but keep original rotations.
 # cmds.MyDuplicateOverSurface("pTorus1", rotation=True, instanceLeaf=True)
 
+# Paint instances along the stroke, one every 30 pixels with a random offset.
+# cmds.duplicateOverSurface("pCone1", instanceLeaf=True, paint=True, spacing=30, jitter=0.5)
+
 # 停止使用插件
 # cmds.unloadPlugin("duplicateOverSurface")
 # -r -s True False
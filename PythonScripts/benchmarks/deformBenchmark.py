@@ -0,0 +1,85 @@
+#
+#  deformBenchmark.py
+#
+#  Per-frame cost of moving the drops with a deforming mesh. Compares
+#  rainScatter.DropBinding.evaluate with running surfacePoints and
+#  dropMatrices again on every frame. Runs with a plain python + numpy:
+#
+#      python benchmarks/deformBenchmark.py
+#      python benchmarks/deformBenchmark.py --drops 10000 50000 --frames 48 --mesh scanned
+#
+
+# import modules
+import argparse
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import numpy as np
+
+import rainDrops
+import rainScatter
+import syntheticMeshes
+
+
+def waveFrames(points, frames, amplitude=0.2):
+    """ Yield (points, normals) of a travelling wave along y, like a simple deformer. """
+    for frame in range(frames):
+        phase = 2 * np.pi * frame / frames
+        deformed = points.copy()
+        deformed[:, 1] += amplitude * np.sin(points[:, 0] + phase)
+        # 用网格扰动后的方向代替真正的顶点法线，只是为了让每一帧的法线都不同
+        normals = np.stack([-amplitude * np.cos(points[:, 0] + phase), np.ones(len(points)),
+                            np.zeros(len(points))], axis=1)
+        yield deformed, normals
+
+
+def frameTimes(function, frames):
+    times = []
+    for points, normals in frames:
+        start = time.perf_counter()
+        function(points, normals)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame drop update on a deforming mesh.")
+    parser.add_argument("--mesh", default="sphere", choices=sorted(syntheticMeshes.MESHES))
+    parser.add_argument("--resolution", type=int, default=150)
+    parser.add_argument("--drops", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--frames", type=int, default=24)
+    args = parser.parse_args(argv)
+
+    points, faceCounts, faceConnects = syntheticMeshes.MESHES[args.mesh](args.resolution)
+    meshArrays = rainScatter.MeshArrays(points, faceCounts, faceConnects)
+    frames = list(waveFrames(meshArrays.points, args.frames))
+
+    sys.stdout.write("%s, %d vertices, %d frames\n" % (args.mesh, meshArrays.numVertices, args.frames))
+    sys.stdout.write("%10s %18s %18s %10s\n" % ("drops", "rebuild (ms)", "binding (ms)", "speedup"))
+    for count in args.drops:
+        params = rainDrops.DropParams(dropDensity=count, samplingMode=rainDrops.SAMPLING_SURFACE, seed=1)
+        dropSet = rainDrops.generateDrops(meshArrays, params)
+        binding = rainScatter.DropBinding(meshArrays, dropSet.triangleIds, dropSet.barycentric, dropSet.sizes,
+                                          dropSet.unitJitter)
+
+        def rebuild(points, normals):
+            positions, dropNormals = rainScatter.surfacePoints(meshArrays.withPoints(points, normals),
+                                                               dropSet.triangleIds, dropSet.barycentric)
+            rainScatter.dropMatrices(positions, dropNormals, dropSet.sizes,
+                                     dropSet.unitJitter * dropSet.sizes[:, None])
+
+        rebuildTimes = frameTimes(rebuild, frames)
+        bindingTimes = frameTimes(binding.evaluate, frames)
+        sys.stdout.write("%10d %10.2f (%5.2f) %10.2f (%5.2f) %9.1fx\n"
+                         % (len(dropSet), np.median(rebuildTimes), rebuildTimes.min(), np.median(bindingTimes),
+                            bindingTimes.min(), np.median(rebuildTimes) / np.median(bindingTimes)))
+    sys.stdout.write("median (best) milliseconds per frame\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,764 @@
+#
+#  fakeMaya.py
+#
+#  Recording stand-in for maya.cmds, maya.OpenMaya and maya.api.OpenMaya, so
+#  the water drop tools can be timed on a box without Maya. Only the calls the
+#  rain scripts make are modelled, on a tiny in-memory scene of transforms and
+#  meshes; every other command is counted and returns None.
+#
+#      import fakeMaya
+#      scene = fakeMaya.install()
+#      scene.addMesh("body", *syntheticMeshes.grid(100))
+#      import rainOnSurface
+#
+
+# import modules
+import sys
+import types
+from collections import Counter
+
+import numpy as np
+
+
+class FakeMesh(object):
+    """ Mesh data of a fake shape node. """
+
+    def __init__(self, points, faceCounts, faceConnects):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.faceCounts = np.asarray(faceCounts, dtype=np.int64)
+        self.faceConnects = np.asarray(faceConnects, dtype=np.int64)
+
+    def copy(self):
+        return FakeMesh(self.points.copy(), self.faceCounts.copy(), self.faceConnects.copy())
+
+    def triangles(self):
+        # 每个面以第一个顶点做三角扇
+        triangleCounts = np.maximum(self.faceCounts - 2, 0)
+        starts = np.concatenate(([0], np.cumsum(self.faceCounts)[:-1]))
+        faceIds = np.repeat(np.arange(len(self.faceCounts)), triangleCounts)
+        local = np.arange(len(faceIds)) - np.repeat(np.cumsum(triangleCounts) - triangleCounts, triangleCounts)
+        corner = starts[faceIds]
+        return triangleCounts, np.stack([self.faceConnects[corner], self.faceConnects[corner + local + 1],
+                                         self.faceConnects[corner + local + 2]], axis=1)
+
+    def vertexNormals(self):
+        triangles = self.triangles()[1]
+        p = self.points[triangles]
+        faceNormals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+        normals = np.zeros_like(self.points)
+        for corner in range(3):
+            np.add.at(normals, triangles[:, corner], faceNormals)
+        lengths = np.linalg.norm(normals, axis=1)
+        lengths[lengths == 0] = 1.0
+        return normals / lengths[:, None]
+
+    def subdivide(self):
+        """ One polySubdivideFacet(mode=quads) step: every n-gon becomes n quads
+            around its centre, through the midpoints of its edges.
+        """
+        counts, connects = self.faceCounts, self.faceConnects
+        numVertices = len(self.points)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        faceIds = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(len(connects)) - starts[faceIds]
+        following = connects[starts[faceIds] + (local + 1) % counts[faceIds]]
+
+        edges, edgeIds = np.unique(np.sort(np.stack([connects, following], axis=1), axis=1), axis=0,
+                                   return_inverse=True)
+        edgeIds = edgeIds.ravel()
+        previousEdge = edgeIds[starts[faceIds] + (local - 1) % counts[faceIds]]
+        centres = np.add.reduceat(self.points[connects], starts) / counts[:, None]
+
+        self.points = np.concatenate([self.points, self.points[edges].mean(axis=1), centres])
+        self.faceConnects = np.stack([connects, numVertices + edgeIds, numVertices + len(edges) + faceIds,
+                                      numVertices + previousEdge], axis=1).ravel()
+        self.faceCounts = np.full(len(connects), 4)
+
+
+class FakeNode(object):
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.nodeType = nodeType
+        self.parent = None
+        self.children = []
+        self.mesh = None
+        self.matrix = np.eye(4)
+        self.attrs = {}
+        if parent is not None:
+            self.setParent(parent)
+
+    def setParent(self, parent):
+        if self.parent is not None:
+            self.parent.children.remove(self)
+        self.parent = parent
+        if parent is not None:
+            parent.children.append(self)
+
+    def fullPathName(self):
+        path = []
+        node = self
+        while node is not None:
+            path.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(path))
+
+    def worldMatrix(self):
+        matrix = self.matrix
+        node = self.parent
+        while node is not None:
+            matrix = matrix @ node.matrix
+            node = node.parent
+        return matrix
+
+
+class FakeScene(object):
+    """ The nodes, the selection and the call counts of the fake session. """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.reset()
+
+    def reset(self):
+        self.nodes = {}
+        self.nameCounters = {}
+        self.selection = []
+        self.widgets = {}
+        self.callbacks = {}
+        self.worldMatrixCallbacks = set()
+        self.nextCallbackId = 1
+        self.undoState = True
+        self.currentMenu = None
+
+    # 节点 ----------------------------------------------------------------
+    def uniqueName(self, name):
+        if name not in self.nodes:
+            return name
+        # 每个前缀记住下一个编号，避免生成上万个同名节点时变成平方复杂度
+        base = name.rstrip("0123456789")
+        i = self.nameCounters.get(base, 1)
+        while "%s%d" % (base, i) in self.nodes:
+            i += 1
+        self.nameCounters[base] = i + 1
+        return "%s%d" % (base, i)
+
+    def createNode(self, name, nodeType, parent=None):
+        node = FakeNode(self.uniqueName(name), nodeType, parent)
+        self.nodes[node.name] = node
+        return node
+
+    def rename(self, node, name):
+        del self.nodes[node.name]
+        node.name = self.uniqueName(name)
+        self.nodes[node.name] = node
+
+    def node(self, name):
+        name = str(name).split(".")[0].split("|")[-1]
+        if name not in self.nodes:
+            raise RuntimeError("No object matches name: %s" % name)
+        return self.nodes[name]
+
+    def addMesh(self, name, points, faceCounts, faceConnects):
+        """ Add a transform with a mesh shape, e.g. from syntheticMeshes.
+            Returns:
+                str : transform name
+        """
+        transform = self.createNode(name, "transform")
+        shape = self.createNode(transform.name + "Shape", "mesh", transform)
+        shape.mesh = FakeMesh(points, faceCounts, faceConnects)
+        return transform.name
+
+    def shape(self, name):
+        node = self.node(name)
+        if node.mesh is None:
+            meshes = [child for child in node.children if child.mesh is not None]
+            if not meshes:
+                raise RuntimeError("%s has no mesh" % name)
+            node = meshes[0]
+        return node
+
+    def delete(self, node):
+        for child in list(node.children):
+            self.delete(child)
+        self.dirty(node)
+        node.setParent(None)
+        self.nodes.pop(node.name, None)
+
+    def dirty(self, node):
+        for callbackId, (watched, function, clientData) in list(self.callbacks.items()):
+            if callbackId not in self.callbacks:
+                continue
+            if watched is node:
+                function(MObject(node), clientData)
+            elif callbackId in self.worldMatrixCallbacks and self.isAncestor(node, watched):
+                # 祖先节点变了，下面所有节点的世界矩阵都变了
+                function(MObject(node), clientData)
+
+    def isAncestor(self, node, other):
+        other = other.parent
+        while other is not None:
+            if other is node:
+                return True
+            other = other.parent
+        return False
+
+
+scene = FakeScene()
+
+
+# maya.cmds ----------------------------------------------------------------
+
+def _names(args):
+    names = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            names.extend(arg)
+        else:
+            names.append(arg)
+    return names
+
+
+def _widget(name, kwargs, valueKeys=("v", "value", "tx", "text", "l", "label")):
+    # 界面控件：记住创建/编辑时的值，查询时返回
+    if kwargs.get("query") or kwargs.get("q"):
+        if kwargs.get("exists"):
+            return name in scene.widgets
+        for key in valueKeys:
+            if kwargs.get(key):
+                return scene.widgets.get(name, {}).get("value")
+        return None
+    values = scene.widgets.setdefault(name, {})
+    for key in valueKeys:
+        if key in kwargs:
+            values["value"] = kwargs[key]
+            break
+    return name
+
+
+def _window(name=None, **kwargs):
+    if kwargs.get("exists"):
+        return name in scene.widgets
+    scene.widgets[name] = {}
+    return name
+
+
+def _optionMenu(name=None, **kwargs):
+    if kwargs.get("query") or kwargs.get("q"):
+        values = scene.widgets.get(name, {})
+        return values.get("value", (values.get("items") or [None])[0])
+    if kwargs.get("edit") or kwargs.get("e"):
+        scene.widgets.setdefault(name, {})["value"] = kwargs.get("value", kwargs.get("v"))
+        return name
+    scene.widgets[name] = {"items": []}
+    scene.currentMenu = name
+    return name
+
+
+def _menuItem(*args, **kwargs):
+    if scene.currentMenu is not None:
+        scene.widgets[scene.currentMenu]["items"].append(kwargs.get("l", kwargs.get("label")))
+
+
+def _createNode(nodeType, name=None, parent=None, **kwargs):
+    node = scene.createNode(name or nodeType, nodeType, scene.node(parent) if parent else None)
+    return node.name
+
+
+def _xform(*args, **kwargs):
+    target = args[0] if args else (scene.selection[0] if scene.selection else None)
+    if kwargs.get("query") or kwargs.get("q"):
+        # ".pnts[i]" 这种相对名字指向当前选择的物体
+        if ".pnts[" in str(target) or ".vtx[" in str(target):
+            name = target.split(".")[0] or scene.selection[0]
+            index = int(target.split("[")[1].rstrip("]"))
+            shape = scene.shape(name)
+            point = np.append(shape.mesh.points[index], 1.0) @ shape.worldMatrix()
+            return point[:3].tolist()
+        node = scene.node(target)
+        if kwargs.get("matrix") or kwargs.get("m"):
+            return (node.worldMatrix() if kwargs.get("worldSpace") or kwargs.get("ws") else node.matrix).ravel().tolist()
+        return node.matrix[3, :3].tolist()
+
+    node = scene.node(target)
+    if "matrix" in kwargs or "m" in kwargs:
+        node.matrix = np.array(kwargs.get("matrix", kwargs.get("m")), dtype=np.float64).reshape(4, 4)
+    if "translation" in kwargs or "t" in kwargs:
+        node.matrix[3, :3] = kwargs.get("translation", kwargs.get("t"))
+    scene.dirty(node)
+
+
+def _delete(*args, **kwargs):
+    for name in _names(args):
+        if name in scene.nodes or str(name).split("|")[-1] in scene.nodes:
+            scene.delete(scene.node(name))
+
+
+def _group(*args, **kwargs):
+    group = scene.createNode(kwargs.get("name", kwargs.get("n", "group")), "transform")
+    for name in _names(args):
+        scene.node(name).setParent(group)
+    return group.name
+
+
+def _duplicate(target, **kwargs):
+    source = scene.node(target)
+    copy = scene.createNode(kwargs.get("name", kwargs.get("n", source.name)), source.nodeType)
+    copy.matrix = source.matrix.copy()
+    for child in source.children:
+        childCopy = scene.createNode(copy.name + "Shape", child.nodeType, copy)
+        childCopy.mesh = child.mesh.copy() if child.mesh is not None else None
+    return [copy.name]
+
+
+def _polySubdivideFacet(target, divisions=1, **kwargs):
+    shape = scene.shape(target)
+    for i in range(kwargs.get("dv", divisions)):
+        shape.mesh.subdivide()
+    scene.dirty(shape)
+
+
+def _undoInfo(**kwargs):
+    if kwargs.get("query") or kwargs.get("q"):
+        return scene.undoState
+    for key in ("stateWithoutFlush", "swf", "state", "st"):
+        if key in kwargs:
+            scene.undoState = kwargs[key]
+    return None
+
+
+def _waterDropsCommit(*args, **kwargs):
+    # 代替 rainOnSurfacePlugin 的命令：直接运行排队的生成函数
+    import rainMayaIO
+    build, restore = rainMayaIO.takePendingBuild()
+    return build()
+
+
+def _select(*args, **kwargs):
+    if kwargs.get("clear") or kwargs.get("cl"):
+        scene.selection = []
+    else:
+        scene.selection = _names(args)
+
+
+def _ls(*args, **kwargs):
+    if kwargs.get("sl") or kwargs.get("selection"):
+        return list(scene.selection)
+    if "type" in kwargs:
+        return [name for name, node in scene.nodes.items() if node.nodeType == kwargs["type"]]
+    return list(scene.nodes)
+
+
+def _getAttr(plug, **kwargs):
+    name, attr = plug.split(".", 1)
+    if attr in ("vrts", "vt", "pnts", "pt") and kwargs.get("multiIndices"):
+        return list(range(len(scene.shape(name or scene.selection[0]).mesh.points)))
+    return scene.node(name).attrs.get(attr)
+
+
+def _setAttr(plug, *values, **kwargs):
+    name, attr = plug.split(".", 1)
+    if kwargs.get("type") == "vectorArray":
+        values = (list(values[1:]),)
+    scene.node(name).attrs[attr] = values[0] if len(values) == 1 else values
+
+
+def _addAttr(target, **kwargs):
+    scene.node(target).attrs.setdefault(kwargs.get("longName", kwargs.get("ln")), None)
+
+
+def _attributeQuery(attr, node=None, exists=False, **kwargs):
+    return attr in scene.node(node).attrs
+
+
+def _particle(*args, **kwargs):
+    if kwargs.get("e") or kwargs.get("edit"):
+        # 逐个粒子修改：order 是粒子的序号
+        values = scene.node(_names(args)[0]).attrs[kwargs["attribute"]]
+        values[kwargs["order"]] = tuple(kwargs["vectorValue"])
+        return None
+    transform = scene.createNode(kwargs.get("name", kwargs.get("n", "particle")), "transform")
+    shape = scene.createNode(transform.name + "Shape", "particle", transform)
+    shape.attrs["position"] = kwargs.get("p", kwargs.get("position"))
+    return [transform.name, shape.name]
+
+
+def _particleInstancer(particleShape, **kwargs):
+    return scene.createNode(kwargs.get("name", "instancer"), "instancer").name
+
+
+def _listRelatives(*args, **kwargs):
+    result = []
+    for name in _names(args):
+        node = scene.node(name)
+        if kwargs.get("parent") or kwargs.get("p"):
+            if node.parent is not None:
+                result.append(node.parent.name)
+        elif kwargs.get("allDescendents") or kwargs.get("ad"):
+            stack = list(node.children)
+            while stack:
+                child = stack.pop()
+                result.append(child.name)
+                stack.extend(child.children)
+        else:
+            result.extend(child.name for child in node.children)
+    if "type" in kwargs:
+        result = [name for name in result if scene.nodes[name].nodeType == kwargs["type"]]
+    return result or None
+
+
+def _objExists(name):
+    return str(name).split(".")[0].split("|")[-1] in scene.nodes
+
+
+_COMMANDS = {
+    "window": _window, "optionMenu": _optionMenu, "menuItem": _menuItem,
+    "intSliderGrp": lambda name=None, **kw: _widget(name, kw),
+    "floatSliderGrp": lambda name=None, **kw: _widget(name, kw),
+    "checkBox": lambda name=None, **kw: _widget(name, kw),
+    "textField": lambda name=None, **kw: _widget(name, kw),
+    "text": lambda name=None, **kw: _widget(name, kw),
+    "about": lambda **kw: bool(kw.get("batch")),
+    "pluginInfo": lambda *a, **kw: True,
+    "createNode": _createNode, "xform": _xform, "delete": _delete, "group": _group, "duplicate": _duplicate,
+    "polySubdivideFacet": _polySubdivideFacet, "undoInfo": _undoInfo,
+    "waterDropsCommit": _waterDropsCommit, "select": _select, "ls": _ls, "getAttr": _getAttr,
+    "setAttr": _setAttr, "particle": _particle, "particleInstancer": _particleInstancer,
+    "listRelatives": _listRelatives, "objExists": _objExists, "addAttr": _addAttr,
+    "attributeQuery": _attributeQuery,
+}
+
+
+class RecordingCmds(types.ModuleType):
+    """ maya.cmds stand-in: counts every call in scene.calls. """
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        handler = _COMMANDS.get(name)
+
+        def command(*args, **kwargs):
+            scene.calls[name] += 1
+            if handler is None:
+                return None
+            return handler(*args, **kwargs)
+
+        command.__name__ = name
+        return command
+
+
+# maya.api.OpenMaya ----------------------------------------------------------
+
+class MObject(object):
+
+    def __init__(self, node=None):
+        self.fakeNode = node
+
+    def __eq__(self, other):
+        return isinstance(other, MObject) and other.fakeNode is self.fakeNode
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def isNull(self):
+        return self.fakeNode is None
+
+
+class MObjectHandle(object):
+
+    def __init__(self, mObject):
+        self.mObject = mObject
+
+    def isValid(self):
+        node = self.mObject.fakeNode
+        return node is not None and scene.nodes.get(node.name) is node
+
+    def isAlive(self):
+        return self.isValid()
+
+    def object(self):
+        return self.mObject
+
+
+class MDagPath(object):
+
+    def __init__(self, other=None):
+        self.fakeNode = other.fakeNode if isinstance(other, MDagPath) else other
+
+    def extendToShape(self):
+        self.fakeNode = scene.shape(self.fakeNode.name)
+
+    def fullPathName(self):
+        return self.fakeNode.fullPathName()
+
+    def partialPathName(self):
+        return self.fakeNode.name
+
+    def node(self):
+        return MObject(self.fakeNode)
+
+    def transform(self):
+        return MObject(self.fakeNode if self.fakeNode.mesh is None else self.fakeNode.parent)
+
+    def pop(self, num=1):
+        for i in range(num):
+            self.fakeNode = self.fakeNode.parent
+
+    def length(self):
+        depth = 0
+        node = self.fakeNode
+        while node is not None:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def inclusiveMatrix(self):
+        return self.fakeNode.worldMatrix()
+
+
+class MSelectionList(object):
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        self.items.append(scene.node(name))
+        return self
+
+    def length(self):
+        return len(self.items)
+
+    def getDagPath(self, index):
+        return MDagPath(self.items[index])
+
+    def getDependNode(self, index):
+        return MObject(self.items[index])
+
+
+class MSpace(object):
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = 2
+    kObject = 2
+    kPostTransform = 3
+    kWorld = 4
+
+
+class MFnMesh(object):
+    """ Reads return NumPy arrays, which np.array() accepts like the real MPointArray/MIntArray. """
+
+    def __init__(self, target=None):
+        self.fakeNode = None
+        if isinstance(target, (MDagPath, MObject)):
+            self.fakeNode = target.fakeNode
+            if self.fakeNode.mesh is None:
+                self.fakeNode = scene.shape(self.fakeNode.name)
+
+    @property
+    def numVertices(self):
+        return len(self.fakeNode.mesh.points)
+
+    @property
+    def numPolygons(self):
+        return len(self.fakeNode.mesh.faceCounts)
+
+    def _world(self, space):
+        return space == MSpace.kWorld and self.fakeNode.parent is not None
+
+    def getPoints(self, space=MSpace.kObject):
+        points = np.concatenate([self.fakeNode.mesh.points, np.ones((self.numVertices, 1))], axis=1)
+        if self._world(space):
+            points = points @ self.fakeNode.parent.worldMatrix()
+        return points
+
+    def setPoint(self, index, point, space=MSpace.kObject):
+        self.fakeNode.mesh.points[index] = np.asarray(point, dtype=np.float64)[:3]
+        scene.dirty(self.fakeNode)
+
+    def setPoints(self, points, space=MSpace.kObject):
+        self.fakeNode.mesh.points = np.asarray(points, dtype=np.float64)[:, :3]
+        scene.dirty(self.fakeNode)
+
+    def getVertices(self):
+        return self.fakeNode.mesh.faceCounts.copy(), self.fakeNode.mesh.faceConnects.copy()
+
+    def getVertexNormals(self, angleWeighted, space=MSpace.kObject):
+        normals = self.fakeNode.mesh.vertexNormals()
+        if self._world(space):
+            normals = normals @ self.fakeNode.parent.worldMatrix()[:3, :3]
+        return normals
+
+    def getTriangles(self):
+        counts, triangles = self.fakeNode.mesh.triangles()
+        return counts, triangles.ravel()
+
+    def create(self, points, faceCounts, faceConnects, uValues=None, vValues=None, parent=None):
+        parentNode = parent.fakeNode if parent is not None else scene.createNode("polySurface", "transform")
+        self.fakeNode = scene.createNode("polySurfaceShape", "mesh", parentNode)
+        self.fakeNode.mesh = FakeMesh(np.asarray(points, dtype=np.float64)[:, :3], faceCounts, faceConnects)
+        return MObject(parentNode if parent is None else self.fakeNode)
+
+    def setName(self, name):
+        scene.rename(self.fakeNode, name)
+        return self.fakeNode.name
+
+    def name(self):
+        return self.fakeNode.name
+
+
+class FakeArrayData(object):
+    """ Stands in for the MObject of a typed array attribute, holding a NumPy copy. """
+
+    def __init__(self, values, dtype):
+        self.values = np.array(values if values is not None else [], dtype=dtype)
+
+
+class MPlug(object):
+
+    def __init__(self, fakeNode, attr):
+        self.fakeNode = fakeNode
+        self.attr = attr
+
+    def asMObject(self):
+        return FakeArrayData(self.fakeNode.attrs.get(self.attr), np.float64)
+
+    def setMObject(self, data):
+        self.fakeNode.attrs[self.attr] = data.values.copy()
+
+
+class MFnDependencyNode(object):
+
+    def __init__(self, mObject):
+        self.fakeNode = mObject.fakeNode
+
+    def findPlug(self, attr, wantNetworkedPlug):
+        return MPlug(self.fakeNode, attr)
+
+
+class MFnDoubleArrayData(object):
+    """ array() returns the NumPy array of the data, which np.array() accepts like MDoubleArray. """
+
+    def __init__(self, data):
+        self.data = data
+
+    def array(self):
+        return self.data.values
+
+    def set(self, array):
+        self.data.values = np.asarray(array, dtype=np.float64)
+        return self
+
+
+class MFnIntArrayData(MFnDoubleArrayData):
+
+    def set(self, array):
+        self.data.values = np.asarray(array, dtype=np.int64)
+        return self
+
+
+def MPoint(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def MPointArray(values=None):
+    return np.asarray(values if values is not None else [], dtype=np.float64)
+
+
+def MIntArray(values=None):
+    return np.asarray(values if values is not None else [], dtype=np.int64)
+
+
+class MMessage(object):
+
+    @staticmethod
+    def removeCallback(callbackId):
+        if scene.callbacks.pop(callbackId, None) is None:
+            raise RuntimeError("Invalid callback id %d" % callbackId)
+        scene.worldMatrixCallbacks.discard(callbackId)
+
+
+class MNodeMessage(MMessage):
+
+    @staticmethod
+    def addNodeDirtyCallback(mObject, function, clientData=None):
+        callbackId = scene.nextCallbackId
+        scene.nextCallbackId += 1
+        scene.callbacks[callbackId] = (mObject.fakeNode, function, clientData)
+        return callbackId
+
+
+class MDagMessage(MMessage):
+
+    @staticmethod
+    def addWorldMatrixModifiedCallback(dagPath, function, clientData=None):
+        callbackId = MNodeMessage.addNodeDirtyCallback(dagPath.node(), lambda node, data: function(node, 0, data),
+                                                       clientData)
+        scene.worldMatrixCallbacks.add(callbackId)
+        return callbackId
+
+
+class MDagModifier(object):
+
+    def __init__(self):
+        self.toDelete = []
+
+    def deleteNode(self, mObject):
+        self.toDelete.append(mObject.fakeNode)
+
+    def doIt(self):
+        for node in self.toDelete:
+            if scene.nodes.get(node.name) is node:
+                scene.delete(node)
+        self.toDelete = []
+
+
+class MPxCommand(object):
+
+    def __init__(self):
+        self.result = None
+
+    def clearResult(self):
+        self.result = None
+
+    def setResult(self, result):
+        self.result = result
+
+
+class MGlobal(object):
+
+    @staticmethod
+    def displayInfo(msg):
+        pass
+
+    @staticmethod
+    def displayWarning(msg):
+        pass
+
+    @staticmethod
+    def displayError(msg):
+        pass
+
+
+def install():
+    """ Put the fake maya modules into sys.modules, before the rain scripts are imported.
+        Returns:
+            FakeScene
+    """
+    maya = types.ModuleType("maya")
+    cmds = RecordingCmds("maya.cmds")
+    api = types.ModuleType("maya.api")
+    openMaya2 = types.ModuleType("maya.api.OpenMaya")
+    openMaya1 = types.ModuleType("maya.OpenMaya")
+
+    for module in (openMaya1, openMaya2):
+        for cls in (MObject, MObjectHandle, MDagPath, MSelectionList, MSpace, MFnMesh, MMessage, MNodeMessage,
+                    MDagMessage, MDagModifier, MPxCommand, MGlobal, MPointArray, MIntArray, MPoint, MPlug,
+                    MFnDependencyNode, MFnDoubleArrayData, MFnIntArrayData):
+            setattr(module, cls.__name__, cls)
+
+    maya.cmds = cmds
+    maya.api = api
+    maya.OpenMaya = openMaya1
+    api.OpenMaya = openMaya2
+    sys.modules.update({"maya": maya, "maya.cmds": cmds, "maya.api": api, "maya.api.OpenMaya": openMaya2,
+                        "maya.OpenMaya": openMaya1})
+    return scene
@@ -0,0 +1,95 @@
+#
+#  intersectionBenchmark.py
+#
+#  Ray throughput of MFnMesh.closestIntersection as used by
+#  DuplicateOverSurface.getIntersection (main.py), without and with a cached
+#  autoUniformGridParams acceleration grid. Needs mayapy:
+#
+#      mayapy benchmarks/intersectionBenchmark.py
+#      mayapy benchmarks/intersectionBenchmark.py --subdivisions 200 1000 --rays 2000
+#
+
+# import modules
+import argparse
+import math
+import random
+import sys
+import time
+
+
+def randomRays(count, radius, seed):
+    """ Rays from a sphere around the target aimed at points near its centre. """
+    rng = random.Random(seed)
+    rays = []
+    for i in range(count):
+        theta = math.acos(rng.uniform(-1, 1))
+        phi = rng.uniform(0, 2 * math.pi)
+        origin = [3 * radius * math.sin(theta) * math.cos(phi), 3 * radius * math.cos(theta),
+                  3 * radius * math.sin(theta) * math.sin(phi)]
+        target = [rng.uniform(-0.5, 0.5) * radius for k in range(3)]
+        rays.append((origin, [t - o for t, o in zip(target, origin)]))
+    return rays
+
+
+def castRays(OpenMaya, fnMesh, rays, accelParams):
+    """ Return the number of hits, with the arguments getIntersection passes. """
+    util = OpenMaya.MScriptUtil()
+    hits = 0
+    for origin, direction in rays:
+        hitPoint = OpenMaya.MFloatPoint()
+        hitFacePtr = util.asIntPtr()
+        if fnMesh.closestIntersection(OpenMaya.MFloatPoint(*origin), OpenMaya.MFloatVector(*direction), None, None,
+                                      False, OpenMaya.MSpace.kWorld, 99999, False, accelParams, hitPoint, None,
+                                      hitFacePtr, None, None, None):
+            hits += 1
+    return hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ray casts of DuplicateOverSurface.")
+    parser.add_argument("--subdivisions", type=int, nargs="+", default=[100, 300, 1000],
+                        help="polySphere subdivisions, faces = subdivisions ** 2")
+    parser.add_argument("--rays", type=int, default=500)
+    parser.add_argument("--brute-force-max", type=int, default=200,
+                        help="rays cast without a grid, they are slow on dense meshes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    from maya import OpenMaya
+    from maya import cmds
+
+    sys.stdout.write("%10s %14s %14s %14s %10s\n" % ("faces", "no grid (r/s)", "build (s)", "grid (r/s)", "speedup"))
+    for subdivisions in args.subdivisions:
+        cmds.file(new=True, force=True)
+        sphere = cmds.polySphere(radius=10, subdivisionsX=subdivisions, subdivisionsY=subdivisions,
+                                 constructionHistory=False)[0]
+        selectionList = OpenMaya.MSelectionList()
+        selectionList.add(sphere)
+        dagPath = OpenMaya.MDagPath()
+        selectionList.getDagPath(0, dagPath)
+        fnMesh = OpenMaya.MFnMesh(dagPath)
+        rays = randomRays(args.rays, 10.0, args.seed)
+
+        bruteRays = rays[:args.brute_force_max]
+        start = time.perf_counter()
+        castRays(OpenMaya, fnMesh, bruteRays, None)
+        bruteRate = len(bruteRays) / (time.perf_counter() - start)
+
+        # 第一次查询时建网格，之后的查询复用同一个网格
+        accelParams = OpenMaya.MFnMesh.autoUniformGridParams()
+        start = time.perf_counter()
+        castRays(OpenMaya, fnMesh, rays[:1], accelParams)
+        buildTime = time.perf_counter() - start
+        start = time.perf_counter()
+        castRays(OpenMaya, fnMesh, rays, accelParams)
+        gridRate = len(rays) / (time.perf_counter() - start)
+        fnMesh.freeCachedIntersectionAccelerator()
+
+        sys.stdout.write("%10d %14.0f %14.3f %14.0f %9.0fx\n"
+                         % (fnMesh.numPolygons(), bruteRate, buildTime, gridRate, gridRate / bruteRate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#
+#  rainOnSurfaceBenchmark.py
+#
+#  Times the rainOnSurface window functions (checkMesh, subDMesh, waterDrops,
+#  rerain, vertexWP) on synthetic meshes with the recording fake of maya.cmds and
+#  OpenMaya from fakeMaya.py, and writes the timings and command counts as
+#  JSON. Needs only python + numpy:
+#
+#      python benchmarks/rainOnSurfaceBenchmark.py --output rainBenchmark.json
+#      python benchmarks/rainOnSurfaceBenchmark.py --meshes grid scanned --densities 1000 20000 --repeat 3
+#
+
+# import modules
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import numpy as np
+
+import fakeMaya
+import syntheticMeshes
+
+scene = fakeMaya.install()
+cmds = sys.modules["maya.cmds"]
+
+# the window is built on import, against the fake
+import rainDrops
+import rainMayaIO
+import rainOnSurface
+
+
+def measure(function, repeat):
+    """ Run function repeat times and return the best time with the command counts of the last run.
+        Args:
+            function (callable)
+            repeat   (int)
+        Returns:
+            dict
+    """
+    best = float("inf")
+    for i in range(repeat):
+        scene.calls.clear()
+        nodesBefore = len(scene.nodes)
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best,
+            "calls": dict(scene.calls),
+            "totalCalls": sum(scene.calls.values()),
+            "nodesCreated": len(scene.nodes) - nodesBefore}
+
+
+def newWindow(meshName, density, samplingMode, outputMode, seed):
+    ui = rainOnSurface.windowUI()
+    ui.baseObject = meshName
+    cmds.intSliderGrp("dropDensity", edit=True, v=density)
+    cmds.intSliderGrp("seed", edit=True, v=seed)
+    cmds.optionMenu("samplingMode", edit=True, value=samplingMode)
+    cmds.optionMenu("outputMode", edit=True, value=outputMode)
+    return ui
+
+
+def deformPatch(meshName, share=0.1, offset=0.05):
+    """ Push the first share of the vertices along +Y, like a local sculpt, and return the old points. """
+    shape = scene.shape(meshName)
+    points = shape.mesh.points.copy()
+    shape.mesh.points = points.copy()
+    shape.mesh.points[:max(1, int(len(points) * share))] += [0.0, offset, 0.0]
+    scene.dirty(shape)
+    return points
+
+
+def clearRun(meshName):
+    # 删除上一次生成的水滴，但保留网格缓存，重复点击的情况也要测到
+    for name in list(scene.nodes):
+        if name in scene.nodes and scene.nodes[name].parent is None and name != meshName:
+            scene.delete(scene.nodes[name])
+
+
+def benchmarkMesh(kind, resolution, densities, samplingModes, outputModes, repeat, seed):
+    results = []
+    scene.reset()
+    points, faceCounts, faceConnects = syntheticMeshes.MESHES[kind](resolution)
+    meshName = scene.addMesh(kind, points, faceCounts, faceConnects)
+    rainMayaIO.clearProxyCache()
+    rainMayaIO.getDropTemplates()
+
+    def record(operation, density, samplingMode, outputMode, function, runs=repeat):
+        result = {"mesh": kind, "vertices": len(points), "faces": len(faceCounts), "operation": operation,
+                  "density": density, "samplingMode": samplingMode, "outputMode": outputMode}
+        result.update(measure(function, runs))
+        results.append(result)
+        sys.stderr.write("%-8s %-10s %7d %-24s %-15s %8.4f s %8d calls\n"
+                         % (kind, operation, density, samplingMode or "", outputMode or "",
+                            result["seconds"], result["totalCalls"]))
+
+    for density in densities:
+        ui = newWindow(meshName, density, rainDrops.SAMPLING_VERTICES, rainDrops.OUTPUT_SEPARATE, seed)
+        record("checkMesh", density, rainDrops.SAMPLING_VERTICES, None, ui.checkMesh)
+        record("subDMesh", density, rainDrops.SAMPLING_VERTICES, None, ui.subDMesh)
+
+        for samplingMode in samplingModes:
+            for outputMode in outputModes:
+                ui = newWindow(meshName, density, samplingMode, outputMode, seed)
+                ui.useSubDProxy = samplingMode == rainDrops.SAMPLING_VERTICES
+
+                def run():
+                    clearRun(meshName)
+                    ui.waterDrops()
+
+                record("waterDrops", density, samplingMode, outputMode, run)
+
+                # 改动一小块网格，增量更新只重写这块上的水滴
+                cmds.select(clear=True)
+                originalPoints = deformPatch(meshName)
+                record("rerain", density, samplingMode, outputMode, ui.rerain)
+                shape = scene.shape(meshName)
+                shape.mesh.points = originalPoints
+                scene.dirty(shape)
+        clearRun(meshName)
+
+    # vertexWP 读的是当前选择的预制水滴
+    templates = rainMayaIO.getDropTemplates()
+    drop = rainMayaIO.createMeshFromArrays(templates.points[0], templates.faceCounts, templates.faceConnects,
+                                           "preMadeDrop_1")
+    cmds.select(drop)
+    record("vertexWP", 0, None, None, newWindow(meshName, 0, rainDrops.SAMPLING_VERTICES,
+                                                rainDrops.OUTPUT_SEPARATE, seed).vertexWP)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rainOnSurface with a fake maya.cmds.")
+    parser.add_argument("--meshes", nargs="+", default=sorted(syntheticMeshes.MESHES),
+                        choices=sorted(syntheticMeshes.MESHES))
+    parser.add_argument("--resolution", type=int, default=150, help="quads per side / rings of the meshes")
+    parser.add_argument("--densities", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--sampling", nargs="+", default=list(rainDrops.SAMPLING_MODES),
+                        choices=rainDrops.SAMPLING_MODES)
+    parser.add_argument("--output-modes", nargs="+", default=list(rainDrops.OUTPUT_MODES),
+                        choices=rainDrops.OUTPUT_MODES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="JSON file, default stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for kind in args.meshes:
+        results.extend(benchmarkMesh(kind, args.resolution, args.densities, args.sampling, args.output_modes,
+                                     args.repeat, args.seed))
+
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(),
+              "numpy": np.__version__,
+              "machine": platform.machine(),
+              "resolution": args.resolution,
+              "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
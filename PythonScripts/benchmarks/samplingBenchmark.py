@@ -0,0 +1,69 @@
+#
+#  samplingBenchmark.py
+#
+#  Micro-benchmark of the random-without-replacement draw used by waterDrops.
+#  Compares the old random.choice + list.remove loop with
+#  rainScatter.sampleWithoutReplacement at several drop counts. Runs with a
+#  plain python + numpy, no Maya needed:
+#
+#      python benchmarks/samplingBenchmark.py
+#      python benchmarks/samplingBenchmark.py --counts 1000 10000 100000 --population-factor 4
+#
+
+# import modules
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rainScatter
+
+
+def legacyDraw(populationSize, count):
+    """ The old waterDrops pattern: pick a random index, then remove it from the list. """
+    randomVertIndexList = list(range(populationSize))
+    picked = []
+    for i in range(count):
+        randomVertex = random.choice(randomVertIndexList)
+        randomVertIndexList.remove(randomVertex)
+        picked.append(randomVertex)
+    return picked
+
+
+def timeIt(function, repeat):
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the drop sampling without replacement.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--population-factor", type=float, default=2.0,
+                        help="mesh vertices per requested drop")
+    parser.add_argument("--legacy-max", type=int, default=20000,
+                        help="skip the quadratic legacy loop above this count")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    sys.stdout.write("%10s %12s %14s %14s %10s\n" % ("drops", "vertices", "legacy (s)", "numpy (s)", "speedup"))
+    for count in args.counts:
+        populationSize = int(count * args.population_factor)
+
+        numpyTime = timeIt(lambda: rainScatter.sampleWithoutReplacement(populationSize, count, 1), args.repeat)
+        if count <= args.legacy_max:
+            legacyTime = timeIt(lambda: legacyDraw(populationSize, count), 1)
+            sys.stdout.write("%10d %12d %14.4f %14.4f %9.0fx\n"
+                             % (count, populationSize, legacyTime, numpyTime, legacyTime / numpyTime))
+        else:
+            sys.stdout.write("%10d %12d %14s %14.4f %10s\n" % (count, populationSize, "skipped", numpyTime, "-"))
+
+
+if __name__ == "__main__":
+    main()
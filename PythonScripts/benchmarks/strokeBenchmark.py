@@ -0,0 +1,81 @@
+#
+#  strokeBenchmark.py
+#
+#  Cost of the ray casts of one paint stroke of DuplicateOverSurface
+#  (main.py): every stamp against every triangle, against the batched
+#  traversal of meshBvh.TriangleBvh (built once per target mesh). A pinhole
+#  camera stands in for the Maya viewport. Runs with a plain python + numpy:
+#
+#      python benchmarks/strokeBenchmark.py
+#      python benchmarks/strokeBenchmark.py --resolution 300 --stamps 16 64 256
+#
+
+# import modules
+import argparse
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import numpy as np
+
+import meshBvh
+import rainScatter
+import syntheticMeshes
+
+IMAGE_SIZE = 1000.0
+
+
+def strokeRays(count, eye, focal, seed):
+    """ Rays through the pixels of a wavy stroke across the middle of the image. """
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.25, 0.75, count) * IMAGE_SIZE
+    y = (0.5 + 0.1 * np.sin(x / 60.0)) * IMAGE_SIZE + rng.uniform(-2, 2, count)
+    pixels = np.floor(np.stack([x, y], axis=1))
+    directions = np.hstack([(pixels - IMAGE_SIZE * 0.5) / focal, -np.ones((count, 1))])
+    return np.tile(eye, (count, 1)), directions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the batched ray casts of a paint stroke.")
+    parser.add_argument("--mesh", default="sphere", choices=sorted(syntheticMeshes.MESHES))
+    parser.add_argument("--resolution", type=int, default=150)
+    parser.add_argument("--stamps", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    points, faceCounts, faceConnects = syntheticMeshes.MESHES[args.mesh](args.resolution)
+    meshArrays = rainScatter.MeshArrays(points, faceCounts, faceConnects)
+    triangles = meshArrays.points[meshArrays.triangles()[0]]
+    eye = np.array([0.0, 0.0, 15.0])
+    focal = IMAGE_SIZE
+
+    start = time.perf_counter()
+    bvh = meshBvh.TriangleBvh(triangles)
+    buildTime = time.perf_counter() - start
+
+    sys.stdout.write("%s, %d triangles, hierarchy built in %.3f s\n" % (args.mesh, len(triangles), buildTime))
+    sys.stdout.write("%10s %16s %16s %10s %8s\n" % ("stamps", "every pair (ms)", "batch (ms)", "speedup", "hits"))
+    for count in args.stamps:
+        origins, directions = strokeRays(count, eye, focal, args.seed)
+
+        start = time.perf_counter()
+        everyDistance, everyTriangle = meshBvh.intersectTriangles(origins, directions, triangles)
+        everyTime = (time.perf_counter() - start) * 1000.0
+
+        # 和 main.castStrokeRays 一样：整笔的射线一起逐层遍历
+        start = time.perf_counter()
+        batchDistance, batchTriangle = bvh.intersect(origins, directions)
+        batchTime = (time.perf_counter() - start) * 1000.0
+
+        if not np.array_equal(everyTriangle, batchTriangle):
+            raise RuntimeError("The batch missed a hit of the full test")
+        sys.stdout.write("%10d %16.1f %16.1f %9.1fx %8d\n"
+                         % (count, everyTime, batchTime, everyTime / batchTime, (batchTriangle >= 0).sum()))
+
+
+if __name__ == "__main__":
+    main()
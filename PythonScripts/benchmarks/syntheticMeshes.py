@@ -0,0 +1,95 @@
+# import modules
+import numpy as np
+
+# 基准测试用的合成网格：返回 (points, faceCounts, faceConnects)，
+# 规则的平面网格、UV 球，以及一个模拟扫描模型的不规则三角网格。
+
+
+def grid(resolution, size=10.0):
+    """ Flat quad grid in the XZ plane, facing +Y.
+        Args:
+            resolution (int)   : quads along each side
+            size       (float) : side length
+        Returns:
+            tuple : (points, faceCounts, faceConnects)
+    """
+    n = resolution
+    xs, zs = np.meshgrid(np.linspace(-size / 2, size / 2, n + 1), np.linspace(-size / 2, size / 2, n + 1))
+    points = np.stack([xs.ravel(), np.zeros(xs.size), zs.ravel()], axis=1)
+
+    i = (np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]).ravel()
+    faceConnects = np.stack([i, i + n + 1, i + n + 2, i + 1], axis=1).ravel()
+    return points, np.full(n * n, 4), faceConnects
+
+
+def sphere(rows, cols, radius=5.0):
+    """ UV sphere: quads between the rings, triangles at the poles.
+        Args:
+            rows   (int) : rings from pole to pole
+            cols   (int) : segments around
+            radius (float)
+        Returns:
+            tuple : (points, faceCounts, faceConnects)
+    """
+    theta = np.linspace(0, np.pi, rows + 1)[1:-1]
+    phi = np.linspace(0, 2 * np.pi, cols, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing="ij")
+    ring = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p)], axis=-1).reshape(-1, 3)
+    points = np.concatenate([[[0, 1, 0]], ring, [[0, -1, 0]]]) * radius
+
+    bottom = len(points) - 1
+    c = np.arange(cols)
+    cNext = (c + 1) % cols
+    faces = [np.stack([np.zeros(cols, dtype=np.int64), 1 + cNext, 1 + c], axis=1).ravel()]
+    counts = [np.full(cols, 3)]
+
+    r = np.arange(rows - 2)[:, None]
+    quads = np.stack([1 + r * cols + c, 1 + r * cols + cNext, 1 + (r + 1) * cols + cNext, 1 + (r + 1) * cols + c],
+                     axis=-1).reshape(-1, 4)
+    faces.append(quads.ravel())
+    counts.append(np.full(len(quads), 4))
+
+    last = 1 + (rows - 2) * cols
+    faces.append(np.stack([np.full(cols, bottom), last + c, last + cNext], axis=1).ravel())
+    counts.append(np.full(cols, 3))
+
+    return points, np.concatenate(counts), np.concatenate(faces)
+
+
+def scanned(rows, cols, radius=5.0, noise=0.02, seed=0):
+    """ Scan-like mesh: a triangulated sphere with uneven ring spacing (dense
+        at the top, sparse at the bottom) and noisy vertex positions.
+        Args:
+            rows   (int)
+            cols   (int)
+            radius (float)
+            noise  (float) : vertex noise relative to the radius
+            seed   (int)
+        Returns:
+            tuple : (points, faceCounts, faceConnects)
+    """
+    points, faceCounts, faceConnects = sphere(rows, cols, radius)
+    rng = np.random.default_rng(seed)
+
+    # 把纬度往上挤，得到疏密不均的三角形
+    y = points[:, 1] / radius
+    squeezed = np.cos(np.arccos(np.clip(y, -1, 1)) ** 1.5 / np.pi ** 0.5)
+    scale = np.sqrt(np.maximum(1 - squeezed ** 2, 0) / np.maximum(1 - y ** 2, 1e-12))
+    points = np.stack([points[:, 0] * scale, squeezed * radius, points[:, 2] * scale], axis=1)
+    points += rng.normal(scale=noise * radius, size=points.shape)
+
+    # 四边形全部拆成三角形，对角线方向随机
+    starts = np.concatenate(([0], np.cumsum(faceCounts)[:-1]))
+    triangles = [faceConnects[starts[faceCounts == 3][:, None] + np.arange(3)]]
+    quads = faceConnects[starts[faceCounts == 4][:, None] + np.arange(4)]
+    flip = rng.random(len(quads)) < 0.5
+    quads[flip] = np.roll(quads[flip], 1, axis=1)
+    triangles += [quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]]
+    triangles = np.concatenate(triangles)
+
+    return points, np.full(len(triangles), 3), triangles.ravel()
+
+
+MESHES = {"grid": lambda resolution: grid(resolution),
+          "sphere": lambda resolution: sphere(resolution, 2 * resolution),
+          "scanned": lambda resolution: scanned(resolution, 2 * resolution)}
@@ -14,6 +14,7 @@
 from maya import OpenMaya
 from maya import OpenMayaUI
 from maya import OpenMayaMPx
+from maya.api import OpenMaya as om2
 from maya import cmds
 try:
     from PySide.QtGui import QApplication
@@ -24,18 +25,44 @@ except ImportError:
 import math
 import sys
 
+import numpy as np
+
+import meshBvh
+
 
 DRAGGER = "duplicateOverSurfaceDragger"
-UTIL = OpenMaya.MScriptUtil()
+
+# Intersection acceleration grids of the snap targets,
+# {shape full path: (MMeshIsectAccelParams, dirty callback id)}
+ACCEL_CACHE = {}
+
+# Object space (normals, tangents) per face of the target meshes, see getFaceFrames
+FRAME_CACHE = {}
+
+# (meshBvh.TriangleBvh, triangleFaces) of the target meshes in object space, see getTargetTriangles
+TRIANGLE_CACHE = {}
+
+# MeshPicker of the running tool session
+PICKER = None
+
+# Copies of a paint stroke waiting for the duplicateOverSurfacePaint command
+PENDING_STAMPS = None
 
 
 kPluginCmdName = "duplicateOverSurface"
+kPaintCmdName = "duplicateOverSurfacePaint"
 kRotationFlag = "-r"
 kRotationFlagLong = "-rotation"
 kDummyFlag = "-d"
 kDummyFlagLong = "-dummy"
 kInstanceFlag = "-ilf"
 kInstanceFlagLong = "-instanceLeaf"
+kPaintFlag = "-p"
+kPaintFlagLong = "-paint"
+kSpacingFlag = "-sp"
+kSpacingFlagLong = "-spacing"
+kJitterFlag = "-j"
+kJitterFlagLong = "-jitter"
 
 
 # Syntax creator
@@ -54,6 +81,18 @@ def syntaxCreator():
         kInstanceFlag,
         kInstanceFlagLong,
         OpenMaya.MSyntax.kBoolean)
+    syntax.addFlag(
+        kPaintFlag,
+        kPaintFlagLong,
+        OpenMaya.MSyntax.kBoolean)
+    syntax.addFlag(
+        kSpacingFlag,
+        kSpacingFlagLong,
+        OpenMaya.MSyntax.kDouble)
+    syntax.addFlag(
+        kJitterFlag,
+        kJitterFlagLong,
+        OpenMaya.MSyntax.kDouble)
     return syntax
 
 
@@ -68,12 +107,23 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         self.SCALE_ORIG = None
         self.MATRIX_ORIG = None
         self.TARGET_FNMESH = None
+        self.TARGET_ACCEL = None
+        self.TARGET_PATH = None
+        self.TARGET_FRAMES = None
         self.MOD_FIRST = None
         self.MOD_POINT = None
+        self.DUPLICATED_PATH = None
+        self.PENDING_DRAG = None
+        self.LAST_MATRIX = None
+        self.STROKE = None
         self.SPACE = OpenMaya.MSpace.kWorld
 
         self.ROTATION = True
         self.InstanceFlag = False
+        self.PaintFlag = False
+        # paint mode: pixels between copies, random offset as a fraction of the spacing
+        self.SPACING = 40.0
+        self.JITTER = 0.0
 
         self.SHIFT = QtCore.Qt.ShiftModifier
         self.CTRL = QtCore.Qt.ControlModifier
@@ -89,6 +139,15 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         if argData.isFlagSet(kInstanceFlag) is True:
             self.InstanceFlag = argData.flagArgumentBool(kInstanceFlag, 0)
 
+        if argData.isFlagSet(kPaintFlag) is True:
+            self.PaintFlag = argData.flagArgumentBool(kPaintFlag, 0)
+
+        if argData.isFlagSet(kSpacingFlag) is True:
+            self.SPACING = max(1.0, argData.flagArgumentDouble(kSpacingFlag, 0))
+
+        if argData.isFlagSet(kJitterFlag) is True:
+            self.JITTER = argData.flagArgumentDouble(kJitterFlag, 0)
+
         cmds.setToolTo(self.setupDragger())
 
     def setupDragger(self):
@@ -99,11 +158,15 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         except:
             pass
 
+        # The picking hierarchy lives as long as the tool
+        startPicker()
+
         dragger = cmds.draggerContext(
             DRAGGER,
             pressCommand=self.pressEvent,
             dragCommand=self.dragEvent,
             releaseCommand=self.releaseEvent,
+            finalize=stopPicker,
             space='screen',
             projection='viewPlane',
             undoMode='step',
@@ -125,6 +188,10 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         y = pressPosition[1]
 
         self.ANCHOR_POINT = [x, y]
+        self.DUPLICATED_PATH = None
+        self.PENDING_DRAG = None
+        self.LAST_MATRIX = None
+        self.STROKE = None
 
         # Convert
         point_in_3d, vector_in_3d = convertTo3D(x, y)
@@ -140,6 +207,14 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         self.SCALE_ORIG = cmds.getAttr(self.SOURCE + ".scale")[0]
         self.MATRIX_ORIG = cmds.xform(self.SOURCE, q=True, matrix=True)
         self.TARGET_FNMESH = OpenMaya.MFnMesh(targetDagPath)
+        self.TARGET_ACCEL = getAccelParams(targetDagPath)
+        self.TARGET_PATH = OpenMaya.MDagPath(targetDagPath)
+        self.TARGET_FRAMES = getFaceFrames(targetDagPath)
+
+        # Paint mode only records the stroke, the copies are made on release
+        if self.PaintFlag is True:
+            self.STROKE = [[x, y]]
+            return
 
         transformMatrix = self.getMatrix(
             point_in_3d,
@@ -152,24 +227,35 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
             return
 
         # Create new object to snap
-        self.DUPLICATED = self.getNewObject()
+        self.DUPLICATED = self.createNewObject()
+
+        # Apply transformMatrix to the new object
+        cmds.xform(self.DUPLICATED, matrix=transformMatrix)
+        self.DUPLICATED_PATH = getDagPath(self.DUPLICATED)
+        self.LAST_MATRIX = transformMatrix
+
+    def getNewObject(self):
+        return cmds.duplicate(self.SOURCE, ilf=self.InstanceFlag)[0]
+
+    def createNewObject(self):
+        """ Duplicate the source with its pivot moved to the origin.
+            Returns:
+                str : name of the new object
+        """
+        newObject = self.getNewObject()
 
         # Reset transform of current object
-        cmds.setAttr(self.DUPLICATED + ".translate", *[0, 0, 0])
+        cmds.setAttr(newObject + ".translate", *[0, 0, 0])
 
         location = [-i for i
-                    in cmds.xform(self.DUPLICATED, q=True, ws=True, rp=True)]
-        cmds.setAttr(self.DUPLICATED + ".translate", *location)
+                    in cmds.xform(newObject, q=True, ws=True, rp=True)]
+        cmds.setAttr(newObject + ".translate", *location)
 
         # Can't apply freeze to instances
         if self.InstanceFlag is not True:
-            cmds.makeIdentity(self.DUPLICATED, apply=True, t=True)
+            cmds.makeIdentity(newObject, apply=True, t=True)
 
-        # Apply transformMatrix to the new object
-        cmds.xform(self.DUPLICATED, matrix=transformMatrix)
-
-    def getNewObject(self):
-        return cmds.duplicate(self.SOURCE, ilf=self.InstanceFlag)[0]
+        return newObject
 
     def dragEvent(self):
         """ Event while dragging a 3d view """
@@ -185,6 +271,11 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         x = dragPosition[0]
         y = dragPosition[1]
 
+        if self.PaintFlag is True:
+            if self.STROKE is not None:
+                self.STROKE.append([x, y])
+            return
+
         modifier = cmds.draggerContext(
             DRAGGER,
             query=True,
@@ -220,6 +311,19 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
             length = 1.0
             degree = 0.0
 
+        # Only keep the latest cursor position, the ray cast runs once per idle
+        if self.PENDING_DRAG is None:
+            cmds.evalDeferred(self.flushDrag, lowestPriority=True)
+        self.PENDING_DRAG = (point_in_3d, vector_in_3d, length, degree)
+
+    def flushDrag(self):
+        """ Move the new object to the latest drag position. """
+
+        if self.PENDING_DRAG is None or self.DUPLICATED_PATH is None:
+            return
+        point_in_3d, vector_in_3d, length, degree = self.PENDING_DRAG
+        self.PENDING_DRAG = None
+
         # Get new transform matrix for new object
         transformMatrix = self.getMatrix(
             point_in_3d,
@@ -231,18 +335,80 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
             degree
             )
 
-        if transformMatrix is None:
+        if transformMatrix is None or isSameMatrix(transformMatrix, self.LAST_MATRIX):
             return
 
-        # Apply new transform
-        cmds.xform(self.DUPLICATED, matrix=transformMatrix)
-        cmds.setAttr(self.DUPLICATED + ".shear", *[0, 0, 0])
+        # Apply new transform through the API, the undoable write happens on release
+        setTransformMatrix(self.DUPLICATED_PATH, transformMatrix)
+        self.LAST_MATRIX = transformMatrix
 
-        cmds.refresh(currentView=True, force=True)
+        OpenMayaUI.M3dView.active3dView().refresh(False, False)
 
     def releaseEvent(self):
         self.MOD_FIRST = True
 
+        if self.PaintFlag is True:
+            self.paintStroke()
+            return
+
+        if self.DUPLICATED_PATH is None:
+            return
+        self.flushDrag()
+
+        # One undoable write of the final matrix, so redo puts the object where it was dropped
+        if self.LAST_MATRIX is not None:
+            cmds.xform(self.DUPLICATED, matrix=self.LAST_MATRIX)
+            cmds.setAttr(self.DUPLICATED + ".shear", *[0, 0, 0])
+        self.DUPLICATED_PATH = None
+
+    def paintStroke(self):
+        """ Place copies along the recorded stroke, all in one undo step. """
+
+        global PENDING_STAMPS
+
+        if self.STROKE is None:
+            return
+        stroke = np.array(self.STROKE, dtype=np.float64)
+        self.STROKE = None
+
+        # viewToWorld takes whole pixels
+        stamps = np.floor(strokeStamps(stroke, self.SPACING, self.JITTER, np.random.default_rng()))
+        origins = []
+        directions = []
+        for x, y in stamps.tolist():
+            point_in_3d, vector_in_3d = convertTo3D(x, y)
+            origins.append([point_in_3d.x, point_in_3d.y, point_in_3d.z])
+            directions.append([vector_in_3d.x, vector_in_3d.y, vector_in_3d.z])
+
+        # All rays of the stroke at once
+        hitPoints, faceIDs = castStrokeRays(
+            self.TARGET_PATH,
+            np.array(origins, dtype=np.float64),
+            np.array(directions, dtype=np.float64))
+
+        hit = faceIDs >= 0
+        if not hit.any():
+            return
+
+        # All matrices at once, like buildMatrix without the modifier keys
+        if self.ROTATION is False:
+            normals = np.tile(self.MATRIX_ORIG[4:7], (hit.sum(), 1))
+            tangents = np.tile(self.MATRIX_ORIG[0:3], (hit.sum(), 1))
+        else:
+            normals, tangents = worldFrames(
+                self.TARGET_FRAMES,
+                faceIDs[hit],
+                matrixToNumpy(self.TARGET_PATH.inclusiveMatrix()))
+        matrices = stampMatrices(
+            hitPoints[hit],
+            normals,
+            tangents,
+            self.SCALE_ORIG)
+
+        # One command creates every copy, so the stroke is one undo step
+        PENDING_STAMPS = (self.createNewObject, self.InstanceFlag, matrices.reshape(-1, 16).tolist())
+        cmds.duplicateOverSurfacePaint()
+
     def getDragInfo(self, x, y):
         """ Get distance and angle in screen space. """
 
@@ -276,46 +442,14 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
                 OpenMaya.MFloatPoint : hitPoint
         """
 
-        hitPoint = OpenMaya.MFloatPoint()
-        hitFacePtr = UTIL.asIntPtr()
-        idSorted = False
-        testBothDirections = False
-        faceIDs = None
-        triIDs = None
-        accelParam = None
-        hitRayParam = None
-        hitTriangle = None
-        hitBary1 = None
-        hitBary2 = None
-        maxParamPtr = 99999
-
-        # intersectPoint = OpenMaya.MFloatPoint(
-        result = fnMesh.closestIntersection(
-            OpenMaya.MFloatPoint(
-                point_in_3d.x,
-                point_in_3d.y,
-                point_in_3d.z),
-            OpenMaya.MFloatVector(vector_in_3d),
-            faceIDs,
-            triIDs,
-            idSorted,
-            self.SPACE,
-            maxParamPtr,
-            testBothDirections,
-            accelParam,
-            hitPoint,
-            hitRayParam,
-            hitFacePtr,
-            hitTriangle,
-            hitBary1,
-            hitBary2)
-
-        faceID = UTIL.getInt(hitFacePtr)
-
-        if result is True:
-            return hitPoint, faceID
-        else:
-            return None, None
+        hitPoint, faceID, rayParam = closestHit(
+            point_in_3d,
+            vector_in_3d,
+            fnMesh,
+            self.TARGET_ACCEL,
+            self.SPACE)
+
+        return hitPoint, faceID
 
     def getMatrix(self,
                   mPoint,
@@ -340,6 +474,31 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
         if OP is None and faceID is None:
             return None
 
+        return self.buildMatrix(
+            OP,
+            faceID,
+            targetFnMesh,
+            scale_orig,
+            matrix_orig,
+            scale_plus,
+            degree_plus)
+
+    def buildMatrix(self,
+                    OP,
+                    faceID,
+                    targetFnMesh,
+                    scale_orig,
+                    matrix_orig,
+                    scale_plus=1,
+                    degree_plus=0.0):
+
+        """ Return the transform matrix of a new object placed at a hit point.
+            Args:
+                OP     (OpenMaya.MFloatPoint) : hit point
+                faceID (int)                  : hit face
+            Returns:
+                list : 16 values for matrixs
+        """
         qtMod = QApplication.keyboardModifiers()
         if qtMod == (self.CTRL | self.SHIFT):
             OP = getClosestVertex(OP, faceID, targetFnMesh)
@@ -357,8 +516,7 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
                 matrix_orig[2])
             TV.normalize()
         else:
-            NV = self.getNormal(OP, targetFnMesh)
-            TV = self.getTangent(faceID, targetFnMesh)
+            NV, TV = self.getFrame(faceID)
 
         # Ctrl-hold rotation
         if qtMod == self.CTRL:
@@ -396,53 +554,80 @@ class DuplicateOverSurface(OpenMayaMPx.MPxCommand):
 
         return matrix
 
-    def getTangent(self, faceID, targetFnMesh):
-        """ Return a tangent vector of a face.
+    def getFrame(self, faceID):
+        """ Return the normal and tangent of a face of the target from the cached frames.
             Args:
-                faceID  (int)
-                mVector (OpenMaya.MVector)
+                faceID (int)
             Returns:
+                OpenMaya.MVector : normal vector
                 OpenMaya.MVector : tangent vector
         """
 
-        tangentArray = OpenMaya.MFloatVectorArray()
-        targetFnMesh.getFaceVertexTangents(
-            faceID,
-            tangentArray,
-            self.SPACE)
-        numOfVtx = tangentArray.length()
-        x = sum([tangentArray[i].x for i in range(numOfVtx)]) / numOfVtx
-        y = sum([tangentArray[i].y for i in range(numOfVtx)]) / numOfVtx
-        z = sum([tangentArray[i].z for i in range(numOfVtx)]) / numOfVtx
-        tangentVector = OpenMaya.MVector()
-        tangentVector.x = x
-        tangentVector.y = y
-        tangentVector.z = z
-        tangentVector.normalize()
-
-        return tangentVector
-
-    def getNormal(self, pointPosition, targetFnMesh):
-        """ Return a normal vector of a face.
-            Args:
-                pointPosition  (OpenMaya.MFloatPoint)
-                targetFnMesh (OpenMaya.MFnMesh)
-            Returns:
-                OpenMaya.MVector : tangent vector
-                int              : faceID
-        """
+        normals, tangents = self.TARGET_FRAMES
+        matrix = self.TARGET_PATH.inclusiveMatrix()
 
-        ptr_int = UTIL.asIntPtr()
-        origin = OpenMaya.MPoint(pointPosition)
-        normal = OpenMaya.MVector()
-        targetFnMesh.getClosestNormal(
-            origin,
-            normal,
-            self.SPACE,
-            ptr_int)
+        # 缓存在物体空间，移动目标不用重新计算；法线要用逆矩阵的转置变换
+        normal = OpenMaya.MVector(*normals[faceID].tolist()) * matrix.inverse().transpose()
         normal.normalize()
+        tangent = OpenMaya.MVector(*tangents[faceID].tolist()) * matrix
+        tangent.normalize()
+
+        return normal, tangent
+
 
-        return normal
+class DuplicateOverSurfacePaint(OpenMayaMPx.MPxCommand):
+    """ Create the copies of a paint stroke queued in PENDING_STAMPS as one
+        undo step. They are made with undo recording off, so the undo record
+        only holds the new transforms.
+    """
+
+    def __init__(self):
+        super(DuplicateOverSurfacePaint, self).__init__()
+        self.stamps = None
+        self.createdNodes = []
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        global PENDING_STAMPS
+        self.stamps = PENDING_STAMPS
+        PENDING_STAMPS = None
+        if self.stamps is None:
+            raise RuntimeError("%s: nothing to paint" % kPaintCmdName)
+        self.redoIt()
+
+    def redoIt(self):
+        createNewObject, instanceLeaf, matrices = self.stamps
+
+        undoState = cmds.undoInfo(query=True, stateWithoutFlush=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+        try:
+            # Only the first copy needs the pivot reset, the rest duplicate it.
+            # cmds.duplicate keeps the shading group assignments, and every call
+            # duplicates all the copies so far, so n copies take log2(n) calls
+            names = [createNewObject()]
+            while len(names) < len(matrices):
+                names += cmds.duplicate(names[:len(matrices) - len(names)], ilf=instanceLeaf, returnRootsOnly=True)
+            dagPaths = [getDagPath(name) for name in names]
+
+            for dagPath, matrix in zip(dagPaths, matrices):
+                setTransformMatrix(dagPath, matrix)
+        finally:
+            cmds.undoInfo(stateWithoutFlush=undoState)
+
+        self.createdNodes = [OpenMaya.MObjectHandle(dagPath.node()) for dagPath in dagPaths]
+        self.clearResult()
+        for dagPath in dagPaths:
+            self.appendToResult(dagPath.partialPathName())
+
+    def undoIt(self):
+        modifier = OpenMaya.MDagModifier()
+        for handle in self.createdNodes:
+            if handle.isValid():
+                modifier.deleteNode(handle.object())
+        modifier.doIt()
+        self.createdNodes = []
 
 
 # Creator
@@ -450,10 +635,15 @@ def cmdCreator():
     return OpenMayaMPx.asMPxPtr(DuplicateOverSurface())
 
 
+def paintCmdCreator():
+    return OpenMayaMPx.asMPxPtr(DuplicateOverSurfacePaint())
+
+
 def initializePlugin(mObject):
     mPlugin = OpenMayaMPx.MFnPlugin(mObject, "Michitaka Inoue")
     try:
         mPlugin.registerCommand(kPluginCmdName, cmdCreator)
+        mPlugin.registerCommand(kPaintCmdName, paintCmdCreator)
         mPlugin.setVersion("0.10")
     except:
         sys.stderr.write("Failed to register command: %s\n" % kPluginCmdName)
@@ -461,9 +651,12 @@ def initializePlugin(mObject):
 
 
 def uninitializePlugin(mObject):
+    stopPicker()
+    clearAccelCache()
     mPlugin = OpenMayaMPx.MFnPlugin(mObject)
     try:
         mPlugin.deregisterCommand(kPluginCmdName)
+        mPlugin.deregisterCommand(kPaintCmdName)
     except:
         sys.stderr.write("Failed to unregister command: %s\n" % kPluginCmdName)
 
@@ -489,6 +682,184 @@ def convertTo3D(screen_x, screen_y):
     return point_in_3d, vector_in_3d
 
 
+def closestHit(point_in_3d, vector_in_3d, fnMesh, accelParams, space):
+    """ Return the closest intersection of a ray with a mesh.
+        Args:
+            point_in_3d  (OpenMaya.MPoint)
+            vector_in_3d (OpenMaya.MVector)
+            fnMesh       (OpenMaya.MFnMesh)
+            accelParams  (OpenMaya.MMeshIsectAccelParams) : None tests every triangle
+            space        (int)
+        Returns:
+            OpenMaya.MFloatPoint : hitPoint, None if the ray misses
+            int                  : faceID
+            float                : distance along the ray in units of vector_in_3d
+    """
+    hitPoint = OpenMaya.MFloatPoint()
+    # 每个输出指针各用一个 MScriptUtil，共用一个的话两个指针指向同一块内存
+    hitFaceUtil = OpenMaya.MScriptUtil()
+    hitFacePtr = hitFaceUtil.asIntPtr()
+    hitRayParamUtil = OpenMaya.MScriptUtil()
+    hitRayParamPtr = hitRayParamUtil.asFloatPtr()
+    maxParamPtr = 99999
+
+    result = fnMesh.closestIntersection(
+        OpenMaya.MFloatPoint(
+            point_in_3d.x,
+            point_in_3d.y,
+            point_in_3d.z),
+        OpenMaya.MFloatVector(vector_in_3d),
+        None,
+        None,
+        False,
+        space,
+        maxParamPtr,
+        False,
+        accelParams,
+        hitPoint,
+        hitRayParamPtr,
+        hitFacePtr,
+        None,
+        None,
+        None)
+
+    if result is True:
+        return hitPoint, OpenMaya.MScriptUtil.getInt(hitFacePtr), OpenMaya.MScriptUtil.getFloat(hitRayParamPtr)
+    else:
+        return None, None, None
+
+
+class MeshPicker(object):
+    """ Ray picking of the visible meshes: the ray is first tested against a
+        BVH of their world bounding boxes, then only against the meshes whose
+        box it enters, nearest first. Edited, moved, new and deleted meshes
+        are tracked with callbacks and refreshed on the next pick.
+    """
+
+    def __init__(self):
+        self.bvh = meshBvh.BoxBvh()
+        self.dagPaths = {}
+        self.meshCallbacks = {}
+        self.stale = set()
+        self.added = []
+
+        # 隐藏的网格也要放进去，之后显示出来就能拾取；可见性在 pick 里判断
+        for shape in cmds.ls(type="mesh", noIntermediate=True, long=True) or []:
+            selectionList = OpenMaya.MSelectionList()
+            selectionList.add(shape)
+            dagPath = OpenMaya.MDagPath()
+            selectionList.getDagPath(0, dagPath)
+            self.addMesh(dagPath)
+
+        self.callbackIds = [
+            OpenMaya.MDGMessage.addNodeAddedCallback(self.onMeshAdded, "mesh"),
+            OpenMaya.MDGMessage.addNodeRemovedCallback(self.onMeshRemoved, "mesh")]
+
+    def addMesh(self, dagPath):
+        key = dagPath.fullPathName()
+        if key in self.dagPaths:
+            return
+        self.dagPaths[key] = OpenMaya.MDagPath(dagPath)
+        self.meshCallbacks[key] = [
+            OpenMaya.MNodeMessage.addNodeDirtyCallback(dagPath.node(), self.onMeshChanged, key),
+            OpenMaya.MDagMessage.addWorldMatrixModifiedCallback(dagPath, self.onMatrixChanged, key)]
+        self.stale.add(key)
+
+    def removeMesh(self, key):
+        for callbackId in self.meshCallbacks.pop(key, []):
+            OpenMaya.MMessage.removeCallback(callbackId)
+        self.dagPaths.pop(key, None)
+        self.stale.discard(key)
+        self.bvh.remove(key)
+
+    def onMeshChanged(self, mObject, key):
+        self.stale.add(key)
+
+    def onMatrixChanged(self, transformNode, modified, key):
+        self.stale.add(key)
+
+    def onMeshAdded(self, mObject, clientData):
+        # 新节点这时还没有放进 DAG，下次拾取时再读它的路径
+        self.added.append(OpenMaya.MObjectHandle(mObject))
+
+    def onMeshRemoved(self, mObject, clientData):
+        dagPath = OpenMaya.MDagPath()
+        OpenMaya.MFnDagNode(mObject).getPath(dagPath)
+        self.removeMesh(dagPath.fullPathName())
+
+    def refresh(self):
+        """ Add the new meshes and update the boxes of the changed ones. """
+        for handle in self.added:
+            if handle.isValid():
+                fnDagNode = OpenMaya.MFnDagNode(handle.object())
+                if not fnDagNode.isIntermediateObject():
+                    dagPath = OpenMaya.MDagPath()
+                    fnDagNode.getPath(dagPath)
+                    self.addMesh(dagPath)
+        self.added = []
+
+        for key in self.stale:
+            boundingBox = OpenMaya.MFnDagNode(self.dagPaths[key]).boundingBox()
+            boundingBox.transformUsing(self.dagPaths[key].inclusiveMatrix())
+            low = boundingBox.min()
+            high = boundingBox.max()
+            self.bvh.setBox(key, (low.x, low.y, low.z), (high.x, high.y, high.z))
+        self.stale = set()
+
+    def pick(self, point_in_3d, vector_in_3d):
+        """ Return the mesh hit first by a ray.
+            Args:
+                point_in_3d  (OpenMaya.MPoint)
+                vector_in_3d (OpenMaya.MVector)
+            Returns:
+                OpenMaya.MDagPath : dagpath, None if the ray misses every mesh
+        """
+        self.refresh()
+
+        closestPath = None
+        closestParam = None
+        for entry, key in self.bvh.intersect(
+                (point_in_3d.x, point_in_3d.y, point_in_3d.z),
+                (vector_in_3d.x, vector_in_3d.y, vector_in_3d.z)):
+            # 盒子按进入距离排序，后面的盒子不可能更近
+            if closestParam is not None and entry > closestParam:
+                break
+            dagPath = self.dagPaths[key]
+            if not dagPath.isVisible():
+                continue
+            hitPoint, faceID, rayParam = closestHit(
+                point_in_3d,
+                vector_in_3d,
+                OpenMaya.MFnMesh(dagPath),
+                getAccelParams(dagPath),
+                OpenMaya.MSpace.kWorld)
+            if hitPoint is not None and (closestParam is None or rayParam < closestParam):
+                closestPath = dagPath
+                closestParam = rayParam
+
+        return closestPath
+
+    def close(self):
+        for key in list(self.meshCallbacks):
+            self.removeMesh(key)
+        for callbackId in self.callbackIds:
+            OpenMaya.MMessage.removeCallback(callbackId)
+        self.callbackIds = []
+
+
+def startPicker():
+    global PICKER
+    stopPicker()
+    PICKER = MeshPicker()
+
+
+def stopPicker(*args):
+    global PICKER
+    if PICKER is not None:
+        PICKER.close()
+        PICKER = None
+
+
 def getDagPathFromScreen(x, y):
     """ Args:
             x  (int or float)
@@ -496,22 +867,386 @@ def getDagPathFromScreen(x, y):
         Returns:
             dagpath : OpenMaya.MDagPath
     """
-    # Select from screen
-    OpenMaya.MGlobal.selectFromScreen(
-        int(x),
-        int(y),
-        OpenMaya.MGlobal.kReplaceList,
-        OpenMaya.MGlobal.kSurfaceSelectMethod)
-
-    # Get dagpath, or return None if fails
-    tempSel = OpenMaya.MSelectionList()
-    OpenMaya.MGlobal.getActiveSelectionList(tempSel)
-    dagpath = OpenMaya.MDagPath()
-    if tempSel.length() == 0:
-        return None
+    if PICKER is None:
+        startPicker()
+
+    # Cast the view ray, the active selection is left alone
+    point_in_3d, vector_in_3d = convertTo3D(x, y)
+    return PICKER.pick(point_in_3d, vector_in_3d)
+
+
+def getAccelParams(dagPath):
+    """ Return the intersection acceleration grid of a target mesh. It is
+        made once per mesh and dropped when the mesh is dirtied.
+        Args:
+            dagPath (OpenMaya.MDagPath)
+        Returns:
+            OpenMaya.MMeshIsectAccelParams : accelParams
+    """
+    key = dagPath.fullPathName()
+    if key in ACCEL_CACHE:
+        return ACCEL_CACHE[key][0]
+
+    accelParams = OpenMaya.MFnMesh.autoUniformGridParams()
+    shapePath = OpenMaya.MDagPath(dagPath)
+    shapePath.extendToShape()
+    callbackId = OpenMaya.MNodeMessage.addNodeDirtyCallback(
+        shapePath.node(),
+        onTargetDirty,
+        key)
+    ACCEL_CACHE[key] = (accelParams, callbackId)
+
+    return accelParams
+
+
+def onTargetDirty(mObject, key):
+    """ Forget the grid of an edited mesh, the next press builds a new one. """
+    invalidateAccelParams(key)
+
+
+def invalidateAccelParams(key):
+    """ Args:
+            key (str) : full path of the target
+    """
+    FRAME_CACHE.pop(key, None)
+    TRIANGLE_CACHE.pop(key, None)
+    entry = ACCEL_CACHE.pop(key, None)
+    if entry is None:
+        return
+
+    OpenMaya.MMessage.removeCallback(entry[1])
+    selectionList = OpenMaya.MSelectionList()
+    try:
+        selectionList.add(key)
+    except RuntimeError:
+        # the mesh was deleted, its grid went with it
+        return
+    dagPath = OpenMaya.MDagPath()
+    selectionList.getDagPath(0, dagPath)
+    OpenMaya.MFnMesh(dagPath).freeCachedIntersectionAccelerator()
+
+
+def getFaceFrames(dagPath):
+    """ Return the average normal and tangent of every face of a target mesh,
+        read in bulk once per mesh. Like the grid of getAccelParams they are
+        dropped when the mesh is dirtied, so call getAccelParams first.
+        Args:
+            dagPath (OpenMaya.MDagPath)
+        Returns:
+            numpy.ndarray : (numPolygons, 3) normals in object space
+            numpy.ndarray : (numPolygons, 3) tangents in object space
+    """
+    key = dagPath.fullPathName()
+    if key in FRAME_CACHE:
+        return FRAME_CACHE[key]
+
+    fnMesh = getBulkMeshFn(dagPath)
+    normals = np.array(fnMesh.getNormals(om2.MSpace.kObject), dtype=np.float64)
+    _, normalIds = fnMesh.getNormalIds()
+    faceCounts, faceConnects = fnMesh.getVertices()
+    counts = np.array(faceCounts, dtype=np.int64)
+    faceConnects = np.array(faceConnects, dtype=np.int64)
+    faceNormals = faceAverages(normals, counts, np.array(normalIds, dtype=np.int64))
+
+    # 法线 id 在软边上被相邻的面共用，切线有自己的 id (getTangentId)：
+    # 一般就是 face-vertex 的序号，抽查确认后整体使用，否则用 UV 直接算每个面的切线
+    tangents = np.array(fnMesh.getTangents(om2.MSpace.kObject), dtype=np.float64)
+    if hasFaceVertexTangentIds(fnMesh, counts, faceConnects, len(tangents)):
+        faceTangents = faceAverages(tangents, counts, np.arange(len(tangents)))
     else:
-        tempSel.getDagPath(0, dagpath)
-        return dagpath
+        faceTangents = uvFaceTangents(fnMesh, counts, faceConnects, faceNormals)
+
+    frames = (faceNormals, faceTangents)
+    FRAME_CACHE[key] = frames
+
+    return frames
+
+
+def hasFaceVertexTangentIds(fnMesh, counts, faceConnects, numTangents, samples=64):
+    """ Check that the tangent id of every face-vertex is its face-vertex index,
+        on the face-vertices of a few faces spread over the mesh.
+        Args:
+            fnMesh       (om2.MFnMesh)
+            counts       (numpy.ndarray) : face-vertices per face
+            faceConnects (numpy.ndarray) : vertex of every face-vertex
+            numTangents  (int)
+            samples      (int) : faces checked
+        Returns:
+            bool
+    """
+    if numTangents != len(faceConnects):
+        return False
+    if not len(counts):
+        return True
+
+    faceStarts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for faceId in np.unique(np.linspace(0, len(counts) - 1, samples).astype(np.int64)).tolist():
+        start = int(faceStarts[faceId])
+        for faceVertex in range(start, start + int(counts[faceId])):
+            if fnMesh.getTangentId(faceId, int(faceConnects[faceVertex])) != faceVertex:
+                return False
+    return True
+
+
+def uvFaceTangents(fnMesh, counts, faceConnects, faceNormals):
+    """ Return the direction of increasing U on every face, from the UVs of its
+        triangle fan; faces without UVs use their first edge. The tangents are
+        made perpendicular to the face normals.
+        Args:
+            fnMesh       (om2.MFnMesh)
+            counts       (numpy.ndarray) : face-vertices per face
+            faceConnects (numpy.ndarray) : vertex of every face-vertex
+            faceNormals  (numpy.ndarray) : (numPolygons, 3)
+        Returns:
+            numpy.ndarray : (numPolygons, 3) tangents in object space
+    """
+    points = np.array(fnMesh.getPoints(om2.MSpace.kObject), dtype=np.float64)[:, :3]
+    us, vs = fnMesh.getUVs()
+    uvCounts, uvIds = fnMesh.getAssignedUVs()
+    uvs = np.stack([np.array(us, dtype=np.float64), np.array(vs, dtype=np.float64)], axis=1)
+
+    # 每个 face-vertex 的 UV，没有 UV 的面是 0
+    numFaces = len(counts)
+    faceStarts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    faceIds = np.repeat(np.arange(numFaces), counts)
+    mapped = np.array(uvCounts, dtype=np.int64) > 0
+    faceVertexUvs = np.zeros((len(faceConnects), 2), dtype=np.float64)
+    faceVertexUvs[mapped[faceIds]] = uvs[np.array(uvIds, dtype=np.int64)]
+
+    # 三角扇 (面的第一个点, i, i + 1)：T = (e1 * dv2 - e2 * dv1) * sign(du1 * dv2 - du2 * dv1)
+    local = np.arange(len(faceConnects)) - faceStarts[faceIds]
+    middle = np.nonzero((local >= 1) & (local <= counts[faceIds] - 2))[0]
+    first = faceStarts[faceIds[middle]]
+    e1 = points[faceConnects[middle]] - points[faceConnects[first]]
+    e2 = points[faceConnects[middle + 1]] - points[faceConnects[first]]
+    d1 = faceVertexUvs[middle] - faceVertexUvs[first]
+    d2 = faceVertexUvs[middle + 1] - faceVertexUvs[first]
+    sign = np.sign(d1[:, 0] * d2[:, 1] - d2[:, 0] * d1[:, 1])
+    fanTangents = (e1 * d2[:, 1:2] - e2 * d1[:, 1:2]) * sign[:, None]
+    tangents = np.stack([np.bincount(faceIds[middle], weights=fanTangents[:, axis], minlength=numFaces)
+                         for axis in range(3)], axis=1)
+
+    # UV 退化或没有 UV 的面用第一条边
+    firstEdges = np.zeros((numFaces, 3), dtype=np.float64)
+    hasEdge = counts >= 2
+    firstEdges[hasEdge] = (points[faceConnects[faceStarts[hasEdge] + 1]]
+                           - points[faceConnects[faceStarts[hasEdge]]])
+    missing = ~mapped | (np.linalg.norm(tangents, axis=1) < 1e-12)
+    tangents[missing] = firstEdges[missing]
+
+    tangents -= (tangents * faceNormals).sum(axis=1)[:, None] * faceNormals
+    lengths = np.linalg.norm(tangents, axis=1)
+    lengths[lengths == 0] = 1.0
+    return tangents / lengths[:, None]
+
+
+def getBulkMeshFn(dagPath):
+    """ Return the API 2.0 function set of a mesh, whose getters return whole arrays.
+        Args:
+            dagPath (OpenMaya.MDagPath)
+        Returns:
+            om2.MFnMesh
+    """
+    selectionList = om2.MSelectionList()
+    selectionList.add(dagPath.fullPathName())
+    return om2.MFnMesh(selectionList.getDagPath(0))
+
+
+def getTargetTriangles(dagPath):
+    """ Return the triangle hierarchy of a target mesh for the batched ray
+        casts of the paint mode, cached like getFaceFrames.
+        Args:
+            dagPath (OpenMaya.MDagPath)
+        Returns:
+            meshBvh.TriangleBvh : over the object space triangles
+            numpy.ndarray       : (numTriangles,) face id of every triangle
+    """
+    key = dagPath.fullPathName()
+    if key in TRIANGLE_CACHE:
+        return TRIANGLE_CACHE[key]
+
+    fnMesh = getBulkMeshFn(dagPath)
+    points = np.array(fnMesh.getPoints(om2.MSpace.kObject), dtype=np.float64)[:, :3]
+    triangleCounts, triangleVertices = fnMesh.getTriangles()
+    triangleVertices = np.array(triangleVertices, dtype=np.int64).reshape(-1, 3)
+
+    triangles = (meshBvh.TriangleBvh(points[triangleVertices]),
+                 np.repeat(np.arange(len(triangleCounts)), np.array(triangleCounts, dtype=np.int64)))
+    TRIANGLE_CACHE[key] = triangles
+
+    return triangles
+
+
+def castStrokeRays(dagPath, origins, directions):
+    """ Intersect all rays of a paint stroke with a target mesh in one batch.
+        The rays are moved to object space, so the cached hierarchy of
+        getTargetTriangles stays valid when the target is moved.
+        Args:
+            dagPath    (OpenMaya.MDagPath)
+            origins    (numpy.ndarray) : (n, 3) world space, see convertTo3D
+            directions (numpy.ndarray) : (n, 3)
+        Returns:
+            numpy.ndarray : (n, 3) world space hit points
+            numpy.ndarray : (n,) hit face ids, -1 where the ray misses
+    """
+    bvh, triangleFaces = getTargetTriangles(dagPath)
+    inverse = np.linalg.inv(matrixToNumpy(dagPath.inclusiveMatrix()))
+
+    # 仿射变换不改变射线参数，物体空间里的距离直接用在世界空间
+    distances, triangleIds = bvh.intersect(
+        origins.dot(inverse[:3, :3]) + inverse[3, :3],
+        directions.dot(inverse[:3, :3]),
+        99999)
+
+    hit = triangleIds >= 0
+    hitPoints = origins + np.where(hit, distances, 0.0)[:, None] * directions
+    faceIDs = np.where(hit, triangleFaces[triangleIds], -1)
+
+    return hitPoints, faceIDs
+
+
+def worldFrames(frames, faceIDs, worldMatrix):
+    """ Return the world space normal and tangent of faces, see DuplicateOverSurface.getFrame.
+        Args:
+            frames      (tuple)         : see getFaceFrames
+            faceIDs     (numpy.ndarray) : (n,)
+            worldMatrix (numpy.ndarray) : (4, 4), see matrixToNumpy
+        Returns:
+            numpy.ndarray : (n, 3) normals
+            numpy.ndarray : (n, 3) tangents
+    """
+    normals, tangents = frames
+    linear = worldMatrix[:3, :3]
+    return (normalized(normals[faceIDs].dot(np.linalg.inv(linear).T)),
+            normalized(tangents[faceIDs].dot(linear)))
+
+
+def stampMatrices(points, normals, tangents, scale):
+    """ Return the transform matrices of copies placed at points, with the
+        rows laid out like DuplicateOverSurface.buildMatrix.
+        Args:
+            points   (numpy.ndarray) : (n, 3)
+            normals  (numpy.ndarray) : (n, 3) y axis
+            tangents (numpy.ndarray) : (n, 3) x axis
+            scale    (tuple)         : scale of the source
+        Returns:
+            numpy.ndarray : (n, 4, 4)
+    """
+    normals = normalized(np.asarray(normals, dtype=np.float64))
+    tangents = normalized(np.asarray(tangents, dtype=np.float64))
+    matrices = np.zeros((len(points), 4, 4), dtype=np.float64)
+    matrices[:, 0, :3] = tangents * scale[0]
+    matrices[:, 1, :3] = normals * scale[1]
+    matrices[:, 2, :3] = normalized(np.cross(tangents, normals)) * scale[2]
+    matrices[:, 3, :3] = points
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def normalized(vectors):
+    """ Args:
+            vectors (numpy.ndarray) : (n, 3), zero vectors stay zero
+        Returns:
+            numpy.ndarray : (n, 3)
+    """
+    lengths = np.linalg.norm(vectors, axis=1)
+    lengths[lengths == 0] = 1.0
+    return vectors / lengths[:, None]
+
+
+def strokeStamps(stroke, spacing, jitter, rng):
+    """ Place stamps along a stroke, one every spacing pixels from its start.
+        Args:
+            stroke  (numpy.ndarray) : (n, 2) recorded viewport positions
+            spacing (float)         : pixels between stamps
+            jitter  (float)         : random offset of every stamp, as a fraction of the spacing
+            rng     (numpy.random.Generator)
+        Returns:
+            numpy.ndarray : (m, 2) stamp positions
+    """
+    lengths = np.linalg.norm(np.diff(stroke, axis=0), axis=1)
+    arcLength = np.concatenate([[0.0], np.cumsum(lengths)])
+    distances = np.arange(0.0, arcLength[-1] + 1e-9, spacing)
+
+    stamps = np.stack([np.interp(distances, arcLength, stroke[:, 0]),
+                       np.interp(distances, arcLength, stroke[:, 1])], axis=1)
+    if jitter > 0:
+        stamps += rng.uniform(-0.5, 0.5, stamps.shape) * jitter * spacing
+
+    return stamps
+
+
+def matrixToNumpy(matrix):
+    """ Args:
+            matrix (OpenMaya.MMatrix)
+        Returns:
+            numpy.ndarray : (4, 4), rows like MMatrix, points are row vectors
+    """
+    return np.array([[matrix(row, column) for column in range(4)] for row in range(4)], dtype=np.float64)
+
+
+def faceAverages(vectors, counts, ids):
+    """ Average face-vertex vectors per face and normalise them.
+        Args:
+            vectors (numpy.ndarray) : (n, 3)
+            counts  (numpy.ndarray) : face-vertices per face
+            ids     (numpy.ndarray) : index into vectors of every face-vertex
+        Returns:
+            numpy.ndarray : (len(counts), 3)
+    """
+    faceIds = np.repeat(np.arange(len(counts)), counts)
+    sums = np.stack([np.bincount(faceIds, weights=vectors[ids, axis], minlength=len(counts))
+                     for axis in range(3)], axis=1)
+    lengths = np.linalg.norm(sums, axis=1)
+    lengths[lengths == 0] = 1.0
+    return sums / lengths[:, None]
+
+
+def clearAccelCache():
+    for key in list(ACCEL_CACHE):
+        invalidateAccelParams(key)
+
+
+def getDagPath(name):
+    """ Args:
+            name (str)
+        Returns:
+            dagpath : OpenMaya.MDagPath
+    """
+    selectionList = OpenMaya.MSelectionList()
+    selectionList.add(name)
+    dagPath = OpenMaya.MDagPath()
+    selectionList.getDagPath(0, dagPath)
+    return dagPath
+
+
+def setTransformMatrix(dagPath, matrix):
+    """ Set a transform from 16 matrix values with MFnTransform, without shear.
+        Args:
+            dagPath (OpenMaya.MDagPath)
+            matrix  (list) : 16 values, see DuplicateOverSurface.getMatrix
+    """
+    mMatrix = OpenMaya.MMatrix()
+    OpenMaya.MScriptUtil.createMatrixFromList(matrix, mMatrix)
+    transformationMatrix = OpenMaya.MTransformationMatrix(mMatrix)
+
+    shearUtil = OpenMaya.MScriptUtil()
+    shearUtil.createFromList([0.0, 0.0, 0.0], 3)
+    transformationMatrix.setShear(shearUtil.asDoublePtr(), OpenMaya.MSpace.kTransform)
+
+    OpenMaya.MFnTransform(dagPath).set(transformationMatrix)
+
+
+def isSameMatrix(matrix, other, tolerance=1e-9):
+    """ Args:
+            matrix (list)
+            other  (list) : None is never the same
+        Returns:
+            bool
+    """
+    if other is None:
+        return False
+    return all(abs(a - b) <= tolerance for a, b in zip(matrix, other))
 
 
 def getClosestVertex(point_orig, faceID, fnMesh):
@@ -0,0 +1,340 @@
+# import modules
+import numpy as np
+
+# 包围盒层次结构(BVH)：纯 NumPy/Python，不引用 maya。
+# DuplicateOverSurface(main.py) 用它把鼠标射线先和场景里所有网格的世界包围盒求交，
+# 只对射线穿过的少数网格做真正的三角形求交。
+# TriangleBvh 一次求出一批射线和一个网格的交点（绘制模式的一整笔）。
+
+
+class BoxBvh(object):
+    """ Bounding volume hierarchy over axis aligned boxes, each with a key.
+        Moving a box only refits its branch; adding or removing boxes
+        rebuilds the (small) tree on the next query.
+        Args:
+            leafSize (int) : boxes per leaf
+    """
+
+    def __init__(self, leafSize=4):
+        self.leafSize = leafSize
+        self.keys = []
+        self.boxes = np.zeros((0, 2, 3), dtype=np.float64)
+        self._keyIndex = {}
+        self._needsBuild = True
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._keyIndex
+
+    def setBox(self, key, low, high):
+        """ Add a box or move an existing one.
+            Args:
+                key  (hashable)
+                low  (tuple) : min corner
+                high (tuple) : max corner
+        """
+        box = np.array([low, high], dtype=np.float64)
+        i = self._keyIndex.get(key)
+        if i is None:
+            self._keyIndex[key] = len(self.keys)
+            self.keys.append(key)
+            self.boxes = np.concatenate([self.boxes, box[None]])
+            self._needsBuild = True
+            return
+
+        self.boxes[i] = box
+        if not self._needsBuild:
+            self._boxList[i] = box.ravel().tolist()
+            self._refit(i)
+
+    def remove(self, key):
+        """ Args:
+                key (hashable) : ignored when it isn't in the hierarchy
+        """
+        i = self._keyIndex.pop(key, None)
+        if i is None:
+            return
+        # 用最后一个盒子填补空位
+        last = len(self.keys) - 1
+        if i != last:
+            self.keys[i] = self.keys[last]
+            self.boxes[i] = self.boxes[last]
+            self._keyIndex[self.keys[i]] = i
+        self.keys.pop()
+        self.boxes = self.boxes[:last]
+        self._needsBuild = True
+
+    def build(self):
+        """ Build the tree: split the box centres at the median of their longest axis. """
+        count = len(self.keys)
+        self._order = np.arange(count)
+        self._nodeBoxes = []
+        self._children = []
+        self._ranges = []
+        self._parents = []
+        self._itemLeaf = np.zeros(count, dtype=np.int64)
+        if count:
+            self._buildNode(0, count, -1)
+        self._nodeBoxes = np.array(self._nodeBoxes, dtype=np.float64).reshape(-1, 2, 3)
+        # 遍历时用 Python 浮点数，少量盒子的 NumPy 调用开销比计算本身还大
+        self._nodeList = self._nodeBoxes.reshape(-1, 6).tolist()
+        self._boxList = self.boxes.reshape(-1, 6).tolist()
+        self._needsBuild = False
+
+    def _buildNode(self, start, end, parent):
+        node = len(self._children)
+        items = self._order[start:end]
+        self._nodeBoxes.append([self.boxes[items, 0].min(axis=0), self.boxes[items, 1].max(axis=0)])
+        self._children.append(None)
+        self._ranges.append((start, end))
+        self._parents.append(parent)
+
+        if end - start <= self.leafSize:
+            self._itemLeaf[items] = node
+            return node
+
+        centres = self.boxes[items].mean(axis=1)
+        axis = int(np.argmax(centres.max(axis=0) - centres.min(axis=0)))
+        middle = (end - start) // 2
+        self._order[start:end] = items[np.argpartition(centres[:, axis], middle)]
+        left = self._buildNode(start, start + middle, node)
+        right = self._buildNode(start + middle, end, node)
+        self._children[node] = (left, right)
+        return node
+
+    def _refit(self, i):
+        # 只更新这个盒子所在的叶子和它的祖先
+        node = self._itemLeaf[i]
+        start, end = self._ranges[node]
+        items = self._order[start:end]
+        self._nodeBoxes[node, 0] = self.boxes[items, 0].min(axis=0)
+        self._nodeBoxes[node, 1] = self.boxes[items, 1].max(axis=0)
+        self._nodeList[node] = self._nodeBoxes[node].ravel().tolist()
+        node = self._parents[node]
+        while node != -1:
+            left, right = self._children[node]
+            np.minimum(self._nodeBoxes[left, 0], self._nodeBoxes[right, 0], out=self._nodeBoxes[node, 0])
+            np.maximum(self._nodeBoxes[left, 1], self._nodeBoxes[right, 1], out=self._nodeBoxes[node, 1])
+            self._nodeList[node] = self._nodeBoxes[node].ravel().tolist()
+            node = self._parents[node]
+
+    def intersect(self, origin, direction, maxDistance=np.inf):
+        """ Return the boxes hit by a ray, nearest entry first.
+            Args:
+                origin      (tuple)
+                direction   (tuple) : does not need to be normalised, distances are in its units
+                maxDistance (float)
+            Returns:
+                list : (entry distance, key) pairs
+        """
+        if self._needsBuild:
+            self.build()
+        if not len(self.keys):
+            return []
+
+        ray = _Ray(origin, direction)
+        hits = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if ray.entry(self._nodeList[node], maxDistance) is None:
+                continue
+            children = self._children[node]
+            if children is not None:
+                stack.extend(children)
+                continue
+
+            start, end = self._ranges[node]
+            for item in self._order[start:end].tolist():
+                entry = ray.entry(self._boxList[item], maxDistance)
+                if entry is not None:
+                    hits.append((entry, self.keys[item]))
+
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+
+class _Ray(object):
+    """ Slab test of one ray against (lowX, lowY, lowZ, highX, highY, highZ) boxes. """
+
+    def __init__(self, origin, direction):
+        self.origin = [float(v) for v in origin]
+        # 和坐标轴平行的方向用一个很大的数代替无穷大，避免 0 * inf 得到 nan
+        self.inverse = [1.0 / v if v != 0 else 1e300 for v in (float(v) for v in direction)]
+
+    def entry(self, box, maxDistance):
+        """ Return the distance where the ray enters box (0 when it starts inside), None when it misses. """
+        near = 0.0
+        far = maxDistance
+        for axis in range(3):
+            t0 = (box[axis] - self.origin[axis]) * self.inverse[axis]
+            t1 = (box[axis + 3] - self.origin[axis]) * self.inverse[axis]
+            if t0 > t1:
+                t0, t1 = t1, t0
+            if t0 > near:
+                near = t0
+            if t1 < far:
+                far = t1
+            if near > far:
+                return None
+        return near
+
+
+def intersectTriangles(origins, directions, triangles, maxDistance=np.inf, candidates=None, blockSize=1 << 20):
+    """ Intersect a batch of rays with the triangles of a mesh (Moller-Trumbore,
+        both sides of the triangles count) and keep the nearest hit of each ray.
+        Args:
+            origins     (numpy.ndarray) : (n, 3)
+            directions  (numpy.ndarray) : (n, 3), distances are in their units
+            triangles   (numpy.ndarray) : (t, 3, 3) corner positions
+            maxDistance (float)
+            candidates  (tuple) : (rayIds, triangleIds) pairs worth testing, see TriangleBvh;
+                                  None tests every ray against every triangle
+            blockSize   (int) : pairs tested at once, bounds the memory
+        Returns:
+            numpy.ndarray : (n,) distance along each ray, inf when it misses
+            numpy.ndarray : (n,) triangle index, -1 when it misses
+    """
+    origins = np.asarray(origins, dtype=np.float64)
+    directions = np.asarray(directions, dtype=np.float64)
+    corners = triangles[:, 0]
+    edge1 = triangles[:, 1] - corners
+    edge2 = triangles[:, 2] - corners
+
+    distances = np.full(len(origins), np.inf)
+    triangleIds = np.full(len(origins), -1, dtype=np.int64)
+    if not len(triangles) or not len(origins):
+        return distances, triangleIds
+
+    if candidates is None:
+        # 所有组合：按射线分块，每块里每条射线对所有三角形
+        step = max(1, blockSize // len(triangles))
+        blocks = ((np.repeat(np.arange(start, min(start + step, len(origins))), len(triangles)),
+                   np.tile(np.arange(len(triangles)), min(step, len(origins) - start)))
+                  for start in range(0, len(origins), step))
+    else:
+        rayIds, pairTriangles = candidates
+        blocks = ((rayIds[start:start + blockSize], pairTriangles[start:start + blockSize])
+                  for start in range(0, len(rayIds), blockSize))
+
+    for rays, tris in blocks:
+        t = _rayTriangle(origins[rays], directions[rays], corners[tris], edge1[tris], edge2[tris], maxDistance)
+        hit = np.isfinite(t)
+        rays, tris, t = rays[hit], tris[hit], t[hit]
+
+        # 每条射线只留最近的交点，再和前面的块比较
+        order = np.lexsort((t, rays))
+        rays, tris, t = rays[order], tris[order], t[order]
+        first = np.ones(len(rays), dtype=bool)
+        first[1:] = rays[1:] != rays[:-1]
+        rays, tris, t = rays[first], tris[first], t[first]
+        closer = t < distances[rays]
+        distances[rays[closer]] = t[closer]
+        triangleIds[rays[closer]] = tris[closer]
+
+    return distances, triangleIds
+
+
+def _rayTriangle(origins, directions, corners, edge1, edge2, maxDistance):
+    """ Return the distance of every (ray, triangle) row, inf when it misses. """
+    p = np.cross(directions, edge2)
+    determinant = np.einsum("ij,ij->i", p, edge1)
+    # 射线和三角形平行时 determinant 为 0，这些组合直接算作没打中
+    parallel = np.abs(determinant) < 1e-12
+    inverse = 1.0 / np.where(parallel, 1.0, determinant)
+
+    s = origins - corners
+    u = np.einsum("ij,ij->i", s, p) * inverse
+    q = np.cross(s, edge1)
+    v = np.einsum("ij,ij->i", directions, q) * inverse
+    t = np.einsum("ij,ij->i", q, edge2) * inverse
+
+    t[parallel | (u < 0) | (v < 0) | (u + v > 1) | (t < 0) | (t > maxDistance)] = np.inf
+    return t
+
+
+class TriangleBvh(object):
+    """ Wide hierarchy over the triangles of one mesh, traversed by a whole
+        batch of rays at once: every level tests all (ray, node) pairs left
+        in one numpy pass and only the children of the boxes hit go on.
+        The triangles are sorted along a Morton curve, so every node is
+        branching consecutive entries of the level below.
+        Args:
+            triangles (numpy.ndarray) : (t, 3, 3) corner positions
+            branching (int) : children per node
+    """
+
+    def __init__(self, triangles, branching=16):
+        self.branching = branching
+        self.order = np.argsort(_mortonCodes(triangles.mean(axis=1)), kind="stable")
+        self.triangles = np.ascontiguousarray(triangles[self.order])
+
+        # levels[0] 是三角形的包围盒，levels[-1] 是最上层
+        low = self.triangles.min(axis=1)
+        high = self.triangles.max(axis=1)
+        self.levels = [(low, high)]
+        while len(low) > branching:
+            starts = np.arange(0, len(low), branching)
+            low = np.minimum.reduceat(low, starts)
+            high = np.maximum.reduceat(high, starts)
+            self.levels.append((low, high))
+
+    def intersect(self, origins, directions, maxDistance=np.inf):
+        """ Return the nearest hit of every ray.
+            Args:
+                origins     (numpy.ndarray) : (n, 3)
+                directions  (numpy.ndarray) : (n, 3), distances are in their units
+                maxDistance (float)
+            Returns:
+                numpy.ndarray : (n,) distance along each ray, inf when it misses
+                numpy.ndarray : (n,) triangle index into the triangles given, -1 when it misses
+        """
+        origins = np.asarray(origins, dtype=np.float64)
+        directions = np.asarray(directions, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            # 和坐标轴平行的方向用一个很大的数代替无穷大，和 _Ray 一样
+            inverse = np.where(directions != 0, 1.0 / np.where(directions != 0, directions, 1.0), 1e300)
+
+        top = len(self.levels[-1][0])
+        rays = np.repeat(np.arange(len(origins)), top)
+        nodes = np.tile(np.arange(top), len(origins))
+        for level in range(len(self.levels) - 1, -1, -1):
+            low, high = self.levels[level]
+            hit = _slabHits(origins[rays], inverse[rays], low[nodes], high[nodes], maxDistance)
+            rays, nodes = rays[hit], nodes[hit]
+            if level:
+                # 展开到下一层：每个节点的子节点是下一层连续的 branching 个
+                count = len(self.levels[level - 1][0])
+                children = (nodes[:, None] * self.branching + np.arange(self.branching)).ravel()
+                rays = np.repeat(rays, self.branching)
+                valid = children < count
+                rays, nodes = rays[valid], children[valid]
+
+        distances, triangleIds = intersectTriangles(origins, directions, self.triangles, maxDistance,
+                                                    candidates=(rays, nodes))
+        hit = triangleIds >= 0
+        triangleIds[hit] = self.order[triangleIds[hit]]
+        return distances, triangleIds
+
+
+def _slabHits(origins, inverse, low, high, maxDistance):
+    """ Return which (ray, box) rows overlap within [0, maxDistance]. """
+    t0 = (low - origins) * inverse
+    t1 = (high - origins) * inverse
+    near = np.minimum(t0, t1).max(axis=1)
+    far = np.maximum(t0, t1).min(axis=1)
+    return (near <= far) & (far >= 0) & (near <= maxDistance)
+
+
+def _mortonCodes(points, bits=10):
+    """ Interleave the quantised x, y and z of points into one integer each. """
+    low = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - low, 1e-12)
+    cells = np.minimum(((points - low) / extent * (1 << bits)).astype(np.int64), (1 << bits) - 1)
+    codes = np.zeros(len(points), dtype=np.int64)
+    for bit in range(bits):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> bit) & 1) << (3 * bit + axis)
+    return codes
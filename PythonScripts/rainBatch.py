@@ -0,0 +1,164 @@
+#
+#  rainBatch.py
+#
+#  Headless entry point of the water droplet generator, e.g. on farm nodes:
+#
+#      mayapy rainBatch.py asset.ma --output-dir wet/ --sampling "Surface (area weighted)" --seed 7
+#      mayapy rainBatch.py scene.mb --mesh body --mesh helmet --params rain.json --output scene_wet.mb
+#
+#  Every input file is opened on its own, drops are made on the given meshes
+#  (all meshes of the file by default) and the result is saved.
+#
+
+# import modules
+import argparse
+import json
+import os
+import sys
+import time
+
+import rainDrops
+
+# 文件扩展名 -> cmds.file 的类型
+FILE_TYPES = {".ma": "mayaAscii", ".mb": "mayaBinary"}
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Make water drops on meshes without the Maya UI.")
+    parser.add_argument("inputs", nargs="+", help="scene or geometry files (.ma, .mb, .obj, .fbx)")
+    parser.add_argument("--mesh", action="append", default=[], help="mesh to rain on, repeatable (default: all)")
+    parser.add_argument("--output", help="output file, only with a single input")
+    parser.add_argument("--output-dir", help="write <input name>_wet.ma/.mb into this directory")
+    parser.add_argument("--params", help="JSON file with DropParams values, flags below override it")
+    parser.add_argument("--density", type=int, dest="dropDensity")
+    parser.add_argument("--min-size", type=float, dest="minDropSize")
+    parser.add_argument("--max-size", type=float, dest="maxDropSize")
+    parser.add_argument("--randomness", type=int)
+    parser.add_argument("--no-optimised", action="store_false", dest="optimised", default=None)
+    parser.add_argument("--no-smooth", action="store_false", dest="smooth", default=None)
+    parser.add_argument("--sampling", choices=rainDrops.SAMPLING_MODES, dest="samplingMode")
+    parser.add_argument("--output-mode", choices=rainDrops.OUTPUT_MODES, dest="outputMode")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--viewport-proxy", action="store_true", dest="viewportProxy", default=None)
+    parser.add_argument("--lod-camera", dest="lodCamera", help="camera for the distance LOD and sub-pixel culling")
+    parser.add_argument("--cull-pixels", type=float, dest="cullPixels")
+    parser.add_argument("--lod-pixels", type=float, dest="lodPixels")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output needs a single input, use --output-dir for several")
+    return args
+
+
+def readParams(args):
+    """ Merge the --params file and the command line flags.
+        Args:
+            args (argparse.Namespace)
+        Returns:
+            rainDrops.DropParams
+    """
+    values = {}
+    if args.params:
+        with open(args.params) as f:
+            values.update(json.load(f))
+
+    for key in rainDrops.DropParams().asDict():
+        value = getattr(args, key, None)
+        if value is not None:
+            values[key] = value
+
+    return rainDrops.DropParams.fromDict(values)
+
+
+def outputPath(args, inputPath):
+    if args.output:
+        return args.output
+
+    base, ext = os.path.splitext(os.path.basename(inputPath))
+    if ext.lower() not in FILE_TYPES:
+        ext = ".ma"
+    return os.path.join(args.output_dir or os.path.dirname(os.path.abspath(inputPath)), base + "_wet" + ext)
+
+
+def rainOnFile(inputPath, meshes, params):
+    """ Open one file, make drops on its meshes and save it.
+        Args:
+            inputPath (str)
+            meshes    (list) : mesh names, empty for every mesh of the file
+            params    (rainDrops.DropParams)
+        Returns:
+            dict : drop count per mesh
+            dict : error message per mesh the drops could not be made on
+    """
+    import maya.cmds as cmds
+    import rainMayaIO
+
+    cmds.file(new=True, force=True)
+    if os.path.splitext(inputPath)[1].lower() in FILE_TYPES:
+        cmds.file(inputPath, open=True, force=True)
+    else:
+        cmds.file(inputPath, i=True, force=True)
+
+    if not meshes:
+        meshes = sorted(set(cmds.listRelatives(cmds.ls(type="mesh", noIntermediate=True), parent=True) or []))
+
+    templates = rainMayaIO.getDropTemplates()
+    counts = {}
+    errors = {}
+    for mesh in meshes:
+        # 批处理不需要缓存和撤销，直接读网格数组；一个网格做不了(比如不够密)就跳过，其他网格照做
+        try:
+            dropSet = rainDrops.generateDrops(rainMayaIO.readMeshArrays(mesh), params)
+        except ValueError as e:
+            errors[mesh] = str(e)
+            continue
+        dropSet, proxy = rainMayaIO.applyCameraLod(dropSet, params)
+        rainMayaIO.createDrops(dropSet, templates, params, name=mesh.split("|")[-1] + "_waterDrops", proxy=proxy)
+        counts[mesh] = len(dropSet)
+
+    return counts, errors
+
+
+def main(argv=None):
+    args = parseArgs(sys.argv[1:] if argv is None else argv)
+    params = readParams(args)
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import maya.cmds as cmds
+
+    failed = 0
+    try:
+        for inputPath in args.inputs:
+            start = time.time()
+            try:
+                counts, errors = rainOnFile(inputPath, args.mesh, params)
+                savePath = outputPath(args, inputPath)
+                saveDir = os.path.dirname(os.path.abspath(savePath))
+                if not os.path.isdir(saveDir):
+                    os.makedirs(saveDir)
+                cmds.file(rename=savePath)
+                cmds.file(save=True, force=True,
+                          type=FILE_TYPES.get(os.path.splitext(savePath)[1].lower(), "mayaAscii"))
+            except Exception as e:
+                # 一个文件失败不影响其他文件
+                failed += 1
+                sys.stderr.write("%s: failed: %s\n" % (inputPath, e))
+                continue
+
+            for mesh, count in sorted(counts.items()):
+                sys.stdout.write("%s: %s: %d drops\n" % (inputPath, mesh, count))
+            for mesh, message in sorted(errors.items()):
+                sys.stderr.write("%s: %s: failed: %s\n" % (inputPath, mesh, message))
+            if errors:
+                failed += 1
+            sys.stdout.write("%s -> %s (%.1f s)\n" % (inputPath, savePath, time.time() - start))
+    finally:
+        maya.standalone.uninitialize()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+# import modules
+import numpy as np
+
+import rainScatter
+
+# 水滴生成的参数对象和纯函数：不引用 maya，界面(rainOnSurface.py)和
+# 命令行批处理(rainBatch.py)都先把参数读成 DropParams，再调用 generateDrops。
+
+# sampling modes
+SAMPLING_VERTICES = "Vertices"
+SAMPLING_SURFACE = "Surface (area weighted)"
+SAMPLING_POISSON = "Surface (Poisson disk)"
+SAMPLING_MODES = (SAMPLING_VERTICES, SAMPLING_SURFACE, SAMPLING_POISSON)
+
+# output modes
+OUTPUT_SEPARATE = "Separate drops"
+OUTPUT_COMBINED = "Combined mesh"
+OUTPUT_INSTANCER = "Instancer"
+OUTPUT_MODES = (OUTPUT_SEPARATE, OUTPUT_COMBINED, OUTPUT_INSTANCER)
+
+# levels of detail, see dropLevels
+LOD_CULLED = -1
+LOD_FULL = 0
+LOD_PROXY = 1
+
+
+class DropParams(object):
+    """ Every setting of a water drop run, the defaults match the UI.
+        Args:
+            dropDensity  (int)   : number of drops asked for
+            minDropSize  (float)
+            maxDropSize  (float)
+            randomness   (int)   : number of premade drops used when not optimised
+            optimised    (bool)  : use the optimised randomness combination
+            smooth       (bool)  : smooth preview the drops
+            samplingMode (str)   : one of SAMPLING_MODES
+            outputMode   (str)   : one of OUTPUT_MODES
+            seed         (int)   : None (the default) draws a random seed, set one for repeatable drops
+            workers      (int)   : processes used for the scatter chunks
+            viewportProxy (bool) : draw the drops as bounding boxes, the render keeps the full drops
+            lodCamera    (str)   : camera of the distance LOD and the culling, "" switches both off
+            cullPixels   (float) : drops smaller than this many pixels at render resolution are not made
+            lodPixels    (float) : separate drops smaller than this many pixels are drawn as bounding boxes,
+                                   the render keeps the full drops
+    """
+
+    def __init__(self, dropDensity=1200, minDropSize=0.02, maxDropSize=0.35, randomness=8, optimised=True,
+                 smooth=True, samplingMode=SAMPLING_VERTICES, outputMode=OUTPUT_SEPARATE, seed=None, workers=1,
+                 viewportProxy=False, lodCamera="", cullPixels=1.0, lodPixels=8.0):
+        self.dropDensity = int(dropDensity)
+        self.minDropSize = float(minDropSize)
+        self.maxDropSize = float(maxDropSize)
+        self.randomness = int(randomness)
+        self.optimised = bool(optimised)
+        self.smooth = bool(smooth)
+        self.samplingMode = samplingMode
+        self.outputMode = outputMode
+        self.seed = seed
+        self.workers = int(workers)
+        self.viewportProxy = bool(viewportProxy)
+        self.lodCamera = lodCamera
+        self.cullPixels = float(cullPixels)
+        self.lodPixels = float(lodPixels)
+        self.validate()
+
+    def validate(self):
+        if self.dropDensity < 1:
+            raise ValueError("dropDensity must be at least 1, got %d" % self.dropDensity)
+        if not 0 < self.minDropSize <= self.maxDropSize:
+            raise ValueError("Drop sizes must satisfy 0 < min <= max, got %g and %g"
+                             % (self.minDropSize, self.maxDropSize))
+        if self.samplingMode not in SAMPLING_MODES:
+            raise ValueError("Unknown sampling mode %r, expected one of %s" % (self.samplingMode, SAMPLING_MODES))
+        if self.outputMode not in OUTPUT_MODES:
+            raise ValueError("Unknown output mode %r, expected one of %s" % (self.outputMode, OUTPUT_MODES))
+        if not 0 <= self.cullPixels <= self.lodPixels:
+            raise ValueError("Pixel thresholds must satisfy 0 <= cull <= lod, got %g and %g"
+                             % (self.cullPixels, self.lodPixels))
+
+    def asDict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def fromDict(cls, values):
+        """ Build the parameters from a dict, e.g. a JSON file; missing keys keep their defaults.
+            Args:
+                values (dict)
+            Returns:
+                DropParams
+        """
+        unknown = set(values) - set(cls().__dict__)
+        if unknown:
+            raise ValueError("Unknown drop parameters: %s" % ", ".join(sorted(unknown)))
+        return cls(**values)
+
+
+class DropSet(object):
+    """ The result of generateDrops, one row per drop. Every drop is bound to
+        the surface by (triangle, barycentric), so it can be moved with the
+        mesh or updated on its own later, see rerainDrops.
+        Args:
+            triangleIds (numpy.ndarray) : (n,) index into MeshArrays.triangles()
+            barycentric (numpy.ndarray) : (n, 3)
+            sizes       (numpy.ndarray) : (n,)
+            unitJitter  (numpy.ndarray) : (n, 3) jitter divided by the size, see rainScatter.dropJitter
+            templateIds (numpy.ndarray) : (n,)
+            positions   (numpy.ndarray) : (n, 3)
+            normals     (numpy.ndarray) : (n, 3)
+            matrices    (numpy.ndarray) : (n, 4, 4), see rainScatter.dropMatrices
+            seed        (int) : the resolved seed of the run
+    """
+
+    def __init__(self, triangleIds, barycentric, sizes, unitJitter, templateIds, positions, normals, matrices,
+                 seed):
+        self.triangleIds = triangleIds
+        self.barycentric = barycentric
+        self.sizes = sizes
+        self.unitJitter = unitJitter
+        self.templateIds = templateIds
+        self.positions = positions
+        self.normals = normals
+        self.matrices = matrices
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def subset(self, indices):
+        """ Return the drops at indices, e.g. without the culled ones.
+            Args:
+                indices (numpy.ndarray)
+            Returns:
+                DropSet
+        """
+        return DropSet(self.triangleIds[indices], self.barycentric[indices], self.sizes[indices],
+                       self.unitJitter[indices], self.templateIds[indices], self.positions[indices],
+                       self.normals[indices], self.matrices[indices], self.seed)
+
+
+def generateDrops(meshArrays, params):
+    """ Place the drops of one run on a mesh. Pure function of its arguments:
+        the same mesh and params (with a fixed seed) always give the same drops.
+        Args:
+            meshArrays (rainScatter.MeshArrays)
+            params     (DropParams)
+        Returns:
+            DropSet
+        Raises:
+            ValueError : vertex sampling on a mesh with fewer vertices than dropDensity
+    """
+    seed = rainScatter.resolveSeed(params.seed)
+
+    if params.samplingMode == SAMPLING_VERTICES:
+        dropVertices, dropSizes = rainScatter.scatterOnVertices(meshArrays, params.dropDensity, params.minDropSize,
+                                                                params.maxDropSize, seed, params.workers)
+        dropTriangles, dropBarycentric = rainScatter.vertexTriangles(meshArrays, dropVertices)
+    else:
+        if params.samplingMode == SAMPLING_POISSON:
+            # 水滴之间互不重叠：半径 = 水滴大小的一半，用空间哈希网格做拒绝检测
+            scatter = rainScatter.poissonDiskOnSurface
+        else:
+            scatter = rainScatter.scatterOnSurface
+        dropTriangles, dropBarycentric, dropSizes = scatter(meshArrays, params.dropDensity, params.minDropSize,
+                                                            params.maxDropSize, seed, params.workers)
+    dropPositions, dropNormals = rainScatter.surfacePoints(meshArrays, dropTriangles, dropBarycentric)
+    dropSizes = np.asarray(dropSizes, dtype=np.float64)
+
+    # choose a premade drop for every accepted drop, the templates are only arrays
+    dropJitter, templateIds = rainScatter.dropAttributes(dropSizes, params.randomness, params.optimised, seed,
+                                                         params.workers)
+
+    # every drop is only a matrix: orientation from the normals, size and jitter folded in
+    matrices = rainScatter.dropMatrices(dropPositions, dropNormals, dropSizes, dropJitter)
+
+    return DropSet(dropTriangles, dropBarycentric, dropSizes, dropJitter / dropSizes[:, None], templateIds,
+                   dropPositions, dropNormals, matrices, seed)
+
+
+def dropLevels(dropSet, cameraPosition, horizontalFov, imageWidth, cullPixels, lodPixels):
+    """ Choose the level of detail of every drop from its size on screen.
+        Args:
+            dropSet        (DropSet)
+            cameraPosition (tuple) : world space
+            horizontalFov  (float) : radians
+            imageWidth     (int)   : render width in pixels
+            cullPixels     (float) : below this the drop is LOD_CULLED
+            lodPixels      (float) : below this the drop is LOD_PROXY, otherwise LOD_FULL
+        Returns:
+            numpy.ndarray : (n,) level per drop
+    """
+    pixels = rainScatter.pixelSizes(dropSet.positions, dropSet.sizes, cameraPosition, horizontalFov, imageWidth)
+    levels = np.full(len(dropSet), LOD_FULL, dtype=np.int64)
+    levels[pixels < lodPixels] = LOD_PROXY
+    levels[pixels < cullPixels] = LOD_CULLED
+    return levels
+
+
+def applyLevels(dropSet, levels):
+    """ Remove the culled drops. The proxy level only changes how a drop is
+        drawn in the viewport, so every kept drop keeps its full template.
+        Args:
+            dropSet (DropSet)
+            levels  (numpy.ndarray) : see dropLevels
+        Returns:
+            DropSet
+            numpy.ndarray : (len(DropSet),) True where the drop is drawn as a proxy
+    """
+    kept = np.nonzero(levels != LOD_CULLED)[0]
+    return dropSet.subset(kept), levels[kept] == LOD_PROXY
+
+
+# 增量更新时移动超过这个距离（相对水滴大小）的水滴才重写
+MOVE_TOLERANCE = 1e-4
+
+
+def sizeLimits(meshArrays, dropSet, positions, sizes, resized, params):
+    """ Return the largest size the resized drops can take and still pass the
+        test of their sampling mode in generateDrops.
+        Args:
+            meshArrays (rainScatter.MeshArrays)
+            dropSet    (DropSet)
+            positions  (numpy.ndarray) : (n, 3) all drops
+            sizes      (numpy.ndarray) : (n,) all drops, the sizes of the resized drops are not used
+            resized    (numpy.ndarray) : (k,) indices of the resized drops
+            params     (DropParams)
+        Returns:
+            numpy.ndarray : (k,) largest size, np.inf when the mode has no test
+    """
+    if params.samplingMode == SAMPLING_VERTICES:
+        # 水滴在顶点上(重心坐标为 1 的角)，要比到邻居的最大距离小
+        corners = meshArrays.triangles()[0][dropSet.triangleIds[resized]]
+        vertices = corners[np.arange(len(resized)), dropSet.barycentric[resized].argmax(axis=1)]
+        return np.nextafter(meshArrays.maxNeighbourDistance()[vertices], 0.0)
+    if params.samplingMode == SAMPLING_POISSON:
+        return rainScatter.poissonDiskLimits(positions, sizes / 2.0, resized, params.maxDropSize)
+    return np.full(len(resized), np.inf)
+
+
+def rerainDrops(meshArrays, dropSet, params, generation, candidates=None):
+    """ Update an existing DropSet after the mesh was edited (same topology) or
+        the size bounds changed, without sampling the drops again.
+        Drops whose triangle moved get a new position and orientation; drops
+        whose size falls outside the new bounds get a new size drawn from their
+        own stream. Every other drop is left as it is.
+        Args:
+            meshArrays (rainScatter.MeshArrays) : the mesh the drops were made on, possibly edited
+            dropSet    (DropSet)
+            params     (DropParams) : only samplingMode, minDropSize and maxDropSize are used
+            generation (int) : counts the updates, so every update draws new sizes
+            candidates (numpy.ndarray) : drops whose triangle corners changed since they were made, see
+                                         rainScatter.cornerHashes. Only these are evaluated again, None
+                                         evaluates every drop
+        Returns:
+            DropSet : the updated drops
+            numpy.ndarray : indices of the drops which changed
+        Raises:
+            ValueError : the topology changed, or resized drops no longer fit, the drops have to be made again
+    """
+    triangles = meshArrays.triangles()[0]
+    if len(dropSet) and dropSet.triangleIds.max() >= len(triangles):
+        raise ValueError("The mesh topology changed, the drops have to be made again!")
+
+    # 只有三角形的某个角动过的水滴才重新求位置，其余的水滴不用算
+    if candidates is None:
+        candidates = np.arange(len(dropSet))
+    candidates = np.asarray(candidates, dtype=np.int64)
+
+    positions = dropSet.positions.copy()
+    normals = dropSet.normals.copy()
+    moved = np.zeros(0, dtype=np.int64)
+    if len(candidates):
+        newPositions, newNormals = rainScatter.surfacePoints(meshArrays, dropSet.triangleIds[candidates],
+                                                             dropSet.barycentric[candidates])
+        isMoved = ((np.linalg.norm(newPositions - positions[candidates], axis=1)
+                    > MOVE_TOLERANCE * dropSet.sizes[candidates])
+                   | (np.abs(newNormals - normals[candidates]).max(axis=1) > MOVE_TOLERANCE))
+        moved = candidates[isMoved]
+        positions[moved] = newPositions[isMoved]
+        normals[moved] = newNormals[isMoved]
+
+    sizes = dropSet.sizes.copy()
+    resized = (sizes < params.minDropSize) | (sizes > params.maxDropSize)
+    if resized.any():
+        rng = rainScatter.chunkRng(dropSet.seed, generation, rainScatter.STREAM_RERAIN)
+        resizedIds = np.nonzero(resized)[0]
+        newSizes = rng.uniform(params.minDropSize, params.maxDropSize, size=len(resizedIds))
+        # 新的尺寸和 generateDrops 一样要通过检查，放不下的缩小到刚好放得下
+        newSizes = np.minimum(newSizes, sizeLimits(meshArrays, dropSet, positions, sizes, resizedIds, params))
+        if (newSizes < params.minDropSize).any():
+            raise ValueError("%d drops no longer fit with a size of at least %g, the drops have to be made again!"
+                             % ((newSizes < params.minDropSize).sum(), params.minDropSize))
+        sizes[resized] = newSizes
+
+    changed = np.union1d(moved, np.nonzero(resized)[0])
+    matrices = dropSet.matrices.copy()
+    matrices[changed] = rainScatter.dropMatrices(positions[changed], normals[changed], sizes[changed],
+                                                 dropSet.unitJitter[changed] * sizes[changed, None])
+
+    return DropSet(dropSet.triangleIds, dropSet.barycentric, sizes, dropSet.unitJitter, dropSet.templateIds,
+                   positions, normals, matrices, dropSet.seed), changed
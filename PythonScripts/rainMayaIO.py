@@ -0,0 +1,875 @@
+# import modules
+import json
+import math
+import os
+from collections import OrderedDict
+
+import maya.api.OpenMaya as om2
+import maya.cmds as cmds
+import numpy as np
+
+import rainDrops
+import rainProgress
+import rainScatter
+import rainTemplates
+
+# 水滴生成器和 Maya 之间的读写层：一次性把网格读成数组交给 rainScatter，
+# 尽量避免逐顶点的 cmds 调用。
+
+
+def getMeshDagPath(meshName):
+    """ Return the dag path of the mesh shape under meshName.
+        Args:
+            meshName (str) : transform or shape name
+        Returns:
+            om2.MDagPath
+    """
+    selectionList = om2.MSelectionList()
+    selectionList.add(meshName)
+    dagPath = selectionList.getDagPath(0)
+    dagPath.extendToShape()
+    return dagPath
+
+
+def readPoints(meshName, space=om2.MSpace.kWorld):
+    """ Read every point of a mesh with one MFnMesh.getPoints call.
+        Args:
+            meshName (str)
+            space    (int) : om2.MSpace constant
+        Returns:
+            numpy.ndarray : flat (numVertices * 3,) float64 buffer, x y z after each other
+    """
+    points = np.array(om2.MFnMesh(getMeshDagPath(meshName)).getPoints(space), dtype=np.float64)
+    return np.ascontiguousarray(points[:, :3]).ravel()
+
+
+def exportTemplates(meshNames, path=rainTemplates.TEMPLATE_FILE, space=om2.MSpace.kWorld):
+    """ Write meshes as a premade drop library in the rainTemplates format, e.g.
+        new drops captured from a sculpt. All meshes must share one topology.
+        Args:
+            meshNames (list)
+            path      (str)
+            space     (int) : om2.MSpace constant
+        Returns:
+            rainTemplates.DropTemplates
+    """
+    faceCounts, faceConnects = om2.MFnMesh(getMeshDagPath(meshNames[0])).getVertices()
+    faceCounts, faceConnects = np.array(faceCounts), np.array(faceConnects)
+
+    points = []
+    for meshName in meshNames:
+        counts, connects = om2.MFnMesh(getMeshDagPath(meshName)).getVertices()
+        if not (np.array_equal(counts, faceCounts) and np.array_equal(connects, faceConnects)):
+            raise ValueError("%s doesn't share the topology of %s!" % (meshName, meshNames[0]))
+        points.append(readPoints(meshName, space).reshape(-1, 3))
+
+    templates = rainTemplates.DropTemplates(np.stack(points), faceCounts, faceConnects)
+    rainTemplates.saveTemplates(templates, path)
+    return templates
+
+
+def readMeshArrays(meshName):
+    """ Read world space points, normals, faces and triangles in bulk.
+        Args:
+            meshName (str)
+        Returns:
+            rainScatter.MeshArrays
+    """
+    fnMesh = om2.MFnMesh(getMeshDagPath(meshName))
+    points = np.array(fnMesh.getPoints(om2.MSpace.kWorld), dtype=np.float64)[:, :3]
+    faceCounts, faceConnects = fnMesh.getVertices()
+    normals = np.array(fnMesh.getVertexNormals(False, om2.MSpace.kWorld), dtype=np.float64)
+    triangleCounts, triangleVertices = fnMesh.getTriangles()
+
+    return rainScatter.MeshArrays(points, np.array(faceCounts), np.array(faceConnects), normals,
+                                  np.array(triangleCounts), np.array(triangleVertices))
+
+
+# 网格数组的缓存：key 是 shape 的完整路径，网格被弄脏(dirty)或世界矩阵改变时自动清除
+_meshCache = {}
+
+
+def getMeshArrays(meshName):
+    """ Return the cached arrays of a mesh, reading it only when it changed.
+        The adjacency and edge lengths built on the returned MeshArrays are
+        kept with it, so waterDrops, checkMesh and subDMesh share them.
+        Args:
+            meshName (str)
+        Returns:
+            rainScatter.MeshArrays
+    """
+    dagPath = getMeshDagPath(meshName)
+    key = dagPath.fullPathName()
+    shapeNode = dagPath.node()
+
+    entry = _meshCache.get(key)
+    if entry is not None:
+        meshArrays, handle, callbackIds = entry
+        if handle.isValid() and handle.object() == shapeNode:
+            return meshArrays
+        invalidateMesh(key)
+
+    meshArrays = readMeshArrays(meshName)
+
+    # 世界坐标取决于所有祖先节点，所以监听这条路径的世界矩阵
+    callbackIds = [om2.MNodeMessage.addNodeDirtyCallback(shapeNode, _onMeshDirty, key),
+                   om2.MDagMessage.addWorldMatrixModifiedCallback(dagPath, _onWorldMatrixModified, key)]
+
+    _meshCache[key] = (meshArrays, om2.MObjectHandle(shapeNode), callbackIds)
+    return meshArrays
+
+
+def meshCounts(meshName):
+    """ Return the vertex and face count without reading any arrays: from the
+        cache when the mesh is cached, otherwise straight from MFnMesh.
+        Args:
+            meshName (str)
+        Returns:
+            int : numVertices
+            int : numFaces
+    """
+    dagPath = getMeshDagPath(meshName)
+    entry = _meshCache.get(dagPath.fullPathName())
+    if entry is not None and entry[1].isValid():
+        return entry[0].numVertices, entry[0].numFaces
+
+    fnMesh = om2.MFnMesh(dagPath)
+    return fnMesh.numVertices, fnMesh.numPolygons
+
+
+def invalidateMesh(key):
+    """ Drop a cached mesh and its dirty callbacks.
+        Args:
+            key (str) : full path of the mesh shape
+    """
+    entry = _meshCache.pop(key, None)
+    if entry is None:
+        return
+    for callbackId in entry[2]:
+        try:
+            om2.MMessage.removeCallback(callbackId)
+        except RuntimeError:
+            # 节点已经被删除时回调也已经失效
+            pass
+
+
+def _onMeshDirty(node, clientData):
+    invalidateMesh(clientData)
+
+
+def _onWorldMatrixModified(transformNode, modified, clientData):
+    invalidateMesh(clientData)
+
+
+# 细分代理网格的缓存：key 是 (网格内容的哈希, 细分次数)，value 是细分后的网格数组。
+# 场景里不保留代理物体；总内存超过 PROXY_CACHE_BYTES 时淘汰最久没用过的。
+PROXY_CACHE_BYTES = 512 * 1024 * 1024
+_proxyCache = OrderedDict()
+
+
+def subdivisionLevel(numFaces, dropDensity):
+    """ Return the polySubdivideFacet divisions giving about dropDensity vertices.
+        Args:
+            numFaces    (int)
+            dropDensity (int)
+        Returns:
+            int
+    """
+    return int(math.ceil(math.sqrt(math.sqrt(float(dropDensity) / max(numFaces, 1)))))
+
+
+def getSubdividedArrays(meshName, level):
+    """ Return the arrays of the mesh subdivided level times, subdividing a
+        temporary duplicate only when this mesh content and level aren't cached.
+        Args:
+            meshName (str)
+            level    (int) : polySubdivideFacet divisions
+        Returns:
+            rainScatter.MeshArrays
+    """
+    key = (getMeshArrays(meshName).contentHash(), level)
+
+    proxyArrays = _proxyCache.pop(key, None)
+    if proxyArrays is None:
+        # 临时物体不需要进撤销记录
+        undoState = cmds.undoInfo(query=True, stateWithoutFlush=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+        try:
+            proxy = cmds.duplicate(meshName, name="subDProxy")[0]
+            cmds.polySubdivideFacet(proxy, divisions=level, m=False, ch=False)
+            proxyArrays = readMeshArrays(proxy)
+            cmds.delete(proxy)
+        finally:
+            cmds.undoInfo(stateWithoutFlush=undoState)
+
+    _proxyCache[key] = proxyArrays
+    _trimProxyCache()
+    return proxyArrays
+
+
+def _trimProxyCache():
+    # 最近用过的在最后；至少保留刚用过的那一个
+    total = sum(proxyArrays.nbytes() for proxyArrays in _proxyCache.values())
+    while total > PROXY_CACHE_BYTES and len(_proxyCache) > 1:
+        key, proxyArrays = _proxyCache.popitem(last=False)
+        total -= proxyArrays.nbytes()
+
+
+def clearProxyCache():
+    _proxyCache.clear()
+
+
+def getDropTemplates():
+    """ Return the premade drop library shipped in rainTemplates.npz.
+        Returns:
+            rainTemplates.DropTemplates
+        Raises:
+            ValueError : the library has no topology, write it again with exportTemplates
+    """
+    templates = rainTemplates.loadTemplates()
+    if not templates.hasTopology():
+        raise ValueError("%s has no faces, export the drops again!" % rainTemplates.TEMPLATE_FILE)
+
+    return templates
+
+
+def createMeshFromArrays(points, faceCounts, faceConnects, name, assignShading=True):
+    """ Create a mesh in a single MFnMesh.create call, without construction history.
+        Args:
+            points        (numpy.ndarray) : (numVertices, 3)
+            faceCounts    (numpy.ndarray)
+            faceConnects  (numpy.ndarray)
+            name          (str)  : name of the new transform
+            assignShading (bool) : add the mesh to initialShadingGroup
+        Returns:
+            str : transform name
+    """
+    transform = cmds.createNode("transform", name=name)
+    selectionList = om2.MSelectionList()
+    selectionList.add(transform)
+
+    fnMesh = om2.MFnMesh()
+    fnMesh.create(om2.MPointArray(points.tolist()),
+                  om2.MIntArray(faceCounts.tolist()),
+                  om2.MIntArray(faceConnects.tolist()),
+                  parent=selectionList.getDependNode(0))
+    fnMesh.setName(transform + "Shape")
+
+    if assignShading:
+        cmds.sets(transform, edit=True, forceElement="initialShadingGroup")
+    return transform
+
+
+def createTemplateMeshes(shapes, name):
+    """ Create one mesh per template, e.g. as instancer sources.
+        Args:
+            shapes (list) : see rainTemplates.DropTemplates.asList
+            name   (str)
+        Returns:
+            list : transform names
+    """
+    return [createMeshFromArrays(points, faceCounts, faceConnects, "%s_%d" % (name, i + 1))
+            for i, (points, faceCounts, faceConnects) in enumerate(shapes)]
+
+
+def createCombinedMesh(shapes, templateIds, matrices, name, smooth):
+    """ Write every drop into one mesh.
+        Args:
+            shapes      (list) : see rainTemplates.DropTemplates.asList
+            templateIds (numpy.ndarray) : (n,)
+            matrices    (numpy.ndarray) : (n, 4, 4)
+            name        (str)
+            smooth      (bool)
+        Returns:
+            str : transform name
+    """
+    points, faceCounts, faceConnects = rainScatter.combineDrops(shapes, templateIds, matrices)
+    combined = createMeshFromArrays(points, faceCounts, faceConnects, name)
+
+    if smooth == True:
+        cmds.displaySmoothness(combined, polygonObject=3)
+
+    return combined
+
+
+def createInstancer(templateMeshes, templateIds, matrices, name):
+    """ Instance the template meshes with a particle instancer, one particle per drop.
+        Args:
+            templateMeshes (list) : see createTemplateMeshes
+            templateIds    (numpy.ndarray) : (n,)
+            matrices       (numpy.ndarray) : (n, 4, 4)
+            name           (str)
+        Returns:
+            str : group holding the particles, the instancer and the templates
+    """
+    rotations, scales = rainScatter.matrixToEulerXYZ(matrices)
+    count = len(matrices)
+
+    particleTransform, particleShape = cmds.particle(p=matrices[:, 3, :3].tolist(), name=name + "Particles")
+    cmds.setAttr(particleShape + ".isDynamic", False)
+
+    # 每个粒子的旋转、缩放和模板编号
+    cmds.addAttr(particleShape, longName="dropRotationPP", dataType="vectorArray")
+    cmds.addAttr(particleShape, longName="dropScalePP", dataType="vectorArray")
+    cmds.addAttr(particleShape, longName="dropIndexPP", dataType="doubleArray")
+    cmds.setAttr(particleShape + ".dropRotationPP", count, *[tuple(r) for r in rotations.tolist()],
+                 type="vectorArray")
+    cmds.setAttr(particleShape + ".dropScalePP", count, *[tuple(s) for s in scales.tolist()],
+                 type="vectorArray")
+    cmds.setAttr(particleShape + ".dropIndexPP", np.asarray(templateIds, dtype=np.float64).tolist(),
+                 type="doubleArray")
+    cmds.saveInitialState(particleShape)
+
+    instancer = cmds.particleInstancer(particleShape, addObject=True, object=templateMeshes, cycle="None",
+                                       rotationUnits="Degrees", rotationOrder="XYZ",
+                                       rotation="dropRotationPP", scale="dropScalePP",
+                                       objectIndex="dropIndexPP", name=name + "Instancer")
+
+    templateGroup = cmds.group(templateMeshes, name=name + "Templates")
+    cmds.hide(templateGroup)
+
+    return cmds.group(particleTransform, instancer, templateGroup, name=name)
+
+
+def createSeparateDrops(shapes, templateIds, matrices, name, smooth, proxy=None):
+    """ Create one mesh per drop, each placed with a single matrix write.
+        Args:
+            shapes      (list) : see rainTemplates.DropTemplates.asList
+            templateIds (numpy.ndarray) : (n,)
+            matrices    (numpy.ndarray) : (n, 4, 4)
+            name        (str)
+            smooth      (bool)
+            proxy       (numpy.ndarray) : (n,) drops drawn as bounding boxes, see rainDrops.applyLevels
+        Returns:
+            str : group holding the drops, None when there are no drops or the run was cancelled
+    """
+    newWaterDrops = []
+    try:
+        # progress window with drops/sec and ETA, Esc cancels; the viewport refresh is time based
+        with rainProgress.DropProgress(len(matrices)) as progress:
+            for dropMatrix, templateId in zip(matrices, templateIds):
+
+                # make the water drop straight from the template arrays, no polyCube/polySmooth history
+                points, faceCounts, faceConnects = shapes[templateId]
+                newWaterDrop = createMeshFromArrays(points, faceCounts, faceConnects, "waterDrop",
+                                                    assignShading=False)
+                newWaterDrops.append(newWaterDrop)
+
+                # 一次写入整个矩阵，代替 normalConstraint + xform + 删除约束 + 缩放 + 随机偏移
+                cmds.xform(newWaterDrop, matrix=dropMatrix.ravel().tolist())
+
+                progress.step()
+    except rainProgress.DropsCancelled:
+        # 取消时删掉已经生成的水滴（此时 undo 是关着的），撤销记录里什么都不留
+        if newWaterDrops:
+            cmds.delete(newWaterDrops)
+        return None
+
+    if not newWaterDrops:
+        return None
+
+    # shading and smooth preview are set once for all the drops
+    cmds.sets(newWaterDrops, edit=True, forceElement="initialShadingGroup")
+    if smooth == True:
+        cmds.displaySmoothness(newWaterDrops, polygonObject=3)
+
+    # 远处的小水滴只在视口里画成包围盒，渲染的还是完整的水滴
+    if proxy is not None:
+        for newWaterDrop in np.asarray(newWaterDrops, dtype=object)[np.asarray(proxy, dtype=bool)].tolist():
+            setViewportProxy(newWaterDrop, rainDrops.OUTPUT_SEPARATE)
+    return cmds.group(newWaterDrops, name=name)
+
+
+def createDrops(dropSet, templates, params, name="waterDrops", proxy=None):
+    """ Write a generated DropSet into the scene with the output mode of params.
+        Args:
+            dropSet   (rainDrops.DropSet)
+            templates (rainTemplates.DropTemplates)
+            params    (rainDrops.DropParams)
+            name      (str)
+            proxy     (numpy.ndarray) : drops drawn as bounding boxes, see applyCameraLod. Only separate
+                                        drops can be drawn one by one, the combined mesh and the
+                                        instancer keep them full (see params.viewportProxy)
+        Returns:
+            list : the created top level nodes
+    """
+    if not len(dropSet):
+        return []
+
+    shapes = templates.asList()
+    if params.outputMode == rainDrops.OUTPUT_SEPARATE:
+        group = createSeparateDrops(shapes, dropSet.templateIds, dropSet.matrices, name, params.smooth, proxy)
+        created = [group] if group else []
+    elif params.outputMode == rainDrops.OUTPUT_COMBINED:
+        # the geometry is written in bulk so the node count stays constant
+        created = [createCombinedMesh(shapes, dropSet.templateIds, dropSet.matrices, name, params.smooth)]
+    else:
+        templateMeshes = createTemplateMeshes(shapes, name + "Template")
+        if params.smooth == True:
+            cmds.displaySmoothness(templateMeshes, polygonObject=3)
+        created = [createInstancer(templateMeshes, dropSet.templateIds, dropSet.matrices, name)]
+
+    if params.viewportProxy == True:
+        for node in created:
+            setViewportProxy(node, params.outputMode)
+    return created
+
+
+def setViewportProxy(node, outputMode):
+    """ Draw the drops as bounding boxes in the viewport; the renderer still
+        gets the full drops, only the drawing is overridden.
+        Args:
+            node       (str) : the top level node returned by createDrops
+            outputMode (str)
+    """
+    if outputMode == rainDrops.OUTPUT_INSTANCER:
+        # levelOfDetail 1 = 每个实例画成包围盒
+        for instancer in cmds.listRelatives(node, children=True, type="instancer") or []:
+            cmds.setAttr(instancer + ".levelOfDetail", 1)
+    else:
+        # 组上的绘制覆盖会传给每一个子物体
+        cmds.setAttr(node + ".overrideEnabled", True)
+        cmds.setAttr(node + ".overrideLevelOfDetail", 1)
+
+
+def cameraView(camera):
+    """ Read what the distance LOD needs from a render camera.
+        Args:
+            camera (str) : camera transform or shape
+        Returns:
+            tuple : world space position
+            float : horizontal field of view in radians
+            int   : render width in pixels
+    """
+    position = tuple(cmds.xform(camera, query=True, worldSpace=True, rotatePivot=True))
+    horizontalFov = math.radians(cmds.camera(camera, query=True, horizontalFieldOfView=True))
+    return position, horizontalFov, cmds.getAttr("defaultResolution.width")
+
+
+def applyCameraLod(dropSet, params):
+    """ Cull the drops which are sub-pixel from params.lodCamera at render
+        resolution and mark the small ones for a viewport proxy.
+        Args:
+            dropSet (rainDrops.DropSet)
+            params  (rainDrops.DropParams)
+        Returns:
+            rainDrops.DropSet : dropSet itself when there is no LOD camera
+            numpy.ndarray     : proxy flags for createDrops, None when there is no LOD camera
+    """
+    if not params.lodCamera:
+        return dropSet, None
+    position, horizontalFov, imageWidth = cameraView(params.lodCamera)
+    levels = rainDrops.dropLevels(dropSet, position, horizontalFov, imageWidth, params.cullPixels, params.lodPixels)
+    return rainDrops.applyLevels(dropSet, levels)
+
+
+# 每个水滴的记录以数组属性保存在输出节点上：(属性名, 数据类型, 每个水滴几个数)
+DROP_RECORD_ATTRS = (("rainTriangle", "Int32Array", 1),
+                     ("rainBarycentric", "doubleArray", 3),
+                     ("rainSize", "doubleArray", 1),
+                     ("rainJitter", "doubleArray", 3),
+                     ("rainTemplate", "Int32Array", 1),
+                     ("rainPosition", "doubleArray", 3),
+                     ("rainNormal", "doubleArray", 3))
+
+
+# 变化的水滴(或记录的行)超过这个比例时整个数组一次写回，否则逐行写回
+ROW_WRITE_FRACTION = 0.25
+
+
+def _setRecordAttr(node, attr, dataType, values):
+    if not cmds.attributeQuery(attr, node=node, exists=True):
+        if dataType == "string":
+            cmds.addAttr(node, longName=attr, dataType="string")
+        elif dataType == "long":
+            cmds.addAttr(node, longName=attr, attributeType="long")
+        else:
+            cmds.addAttr(node, longName=attr, dataType=dataType)
+
+    if dataType == "string":
+        cmds.setAttr(node + "." + attr, values, type="string")
+    elif dataType == "long":
+        cmds.setAttr(node + "." + attr, values)
+    else:
+        cmds.setAttr(node + "." + attr, np.asarray(values).ravel().tolist(), type=dataType)
+
+
+def _recordPlug(node, attr):
+    selectionList = om2.MSelectionList()
+    selectionList.add(node)
+    return om2.MFnDependencyNode(selectionList.getDependNode(0)).findPlug(attr, False)
+
+
+def _getRecordAttr(node, attr, dataType, width):
+    # 数组属性整个一次读成 numpy，不经过 cmds.getAttr 的 Python 列表
+    data = _recordPlug(node, attr).asMObject()
+    if dataType == "Int32Array":
+        array = np.array(om2.MFnIntArrayData(data).array(), dtype=np.int64)
+    else:
+        array = np.array(om2.MFnDoubleArrayData(data).array(), dtype=np.float64)
+    return array.reshape(-1, width) if width > 1 else array
+
+
+def _setRecordRows(node, attr, dataType, rows, values):
+    """ Overwrite some rows of an array record, leaving the other rows as they are.
+        Args:
+            node     (str)
+            attr     (str)
+            dataType (str) : "doubleArray" or "Int32Array"
+            rows     (numpy.ndarray) : (k,) row indices
+            values   (numpy.ndarray) : (k, width) or (k,) new rows
+    """
+    if not len(rows):
+        return
+    dtype = np.int64 if dataType == "Int32Array" else np.float64
+    values = np.asarray(values, dtype=dtype).reshape(len(rows), -1)
+    width = values.shape[1]
+    plug = _recordPlug(node, attr)
+    data = plug.asMObject()
+    if dataType == "Int32Array":
+        fnData = om2.MFnIntArrayData(data)
+    else:
+        fnData = om2.MFnDoubleArrayData(data)
+    array = fnData.array()
+    if len(rows) * width > len(array) * ROW_WRITE_FRACTION:
+        # 改动的行太多时逐个赋值反而慢，直接整个数组写回
+        flat = np.array(array, dtype=dtype).reshape(-1, width)
+        flat[rows] = values
+        _setRecordAttr(node, attr, dataType, flat)
+        return
+
+    # 只逐个赋值改动的行，其他行不动
+    for row, value in zip(rows.tolist(), values.tolist()):
+        start = row * width
+        for k in range(width):
+            array[start + k] = value[k]
+    fnData.set(array)
+    plug.setMObject(data)
+
+
+def _setSourceRecords(node, dropSet, meshArrays):
+    # 网格的拓扑哈希，以及每个水滴所在三角形的角的哈希(不存整个网格)，增量更新时用来找出改过的水滴
+    _setRecordAttr(node, "rainTopology", "string", meshArrays.topologyHash())
+    _setRecordAttr(node, "rainCorners", "Int32Array", rainScatter.cornerHashes(meshArrays, dropSet.triangleIds))
+
+
+def writeDropRecords(node, dropSet, params, source, proxyLevel=0, generation=0, meshArrays=None):
+    """ Store everything needed to update the drops later on their output node.
+        Args:
+            node       (str) : the top level node returned by createDrops
+            dropSet    (rainDrops.DropSet)
+            params     (rainDrops.DropParams)
+            source     (str) : the base mesh
+            proxyLevel (int) : subdivisions of the proxy the drops sit on, 0 for the base mesh itself
+            generation (int) : number of updates so far
+            meshArrays (rainScatter.MeshArrays) : the mesh the drops were made on, lets rerainOutput
+                                                  find the edited drops and a changed topology
+    """
+    recordParams = params.asDict()
+    recordParams["seed"] = dropSet.seed
+    _setRecordAttr(node, "rainParams", "string", json.dumps(recordParams))
+    _setRecordAttr(node, "rainSource", "string", source)
+    _setRecordAttr(node, "rainProxyLevel", "long", proxyLevel)
+    _setRecordAttr(node, "rainGeneration", "long", generation)
+
+    values = {"rainTriangle": dropSet.triangleIds, "rainBarycentric": dropSet.barycentric,
+              "rainSize": dropSet.sizes, "rainJitter": dropSet.unitJitter, "rainTemplate": dropSet.templateIds,
+              "rainPosition": dropSet.positions, "rainNormal": dropSet.normals}
+    for attr, dataType, width in DROP_RECORD_ATTRS:
+        _setRecordAttr(node, attr, dataType, values[attr])
+    if meshArrays is not None:
+        _setSourceRecords(node, dropSet, meshArrays)
+
+
+def updateDropRecords(node, dropSet, changed, params, generation, corners):
+    """ Write back the records of the changed and the edited drops only.
+        Args:
+            node       (str) : the top level node returned by createDrops
+            dropSet    (rainDrops.DropSet) : the updated drops
+            changed    (numpy.ndarray) : indices of the changed drops
+            params     (rainDrops.DropParams)
+            generation (int)
+            corners    (tuple) : (rows, hashes, topology) of the corner records, see editedDrops.
+                                 rows None replaces all of them, hashes None removes them
+    """
+    recordParams = params.asDict()
+    recordParams["seed"] = dropSet.seed
+    _setRecordAttr(node, "rainParams", "string", json.dumps(recordParams))
+    _setRecordAttr(node, "rainGeneration", "long", generation)
+
+    # 绑定(三角形、重心坐标、抖动、模板)在更新时不会变，只有尺寸、位置和法线要写回
+    _setRecordRows(node, "rainSize", "doubleArray", changed, dropSet.sizes[changed])
+    _setRecordRows(node, "rainPosition", "doubleArray", changed, dropSet.positions[changed])
+    _setRecordRows(node, "rainNormal", "doubleArray", changed, dropSet.normals[changed])
+
+    rows, hashes, topology = corners
+    if rows is not None:
+        _setRecordRows(node, "rainCorners", "Int32Array", rows, hashes)
+    elif hashes is not None:
+        _setRecordAttr(node, "rainTopology", "string", topology)
+        _setRecordAttr(node, "rainCorners", "Int32Array", hashes)
+    else:
+        for attr in ("rainTopology", "rainCorners"):
+            if cmds.attributeQuery(attr, node=node, exists=True):
+                cmds.deleteAttr(node, attribute=attr)
+
+
+def editedDrops(node, dropSet, meshArrays):
+    """ Compare the triangles of the drops with the ones they were made on.
+        Args:
+            node       (str) : the top level node returned by createDrops
+            dropSet    (rainDrops.DropSet) : see readDropRecords
+            meshArrays (rainScatter.MeshArrays)
+        Returns:
+            numpy.ndarray : drops whose triangle corners changed, None for records of an older
+                            version, which do not know the mesh
+            numpy.ndarray : their stored corner hashes, None for older records
+            numpy.ndarray : their new corner hashes, of every drop for older records
+        Raises:
+            ValueError : the topology changed
+    """
+    hashes = rainScatter.cornerHashes(meshArrays, dropSet.triangleIds)
+    if not cmds.attributeQuery("rainTopology", node=node, exists=True):
+        return None, None, hashes
+    # 比较面的哈希，顶点数相同的重新布线也能发现
+    if cmds.getAttr(node + ".rainTopology") != meshArrays.topologyHash():
+        raise ValueError("The mesh topology changed, make the drops again!")
+
+    stored = _getRecordAttr(node, "rainCorners", "Int32Array", 2)
+    candidates = np.nonzero((stored != hashes).any(axis=1))[0]
+    return candidates, stored[candidates], hashes[candidates]
+
+
+def readDropRecords(node):
+    """ Read the records written by writeDropRecords.
+        Args:
+            node (str)
+        Returns:
+            rainDrops.DropSet
+            rainDrops.DropParams : the params of the run, with its resolved seed
+            str : the base mesh
+            int : proxy level
+            int : generation
+    """
+    if not cmds.attributeQuery("rainParams", node=node, exists=True):
+        raise ValueError("%s has no water drop records!" % node)
+
+    values = {}
+    for attr, dataType, width in DROP_RECORD_ATTRS:
+        values[attr] = _getRecordAttr(node, attr, dataType, width)
+
+    params = rainDrops.DropParams.fromDict(json.loads(cmds.getAttr(node + ".rainParams")))
+    sizes = values["rainSize"]
+    matrices = rainScatter.dropMatrices(values["rainPosition"], values["rainNormal"], sizes,
+                                        values["rainJitter"] * sizes[:, None])
+    dropSet = rainDrops.DropSet(values["rainTriangle"], values["rainBarycentric"], sizes, values["rainJitter"],
+                                values["rainTemplate"], values["rainPosition"], values["rainNormal"], matrices,
+                                params.seed)
+
+    return (dropSet, params, cmds.getAttr(node + ".rainSource"), cmds.getAttr(node + ".rainProxyLevel"),
+            cmds.getAttr(node + ".rainGeneration"))
+
+
+def rewriteDrops(node, dropSet, changed, templates, outputMode):
+    """ Write the changed drops back into an existing output. Only the changed
+        transforms, points or particles are written; when most drops changed,
+        the combined mesh and the instancer take one array write instead.
+        Args:
+            node       (str) : the top level node returned by createDrops
+            dropSet    (rainDrops.DropSet)
+            changed    (numpy.ndarray) : indices of the changed drops
+            templates  (rainTemplates.DropTemplates)
+            outputMode (str)
+    """
+    if outputMode == rainDrops.OUTPUT_SEPARATE:
+        drops = cmds.listRelatives(node, children=True, type="transform", fullPath=True) or []
+        if len(drops) != len(dropSet):
+            raise ValueError("Drops were added to or deleted from %s, make the drops again!" % node)
+        for i in changed:
+            cmds.xform(drops[i], matrix=dropSet.matrices[i].ravel().tolist())
+
+    elif outputMode == rainDrops.OUTPUT_COMBINED:
+        fnMesh = om2.MFnMesh(getMeshDagPath(node))
+        numPoints = templates.points.shape[1]
+        if len(dropSet) * numPoints != fnMesh.numVertices:
+            raise ValueError("%s was edited, make the drops again!" % node)
+        # 所有模板的拓扑相同，第 i 个水滴的顶点就是 [i * numPoints, (i + 1) * numPoints)
+        points = rainScatter.templateInstancePoints(templates.points, dropSet.templateIds[changed],
+                                                    dropSet.matrices[changed])
+        if len(changed) > len(dropSet) * ROW_WRITE_FRACTION:
+            allPoints = np.array(fnMesh.getPoints(om2.MSpace.kObject), dtype=np.float64)[:, :3]
+            allPoints.reshape(len(dropSet), numPoints, 3)[changed] = points
+            fnMesh.setPoints(om2.MPointArray(allPoints.tolist()), om2.MSpace.kObject)
+        else:
+            for i, dropPoints in zip(changed.tolist(), points.tolist()):
+                for k, point in enumerate(dropPoints):
+                    fnMesh.setPoint(i * numPoints + k, om2.MPoint(point), om2.MSpace.kObject)
+
+    else:
+        particleShapes = cmds.listRelatives(node, allDescendents=True, type="particle", fullPath=True) or []
+        if not particleShapes:
+            raise ValueError("%s has no particles, make the drops again!" % node)
+        particleShape = particleShapes[0]
+        if len(changed) > len(dropSet) * ROW_WRITE_FRACTION:
+            rotations, scales = rainScatter.matrixToEulerXYZ(dropSet.matrices)
+            count = len(dropSet)
+            cmds.setAttr(particleShape + ".position", count,
+                         *[tuple(p) for p in dropSet.matrices[:, 3, :3].tolist()], type="vectorArray")
+            cmds.setAttr(particleShape + ".dropRotationPP", count, *[tuple(r) for r in rotations.tolist()],
+                         type="vectorArray")
+            cmds.setAttr(particleShape + ".dropScalePP", count, *[tuple(s) for s in scales.tolist()],
+                         type="vectorArray")
+        else:
+            # 只改变化的粒子，order 就是粒子在数组里的序号
+            rotations, scales = rainScatter.matrixToEulerXYZ(dropSet.matrices[changed])
+            positions = dropSet.matrices[changed, 3, :3]
+            for i, position, rotation, scale in zip(changed.tolist(), positions.tolist(), rotations.tolist(),
+                                                    scales.tolist()):
+                cmds.particle(particleShape, edit=True, attribute="position", order=i, vectorValue=position)
+                cmds.particle(particleShape, edit=True, attribute="dropRotationPP", order=i, vectorValue=rotation)
+                cmds.particle(particleShape, edit=True, attribute="dropScalePP", order=i, vectorValue=scale)
+        cmds.saveInitialState(particleShape)
+
+
+# 只改变这些参数时可以增量更新，其他参数变了就要重新生成
+RERAIN_PARAMS = ("minDropSize", "maxDropSize", "workers")
+
+
+def rerainOutput(node, params):
+    """ Update an existing output after its base mesh was edited or the size
+        bounds changed. Only the drops on edited triangles are evaluated again,
+        and only the changed drops and records are written back, as one
+        undoable waterDropsCommit command.
+        Args:
+            node   (str) : the top level node returned by createDrops
+            params (rainDrops.DropParams) : the new settings
+        Returns:
+            int : number of drops rewritten
+        Raises:
+            ValueError : the change needs the drops to be made again
+    """
+    dropSet, recordParams, source, proxyLevel, generation = readDropRecords(node)
+
+    newParams = params.asDict()
+    oldParams = recordParams.asDict()
+    for key in oldParams:
+        if key not in RERAIN_PARAMS and key != "seed" and oldParams[key] != newParams[key]:
+            raise ValueError("%s changed, make the drops again!" % key)
+    if params.seed is not None and params.seed != recordParams.seed:
+        raise ValueError("seed changed, make the drops again!")
+
+    if proxyLevel > 0:
+        meshArrays = getSubdividedArrays(source, proxyLevel)
+    else:
+        meshArrays = getMeshArrays(source)
+
+    candidates, oldCorners, newCorners = editedDrops(node, dropSet, meshArrays)
+    newDropSet, changed = rainDrops.rerainDrops(meshArrays, dropSet, params, generation + 1, candidates)
+    newParams = rainDrops.DropParams.fromDict(recordParams.asDict())
+    newParams.minDropSize = params.minDropSize
+    newParams.maxDropSize = params.maxDropSize
+    templates = getDropTemplates()
+    topology = meshArrays.topologyHash()
+
+    # 所有的检查都在上面做完，命令里只写回，撤销时把同样的行写回原来的值
+    def update():
+        if len(changed):
+            rewriteDrops(node, newDropSet, changed, templates, recordParams.outputMode)
+        updateDropRecords(node, newDropSet, changed, newParams, generation + 1, (candidates, newCorners, topology))
+        return []
+
+    def restore():
+        if len(changed):
+            rewriteDrops(node, dropSet, changed, templates, recordParams.outputMode)
+        updateDropRecords(node, dropSet, changed, recordParams, generation, (candidates, oldCorners, topology))
+
+    commitUndoable(update, restore)
+    return len(changed)
+
+
+# 等待 waterDropsCommit 命令取走的生成函数
+PLUGIN_NAME = "rainOnSurfacePlugin"
+_pendingBuilds = []
+
+
+def loadPlugin():
+    """ Load rainOnSurfacePlugin.py (waterDropsCommit and waterDropScatter) from next to this file. """
+    if not cmds.pluginInfo(PLUGIN_NAME, query=True, loaded=True):
+        cmds.loadPlugin(os.path.join(os.path.dirname(os.path.abspath(__file__)), PLUGIN_NAME + ".py"),
+                        quiet=True)
+
+
+def commitUndoable(build, restore=None):
+    """ Run build as one undoable waterDropsCommit command. The undo queue only
+        keeps the nodes build created, so there is no need to flush it afterwards.
+        Args:
+            build   (callable) : creates or edits the drops and returns the created top level node names
+            restore (callable) : undoes the edits of build to existing nodes, optional
+        Returns:
+            list : the node names returned by build
+    """
+    loadPlugin()
+    _pendingBuilds.append((build, restore))
+    try:
+        return cmds.waterDropsCommit()
+    finally:
+        del _pendingBuilds[:]
+
+
+def takePendingBuild():
+    """ Hand the queued build function to the waterDropsCommit command.
+        Returns:
+            tuple : (build, restore) as given to commitUndoable, None when nothing is queued
+    """
+    if not _pendingBuilds:
+        return None
+    return _pendingBuilds.pop()
+
+
+def restShape(shape):
+    """ Return the shape holding the mesh before any deformer, the orig shape of
+        a deformed mesh or the shape itself.
+        Args:
+            shape (str) : full path of a mesh shape
+        Returns:
+            str
+    """
+    # 变形器前的 orig shape 是历史里的中间物体(intermediate object)
+    origShapes = cmds.ls(cmds.listHistory(shape) or [], type="mesh", intermediateObjects=True, long=True)
+    return origShapes[-1] if origShapes else shape
+
+
+def createScatterNode(meshName, params, name="waterDropsLive"):
+    """ Create a waterDropScatter node driven by the world mesh of meshName and
+        a mesh showing its merged drops, so the drops follow the deformation.
+        The drops are sampled on the rest shape, see restShape.
+        Args:
+            meshName (str)
+            params   (rainDrops.DropParams) : outputMode and workers are not used
+            name     (str) : name of the output transform
+        Returns:
+            str : the waterDropScatter node
+            str : the output transform
+    """
+    loadPlugin()
+    # 节点的 compute 里不能执行 cmds，先在这里把模板的拓扑准备好
+    getDropTemplates()
+
+    shape = getMeshDagPath(meshName).fullPathName()
+    scatterNode = cmds.createNode("waterDropScatter", name=name + "Scatter")
+    cmds.setAttr(scatterNode + ".dropDensity", params.dropDensity)
+    cmds.setAttr(scatterNode + ".minDropSize", params.minDropSize)
+    cmds.setAttr(scatterNode + ".maxDropSize", params.maxDropSize)
+    cmds.setAttr(scatterNode + ".randomness", params.randomness)
+    cmds.setAttr(scatterNode + ".optimised", params.optimised)
+    cmds.setAttr(scatterNode + ".samplingMode", rainDrops.SAMPLING_MODES.index(params.samplingMode))
+    cmds.setAttr(scatterNode + ".seed", rainScatter.resolveSeed(params.seed) % 2 ** 31)
+    cmds.connectAttr(shape + ".worldMesh[0]", scatterNode + ".inMesh")
+    cmds.connectAttr(restShape(shape) + ".outMesh", scatterNode + ".inRestMesh")
+
+    transform = cmds.createNode("transform", name=name)
+    outShape = cmds.createNode("mesh", name=transform + "Shape", parent=transform)
+    cmds.connectAttr(scatterNode + ".outMesh", outShape + ".inMesh")
+    cmds.sets(outShape, edit=True, forceElement="initialShadingGroup")
+
+    return scatterNode, transform
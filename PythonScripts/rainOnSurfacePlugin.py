@@ -0,0 +1,334 @@
+#
+#  rainOnSurfacePlugin.py
+#
+#  Undoable command used by rainOnSurface.py to commit the generated water
+#  drops as a single undo step, and the waterDropScatter node which keeps
+#  the drops on a deforming mesh.
+#
+
+import sys
+
+import maya.api.OpenMaya as om2
+import maya.cmds as cmds
+import numpy as np
+
+import rainDrops
+import rainMayaIO
+import rainScatter
+import rainTemplates
+
+
+def maya_useNewAPI():
+    pass
+
+
+kPluginCmdName = "waterDropsCommit"
+
+
+class WaterDropsCommit(om2.MPxCommand):
+    """ Run the build function queued with rainMayaIO.commitUndoable.
+        The build itself runs with undo recording switched off, so the undo
+        record only holds the created top level nodes (and the build function
+        to recreate them on redo) instead of thousands of queued commands.
+        Edits of existing nodes are undone by the queued restore function.
+    """
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.build = None
+        self.restore = None
+        self.createdNodes = []
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        pending = rainMayaIO.takePendingBuild()
+        if pending is None:
+            raise RuntimeError("%s: nothing to commit, use rainMayaIO.commitUndoable" % kPluginCmdName)
+        self.build, self.restore = pending
+        self.redoIt()
+
+    def runWithoutUndo(self, function):
+        undoState = cmds.undoInfo(query=True, stateWithoutFlush=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+        try:
+            return function()
+        finally:
+            cmds.undoInfo(stateWithoutFlush=undoState)
+
+    def redoIt(self):
+        createdNames = self.runWithoutUndo(self.build)
+
+        # 记录 MObjectHandle 而不是名字，撤销时即使被改名也能找到
+        self.createdNodes = []
+        selectionList = om2.MSelectionList()
+        for name in createdNames:
+            selectionList.add(name)
+        for i in range(selectionList.length()):
+            self.createdNodes.append(om2.MObjectHandle(selectionList.getDependNode(i)))
+
+        self.clearResult()
+        self.setResult(createdNames)
+
+    def undoIt(self):
+        # 对已有节点的修改由 restore 写回原来的值
+        if self.restore is not None:
+            self.runWithoutUndo(self.restore)
+
+        # 一次 MDagModifier 删除所有生成的节点，子节点跟着父节点一起删掉
+        modifier = om2.MDagModifier()
+        for handle in self.createdNodes:
+            if handle.isValid():
+                modifier.deleteNode(handle.object())
+        modifier.doIt()
+        self.createdNodes = []
+
+
+kPluginNodeName = "waterDropScatter"
+kPluginNodeId = om2.MTypeId(0x0007F7A0)
+
+
+class WaterDropScatter(om2.MPxNode):
+    """ Scatter the drops on inRestMesh and output them on inMesh as one merged
+        mesh and as a matrix array. Evaluation is lazy and split in two stages:
+        the sampling only runs again when a drop attribute or the rest mesh
+        changes, a deformation only re-evaluates the cached DropBinding. The
+        rest mesh does not move with the animation, so the same seed gives the
+        same drops whatever frame the node first evaluates on.
+    """
+
+    inMesh = None
+    inRestMesh = None
+    dropDensity = None
+    minDropSize = None
+    maxDropSize = None
+    randomness = None
+    optimised = None
+    samplingMode = None
+    seed = None
+    outMesh = None
+    outMatrices = None
+
+    # 这些输入变了要重新采样，inMesh 变了只重新计算矩阵
+    sampleInputs = ()
+
+    def __init__(self):
+        om2.MPxNode.__init__(self)
+        self.needsSample = True
+        self.binding = None
+        self.matrices = None
+        self.templateIds = None
+        self.faceCounts = None
+        self.faceConnects = None
+
+    def markDirty(self, isDirty):
+        """ Drop the cached results the dirty inputs made stale.
+            Args:
+                isDirty (callable) : attribute MObject -> bool
+        """
+        if isDirty(WaterDropScatter.inMesh):
+            self.matrices = None
+        if any(isDirty(attr) for attr in WaterDropScatter.sampleInputs):
+            self.needsSample = True
+            self.matrices = None
+
+    def setDependentsDirty(self, plug, plugArray):
+        self.markDirty(lambda attr: plug == attr)
+        return om2.MPxNode.setDependentsDirty(self, plug, plugArray)
+
+    def preEvaluation(self, context, evaluationNode):
+        # Evaluation Manager 不调用 setDependentsDirty，被弄脏的输入从这里读
+        if context.isNormal():
+            self.markDirty(evaluationNode.dirtyPlugExists)
+
+    def readParams(self, dataBlock):
+        return rainDrops.DropParams(
+            dropDensity=dataBlock.inputValue(WaterDropScatter.dropDensity).asInt(),
+            minDropSize=dataBlock.inputValue(WaterDropScatter.minDropSize).asDouble(),
+            maxDropSize=dataBlock.inputValue(WaterDropScatter.maxDropSize).asDouble(),
+            randomness=dataBlock.inputValue(WaterDropScatter.randomness).asInt(),
+            optimised=dataBlock.inputValue(WaterDropScatter.optimised).asBool(),
+            samplingMode=rainDrops.SAMPLING_MODES[dataBlock.inputValue(WaterDropScatter.samplingMode).asShort()],
+            seed=dataBlock.inputValue(WaterDropScatter.seed).asInt())
+
+    def sample(self, dataBlock):
+        # 采样阶段：在静止网格上生成水滴，结果以 (三角形, 重心坐标, 局部偏移) 绑定在网格上
+        self.binding = None
+        self.faceCounts = None
+        self.faceConnects = None
+
+        # 属性填错（比如 min > max）时不要把异常抛出 compute，输出空的网格和矩阵
+        try:
+            params = self.readParams(dataBlock)
+        except ValueError as e:
+            om2.MGlobal.displayWarning("%s: %s" % (self.name(), e))
+            return
+
+        restMesh = dataBlock.inputValue(WaterDropScatter.inRestMesh).asMesh()
+        if restMesh.isNull():
+            om2.MGlobal.displayWarning("%s: connect the rest shape to inRestMesh" % self.name())
+            return
+        fnMesh = om2.MFnMesh(restMesh)
+        faceCounts, faceConnects = fnMesh.getVertices()
+        triangleCounts, triangleVertices = fnMesh.getTriangles()
+        meshArrays = rainScatter.MeshArrays(
+            np.array(fnMesh.getPoints(om2.MSpace.kObject), dtype=np.float64)[:, :3],
+            np.array(faceCounts), np.array(faceConnects),
+            np.array(fnMesh.getVertexNormals(False, om2.MSpace.kObject), dtype=np.float64),
+            np.array(triangleCounts), np.array(triangleVertices))
+        try:
+            dropSet = rainDrops.generateDrops(meshArrays, params)
+        except ValueError as e:
+            om2.MGlobal.displayWarning("%s: %s" % (self.name(), e))
+            return
+        self.binding = rainScatter.DropBinding(meshArrays, dropSet.triangleIds, dropSet.barycentric,
+                                               dropSet.sizes, dropSet.unitJitter)
+        self.templateIds = dropSet.templateIds[self.binding.order]
+
+    def evaluate(self, dataBlock):
+        # 变换阶段：每次变形从变形后的顶点一次性算出所有水滴的矩阵，两个输出共用这一次的结果
+        if self.needsSample:
+            self.needsSample = False
+            self.sample(dataBlock)
+        if self.binding is None:
+            return None
+
+        fnMesh = om2.MFnMesh(dataBlock.inputValue(WaterDropScatter.inMesh).asMesh())
+        if fnMesh.numVertices != self.binding.numVertices:
+            om2.MGlobal.displayWarning("%s: inMesh has %d vertices, inRestMesh has %d"
+                                       % (self.name(), fnMesh.numVertices, self.binding.numVertices))
+            return None
+        points = np.array(fnMesh.getPoints(om2.MSpace.kObject), dtype=np.float64)[:, :3]
+        normals = np.array(fnMesh.getVertexNormals(False, om2.MSpace.kObject), dtype=np.float64)
+        _, _, matrices = self.binding.evaluate(points, normals)
+        return matrices
+
+    def buildOutMesh(self, matrices):
+        templates = rainTemplates.loadTemplates()
+        meshData = om2.MFnMeshData().create()
+        if matrices is None or not len(matrices) or not templates.hasTopology():
+            return meshData
+
+        # 合并网格的面只在重新采样后生成一次，变形时只更新顶点
+        if self.faceCounts is None:
+            points, faceCounts, faceConnects = rainScatter.combineDrops(templates.asList(), self.templateIds,
+                                                                        matrices)
+            self.faceCounts = om2.MIntArray(faceCounts.tolist())
+            self.faceConnects = om2.MIntArray(faceConnects.tolist())
+        else:
+            points = rainScatter.templateInstancePoints(templates.points, self.templateIds, matrices).reshape(-1, 3)
+
+        om2.MFnMesh().create(om2.MPointArray(points.tolist()), self.faceCounts, self.faceConnects, parent=meshData)
+        return meshData
+
+    def compute(self, plug, dataBlock):
+        if plug != WaterDropScatter.outMesh and plug != WaterDropScatter.outMatrices:
+            return None
+
+        # inMesh 和采样输入都没变时，另一个输出已经算好的矩阵直接复用
+        if self.matrices is None:
+            self.matrices = self.evaluate(dataBlock)
+        matrices = self.matrices
+
+        # 只计算被请求的输出，没有连接的输出不会花时间
+        if plug == WaterDropScatter.outMesh:
+            outHandle = dataBlock.outputValue(WaterDropScatter.outMesh)
+            outHandle.setMObject(self.buildOutMesh(matrices))
+        else:
+            # 整个数组一次构造，不在 Python 里逐个 append
+            if matrices is None:
+                matrixArray = om2.MMatrixArray()
+            else:
+                matrixArray = om2.MMatrixArray(list(map(om2.MMatrix, matrices.reshape(-1, 16).tolist())))
+            outHandle = dataBlock.outputValue(WaterDropScatter.outMatrices)
+            outHandle.setMObject(om2.MFnMatrixArrayData().create(matrixArray))
+        outHandle.setClean()
+
+
+def nodeInitializer():
+    typedAttr = om2.MFnTypedAttribute()
+    numericAttr = om2.MFnNumericAttribute()
+    enumAttr = om2.MFnEnumAttribute()
+    defaults = rainDrops.DropParams()
+
+    WaterDropScatter.inMesh = typedAttr.create("inMesh", "im", om2.MFnData.kMesh)
+    om2.MPxNode.addAttribute(WaterDropScatter.inMesh)
+    # 静止的网格(变形器前的 orig shape)，采样只在它上面做
+    WaterDropScatter.inRestMesh = typedAttr.create("inRestMesh", "irm", om2.MFnData.kMesh)
+    om2.MPxNode.addAttribute(WaterDropScatter.inRestMesh)
+
+    inputs = [WaterDropScatter.inMesh, WaterDropScatter.inRestMesh]
+    for attrName, shortName, dataType, value in (("dropDensity", "dd", om2.MFnNumericData.kInt, defaults.dropDensity),
+                                                 ("minDropSize", "mns", om2.MFnNumericData.kDouble,
+                                                  defaults.minDropSize),
+                                                 ("maxDropSize", "mxs", om2.MFnNumericData.kDouble,
+                                                  defaults.maxDropSize),
+                                                 ("randomness", "rnd", om2.MFnNumericData.kInt, defaults.randomness),
+                                                 ("optimised", "opt", om2.MFnNumericData.kBoolean,
+                                                  defaults.optimised),
+                                                 ("seed", "sd", om2.MFnNumericData.kInt, 0)):
+        attr = numericAttr.create(attrName, shortName, dataType, value)
+        numericAttr.keyable = True
+        om2.MPxNode.addAttribute(attr)
+        setattr(WaterDropScatter, attrName, attr)
+        inputs.append(attr)
+
+    WaterDropScatter.samplingMode = enumAttr.create("samplingMode", "sm", 0)
+    for i, mode in enumerate(rainDrops.SAMPLING_MODES):
+        enumAttr.addField(mode, i)
+    om2.MPxNode.addAttribute(WaterDropScatter.samplingMode)
+    inputs.append(WaterDropScatter.samplingMode)
+    WaterDropScatter.sampleInputs = tuple(inputs[1:])
+
+    WaterDropScatter.outMesh = typedAttr.create("outMesh", "om", om2.MFnData.kMesh)
+    typedAttr.writable = False
+    typedAttr.storable = False
+    om2.MPxNode.addAttribute(WaterDropScatter.outMesh)
+
+    WaterDropScatter.outMatrices = typedAttr.create("outMatrices", "omt", om2.MFnData.kMatrixArray)
+    typedAttr.writable = False
+    typedAttr.storable = False
+    om2.MPxNode.addAttribute(WaterDropScatter.outMatrices)
+
+    for attr in inputs:
+        om2.MPxNode.attributeAffects(attr, WaterDropScatter.outMesh)
+        om2.MPxNode.attributeAffects(attr, WaterDropScatter.outMatrices)
+
+
+# Creator
+def cmdCreator():
+    return WaterDropsCommit()
+
+
+def nodeCreator():
+    return WaterDropScatter()
+
+
+def initializePlugin(mObject):
+    mPlugin = om2.MFnPlugin(mObject)
+    try:
+        mPlugin.registerCommand(kPluginCmdName, cmdCreator)
+        mPlugin.setVersion("0.11")
+    except:
+        sys.stderr.write("Failed to register command: %s\n" % kPluginCmdName)
+        raise
+    try:
+        mPlugin.registerNode(kPluginNodeName, kPluginNodeId, nodeCreator, nodeInitializer)
+    except:
+        sys.stderr.write("Failed to register node: %s\n" % kPluginNodeName)
+        raise
+
+
+def uninitializePlugin(mObject):
+    mPlugin = om2.MFnPlugin(mObject)
+    try:
+        mPlugin.deregisterCommand(kPluginCmdName)
+    except:
+        sys.stderr.write("Failed to unregister command: %s\n" % kPluginCmdName)
+        raise
+    try:
+        mPlugin.deregisterNode(kPluginNodeId)
+    except:
+        sys.stderr.write("Failed to unregister node: %s\n" % kPluginNodeName)
+        raise
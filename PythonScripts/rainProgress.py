@@ -0,0 +1,101 @@
+# import modules
+import math
+import time
+
+import maya.cmds as cmds
+
+# 长时间生成水滴时的进度条：显示 drops/sec 和剩余时间，按 Esc 取消。
+# 视口刷新按时间而不是按个数：根据上一次刷新花的时间决定下一次什么时候刷新，
+# 保证刷新最多占总运行时间的 refreshShare。
+
+# default share of the run time that may be spent redrawing the viewport
+REFRESH_SHARE = 0.1
+
+# how often the progress window text is updated, in seconds
+TEXT_INTERVAL = 0.25
+
+
+class DropsCancelled(Exception):
+    """ Raised by DropProgress.step when the artist pressed Esc. """
+    pass
+
+
+class DropProgress(object):
+    """ Progress window for a drop generation run.
+        Args:
+            total        (int)   : number of drops
+            title        (str)
+            refreshShare (float) : maximum share of the run time spent in cmds.refresh, 0 disables refreshing
+    """
+
+    def __init__(self, total, title="Making it rain", refreshShare=REFRESH_SHARE):
+        self.total = max(int(total), 1)
+        self.title = title
+        self.refreshShare = refreshShare
+        self.done = 0
+
+        self.startTime = time.time()
+        self.lastText = self.startTime
+        self.nextRefresh = self.startTime
+        self.active = False
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.end()
+        return False
+
+    def begin(self):
+        # mayapy / batch 模式下没有窗口，也不需要刷新视口
+        if cmds.about(batch=True):
+            self.refreshShare = 0
+            return
+        cmds.progressWindow(title=self.title, progress=0, maxValue=self.total, status="Starting...",
+                            isInterruptable=True)
+        self.active = True
+        self.startTime = time.time()
+        self.lastText = self.startTime
+        self.nextRefresh = self.startTime
+
+    def end(self):
+        if self.active:
+            cmds.progressWindow(endProgress=True)
+            self.active = False
+
+    def status(self, now):
+        """ Return the progress text: done/total, drops/sec and ETA.
+            Args:
+                now (float) : time.time()
+            Returns:
+                str
+        """
+        elapsed = max(now - self.startTime, 1e-6)
+        rate = self.done / elapsed
+        if rate > 0:
+            eta = (self.total - self.done) / rate
+            return "%d / %d drops  (%.0f drops/sec, %d s left)" % (self.done, self.total, rate, math.ceil(eta))
+        return "%d / %d drops" % (self.done, self.total)
+
+    def step(self, count=1):
+        """ Advance the progress, refresh the viewport when it is cheap enough.
+            Args:
+                count (int) : drops finished since the last call
+            Raises:
+                DropsCancelled : when Esc was pressed
+        """
+        self.done += count
+        now = time.time()
+
+        if self.active and now - self.lastText >= TEXT_INTERVAL:
+            self.lastText = now
+            if cmds.progressWindow(query=True, isCancelled=True):
+                raise DropsCancelled()
+            cmds.progressWindow(edit=True, progress=self.done, status=self.status(now))
+
+        if self.refreshShare > 0 and now >= self.nextRefresh:
+            cmds.refresh(force=True)
+            refreshTime = time.time() - now
+            # 刷新花了 refreshTime，那就至少再工作 refreshTime * (1 - share) / share 秒再刷新
+            self.nextRefresh = now + refreshTime + refreshTime * (1.0 - self.refreshShare) / self.refreshShare
@@ -0,0 +1,1160 @@
+# import modules
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 水滴生成器(rainOnSurface.py)的纯数组核心：这里不引用任何 maya 模块，
+# 所有的采样、邻居距离和尺寸判断都在 NumPy 数组上批量完成，
+# 因此可以脱离 Maya，用一个假的网格(fake mesh)直接测试。
+
+
+class MeshArrays(object):
+    """ Flat arrays describing a polygon mesh, read once from Maya.
+        Args:
+            points       (numpy.ndarray) : (numVertices, 3) world space positions
+            faceCounts   (numpy.ndarray) : number of vertices of every face
+            faceConnects (numpy.ndarray) : vertex indices of every face, face after face
+            normals      (numpy.ndarray) : (numVertices, 3) world space vertex normals, optional
+            triangleCounts   (numpy.ndarray) : triangles of every face (MFnMesh.getTriangles), optional
+            triangleVertices (numpy.ndarray) : vertex indices of every triangle, optional
+    """
+
+    def __init__(self, points, faceCounts, faceConnects, normals=None, triangleCounts=None, triangleVertices=None):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.faceCounts = np.asarray(faceCounts, dtype=np.int64)
+        self.faceConnects = np.asarray(faceConnects, dtype=np.int64)
+        self.normals = None if normals is None else np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        self._triangles = None
+        if triangleCounts is not None and triangleVertices is not None:
+            triangleCounts = np.asarray(triangleCounts, dtype=np.int64)
+            self._triangles = (np.asarray(triangleVertices, dtype=np.int64).reshape(-1, 3),
+                               np.repeat(np.arange(len(triangleCounts)), triangleCounts))
+        self._adjacency = None
+        self._edgeLengths = None
+        self._maxNeighbourDistance = None
+        self._areaTable = None
+        self._contentHash = None
+        self._topologyHash = None
+        self._distanceStats = None
+
+    @property
+    def numVertices(self):
+        return len(self.points)
+
+    @property
+    def numFaces(self):
+        return len(self.faceCounts)
+
+    def adjacency(self):
+        """ Return the CSR adjacency (offsets, indices), built on first use. """
+        if self._adjacency is None:
+            self._adjacency = buildAdjacency(self.numVertices, self.faceCounts, self.faceConnects)
+        return self._adjacency
+
+    def edgeLengths(self):
+        """ Return the length of every adjacency entry, laid out like the CSR indices. """
+        if self._edgeLengths is None:
+            offsets, indices = self.adjacency()
+            self._edgeLengths = edgeLengths(self.points, offsets, indices)
+        return self._edgeLengths
+
+    def maxNeighbourDistance(self):
+        """ Return the largest neighbour distance of every vertex. """
+        if self._maxNeighbourDistance is None:
+            self._maxNeighbourDistance = neighbourMaxDistance(self.edgeLengths(), self.adjacency()[0])
+        return self._maxNeighbourDistance
+
+    def distanceStats(self):
+        """ Return the sorted largest neighbour distances and their prefix sum,
+            so estimateVertexDrops answers any size range in O(log n).
+        """
+        if self._distanceStats is None:
+            sortedDistances = np.sort(self.maxNeighbourDistance())
+            self._distanceStats = (sortedDistances, np.concatenate(([0.0], np.cumsum(sortedDistances))))
+        return self._distanceStats
+
+    def triangles(self):
+        """ Return (triangleVertices (numTriangles, 3), triangleFaces (numTriangles,)).
+            Maya's own triangulation is used when it was given, otherwise the faces are fanned.
+        """
+        if self._triangles is None:
+            self._triangles = fanTriangulate(self.faceCounts, self.faceConnects)
+        return self._triangles
+
+    def areaTable(self):
+        """ Return the prefix sum of the triangle areas, built on first use. """
+        if self._areaTable is None:
+            self._areaTable = np.cumsum(triangleAreas(self.points, self.triangles()[0]))
+        return self._areaTable
+
+    def contentHash(self):
+        """ Return a hex digest of the points and the topology, computed once. """
+        if self._contentHash is None:
+            digest = hashlib.sha1()
+            for array in (self.points, self.faceCounts, self.faceConnects):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._contentHash = digest.hexdigest()
+        return self._contentHash
+
+    def topologyHash(self):
+        """ Return a hex digest of the faces only, shared by every deformed copy. """
+        if self._topologyHash is None:
+            self._topologyHash = topologyHash(self.faceCounts, self.faceConnects)
+        return self._topologyHash
+
+    def withPoints(self, points, normals=None):
+        """ Return the same mesh with new positions, e.g. the next frame of a
+            deformation. The topology and the triangles are shared, everything
+            depending on the positions is built again on demand.
+            Args:
+                points  (numpy.ndarray) : (numVertices, 3)
+                normals (numpy.ndarray) : (numVertices, 3), optional
+            Returns:
+                MeshArrays
+        """
+        deformed = MeshArrays(points, self.faceCounts, self.faceConnects, normals)
+        if len(deformed.points) != self.numVertices:
+            raise ValueError("Expected %d points, got %d" % (self.numVertices, len(deformed.points)))
+        deformed._triangles = self.triangles()
+        deformed._adjacency = self._adjacency
+        deformed._topologyHash = self._topologyHash
+        return deformed
+
+    def nbytes(self):
+        """ Return the memory held by the arrays, including the ones built on demand. """
+        arrays = [self.points, self.faceCounts, self.faceConnects, self.normals, self._edgeLengths,
+                  self._maxNeighbourDistance, self._areaTable]
+        arrays += list(self._triangles or ()) + list(self._adjacency or ()) + list(self._distanceStats or ())
+        return sum(array.nbytes for array in arrays if array is not None)
+
+
+def buildAdjacency(numVertices, faceCounts, faceConnects):
+    """ Build a CSR adjacency of the vertices sharing a face with each vertex.
+        This is the same neighbourhood cmds.GrowPolygonSelectionRegion() selects
+        around a single vertex (the vertex itself is not included).
+        Args:
+            numVertices  (int)
+            faceCounts   (numpy.ndarray)
+            faceConnects (numpy.ndarray)
+        Returns:
+            numpy.ndarray : offsets, neighbours of vertex v are indices[offsets[v]:offsets[v + 1]]
+            numpy.ndarray : indices
+    """
+    faceCounts = np.asarray(faceCounts, dtype=np.int64)
+    faceConnects = np.asarray(faceConnects, dtype=np.int64)
+    faceStarts = np.concatenate(([0], np.cumsum(faceCounts)[:-1]))
+
+    # 按照面的顶点数分组，同一组内的面可以reshape成 (面数, k) 的矩阵，一次生成所有顶点对
+    src = []
+    dst = []
+    for k in np.unique(faceCounts):
+        if k < 2:
+            continue
+        starts = faceStarts[faceCounts == k]
+        faceVerts = faceConnects[starts[:, None] + np.arange(k)[None, :]]
+        a, b = np.nonzero(~np.eye(k, dtype=bool))
+        src.append(faceVerts[:, a].ravel())
+        dst.append(faceVerts[:, b].ravel())
+
+    if not src:
+        return np.zeros(numVertices + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 去重并按照起点排序，得到CSR格式
+    keys = np.unique(np.concatenate(src) * numVertices + np.concatenate(dst))
+    rows = keys // numVertices
+    indices = keys % numVertices
+    offsets = np.zeros(numVertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=numVertices), out=offsets[1:])
+
+    return offsets, indices
+
+
+def edgeLengths(points, offsets, indices):
+    """ Return the distance from every vertex to each of its neighbours.
+        Args:
+            points  (numpy.ndarray) : (numVertices, 3)
+            offsets (numpy.ndarray)
+            indices (numpy.ndarray)
+        Returns:
+            numpy.ndarray : one length per entry of indices
+    """
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return np.linalg.norm(points[rows] - points[indices], axis=1)
+
+
+def neighbourMaxDistance(lengths, offsets):
+    """ Return the largest distance from every vertex to one of its neighbours.
+        Vertices without neighbours get 0.
+        Args:
+            lengths (numpy.ndarray) : see edgeLengths
+            offsets (numpy.ndarray)
+        Returns:
+            numpy.ndarray : (numVertices,)
+    """
+    counts = np.diff(offsets)
+    maxDistance = np.zeros(len(counts), dtype=np.float64)
+    nonEmpty = counts > 0
+    if nonEmpty.any():
+        maxDistance[nonEmpty] = np.maximum.reduceat(lengths, offsets[:-1][nonEmpty])
+
+    return maxDistance
+
+
+def estimateVertexDrops(meshArrays, dropDensity, minDropSize, maxDropSize):
+    """ Expected number of drops scatterOnVertices keeps.
+        A drop of uniform size in minDropSize..maxDropSize fits on a vertex
+        with probability clip((d - min) / (max - min), 0, 1), d being the
+        vertex's largest neighbour distance; the sum over the vertices comes
+        from the cached sorted distances and their prefix sum.
+        Args:
+            meshArrays  (MeshArrays)
+            dropDensity (int)
+            minDropSize (float)
+            maxDropSize (float)
+        Returns:
+            float : 0 when dropDensity is more than the vertex count
+    """
+    numVertices = meshArrays.numVertices
+    if dropDensity > numVertices or numVertices == 0:
+        return 0.0
+
+    sortedDistances, prefixSum = meshArrays.distanceStats()
+    low = np.searchsorted(sortedDistances, minDropSize, side="right")
+    high = np.searchsorted(sortedDistances, maxDropSize, side="left")
+
+    # 距离 >= max 的顶点一定放得下，min 和 max 之间的按比例
+    fits = float(numVertices - high)
+    if high > low:
+        span = maxDropSize - minDropSize
+        fits += ((prefixSum[high] - prefixSum[low]) - minDropSize * (high - low)) / span
+
+    return dropDensity * fits / numVertices
+
+
+# 可复现的随机数：每个 chunk 用自己的 Philox（基于计数器）随机流，
+# chunk 的划分只取决于数量而不取决于进程数，所以并行和串行的结果逐位相同。
+CHUNK_SIZE = 16384
+
+# 不同用途的随机流放在计数器的不同位置，互不重叠
+STREAM_CANDIDATES = 0
+STREAM_VERTEX_KEYS = 1
+STREAM_ATTRIBUTES = 2
+STREAM_RERAIN = 3
+
+
+def resolveSeed(seed):
+    """ Return seed, or a fresh random seed when it is None.
+        Args:
+            seed (int)
+        Returns:
+            int
+    """
+    if seed is None:
+        return int(np.random.SeedSequence().entropy)
+    return int(seed)
+
+
+def chunkRng(seed, chunkIndex, stream=STREAM_CANDIDATES):
+    """ Counter-based random stream of one chunk.
+        Args:
+            seed       (int) : Philox key
+            chunkIndex (int)
+            stream     (int) : one of the STREAM_* constants
+        Returns:
+            numpy.random.Generator
+    """
+    return np.random.Generator(np.random.Philox(key=seed, counter=[0, 0, stream, chunkIndex]))
+
+
+def chunkCounts(count, chunkSize=CHUNK_SIZE):
+    """ Split count items into chunks of chunkSize (the last one may be shorter).
+        Args:
+            count     (int)
+            chunkSize (int)
+        Returns:
+            list : item count of every chunk
+    """
+    return [min(chunkSize, count - start) for start in range(0, count, chunkSize)]
+
+
+# 子进程里的网格，每个进程只传一次
+_workerMesh = None
+
+
+def _initWorker(meshArrays):
+    global _workerMesh
+    _workerMesh = meshArrays
+
+
+def _runChunk(task):
+    function, args = task
+    return function(_workerMesh, *args)
+
+
+def mapChunks(function, meshArrays, tasks, workers=1):
+    """ Run function(meshArrays, *args) for every args in tasks and return the
+        results in task order. With workers > 1 the tasks run in a process pool
+        and the mesh is sent once per process; this needs a python that can
+        start itself again (mayapy or a plain interpreter, not the Maya GUI).
+        Args:
+            function   (callable) : module level function
+            meshArrays (MeshArrays)
+            tasks      (list) : argument tuples
+            workers    (int)
+        Returns:
+            list
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [function(meshArrays, *args) for args in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(meshArrays,)) as pool:
+        return list(pool.map(_runChunk, [(function, args) for args in tasks]))
+
+
+def _vertexKeyChunk(meshArrays, count, seed, chunkIndex):
+    return chunkRng(seed, chunkIndex, STREAM_VERTEX_KEYS).random(count)
+
+
+def sampleWithoutReplacement(populationSize, count, seed, workers=1):
+    """ Draw count distinct indices out of range(populationSize), in random order.
+        Every index gets one random key and the count smallest keys win, which
+        is the first count entries of a random permutation without building or
+        shuffling it: O(populationSize + count log count), no Python loop,
+        instead of the O(count * populationSize) of random.choice + list.remove.
+        Args:
+            populationSize (int)
+            count          (int)
+            seed           (int)
+            workers        (int) : processes used for the key chunks
+        Returns:
+            numpy.ndarray : (count,) indices
+    """
+    if count > populationSize:
+        raise ValueError("Can't draw %d distinct items out of %d!" % (count, populationSize))
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    keys = np.concatenate(mapChunks(_vertexKeyChunk, None,
+                                    [(n, seed, i) for i, n in enumerate(chunkCounts(populationSize))],
+                                    workers))
+    picked = np.argpartition(keys, count - 1)[:count]
+    return picked[np.argsort(keys[picked], kind="stable")]
+
+
+def _sizeChunk(meshArrays, count, minDropSize, maxDropSize, seed, chunkIndex):
+    return chunkRng(seed, chunkIndex).uniform(minDropSize, maxDropSize, size=count)
+
+
+def scatterOnVertices(meshArrays, dropDensity, minDropSize, maxDropSize, seed=None, workers=1):
+    """ Pick dropDensity random vertices and keep the drops which fit.
+        A drop fits when its size is smaller than the distance to at least one
+        of its neighbour vertices, which is the rule waterDrops used to test by
+        walking the neighbours one by one.
+        The vertices come from sampleWithoutReplacement, so both the vertices
+        and the sizes can be drawn chunk by chunk.
+        Args:
+            meshArrays  (MeshArrays)
+            dropDensity (int)
+            minDropSize (float)
+            maxDropSize (float)
+            seed        (int) : None draws a random seed
+            workers     (int) : processes used for the chunks
+        Returns:
+            numpy.ndarray : vertex index of every accepted drop
+            numpy.ndarray : size of every accepted drop
+    """
+    seed = resolveSeed(seed)
+
+    if dropDensity > meshArrays.numVertices:
+        raise ValueError("The mesh is not dense enough to make %d drops! Use the subdivide mesh function!"
+                         % dropDensity)
+
+    candidates = sampleWithoutReplacement(meshArrays.numVertices, dropDensity, seed, workers)
+
+    sizes = np.concatenate(mapChunks(_sizeChunk, None,
+                                     [(n, minDropSize, maxDropSize, seed, i)
+                                      for i, n in enumerate(chunkCounts(dropDensity))],
+                                     workers))
+
+    accepted = sizes < meshArrays.maxNeighbourDistance()[candidates]
+
+    return candidates[accepted], sizes[accepted]
+
+
+def topologyHash(faceCounts, faceConnects):
+    """ Hash the face layout, so a retopology with the same counts is still seen.
+        Args:
+            faceCounts   (numpy.ndarray)
+            faceConnects (numpy.ndarray)
+        Returns:
+            str : hex digest
+    """
+    digest = hashlib.sha1()
+    for array in (faceCounts, faceConnects):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def cornerHashes(meshArrays, triangleIds):
+    """ Hash the corner points and normals of the triangles some drops sit on,
+        everything surfacePoints reads for them. A drop whose hash is the same
+        as before an edit is known to stay where it is.
+        Args:
+            meshArrays  (MeshArrays)
+            triangleIds (numpy.ndarray) : (n,)
+        Returns:
+            numpy.ndarray : (n, 2) int32, the two halves of a 64 bit hash
+    """
+    corners = meshArrays.triangles()[0][np.asarray(triangleIds, dtype=np.int64)]
+    values = [meshArrays.points[corners].reshape(len(corners), -1)]
+    if meshArrays.normals is not None:
+        values.append(meshArrays.normals[corners].reshape(len(corners), -1))
+    words = np.ascontiguousarray(np.concatenate(values, axis=1)).view(np.uint64)
+
+    # FNV-1a 按 64 位一个字处理，最后用 splitmix64 的混合把每一位都打散
+    h = np.full(len(corners), 0xcbf29ce484222325, dtype=np.uint64)
+    for column in words.T:
+        h ^= column
+        h *= np.uint64(0x100000001b3)
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xbf58476d1ce4e5b9)
+    h ^= h >> np.uint64(27)
+    return h.view(np.int32).reshape(-1, 2)
+
+
+def fanTriangulate(faceCounts, faceConnects):
+    """ Split every face into a triangle fan around its first vertex.
+        Args:
+            faceCounts   (numpy.ndarray)
+            faceConnects (numpy.ndarray)
+        Returns:
+            numpy.ndarray : (numTriangles, 3) vertex indices
+            numpy.ndarray : (numTriangles,) face index of every triangle
+    """
+    faceCounts = np.asarray(faceCounts, dtype=np.int64)
+    faceConnects = np.asarray(faceConnects, dtype=np.int64)
+    faceStarts = np.concatenate(([0], np.cumsum(faceCounts)[:-1]))
+
+    triangles = []
+    faces = []
+    for k in np.unique(faceCounts):
+        if k < 3:
+            continue
+        faceIds = np.nonzero(faceCounts == k)[0]
+        faceVerts = faceConnects[faceStarts[faceIds][:, None] + np.arange(k)[None, :]]
+        fan = np.arange(1, k - 1)
+        tris = np.stack([np.repeat(faceVerts[:, 0:1], k - 2, axis=1), faceVerts[:, fan], faceVerts[:, fan + 1]],
+                        axis=2)
+        triangles.append(tris.reshape(-1, 3))
+        faces.append(np.repeat(faceIds, k - 2))
+
+    if not triangles:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 按照面的顺序排列，和 MFnMesh.getTriangles 一致
+    triangles = np.concatenate(triangles)
+    faces = np.concatenate(faces)
+    order = np.argsort(faces, kind="stable")
+    return triangles[order], faces[order]
+
+
+def triangleAreas(points, triangles):
+    """ Return the area of every triangle.
+        Args:
+            points    (numpy.ndarray) : (numVertices, 3)
+            triangles (numpy.ndarray) : (numTriangles, 3)
+        Returns:
+            numpy.ndarray : (numTriangles,)
+    """
+    a = points[triangles[:, 0]]
+    return 0.5 * np.linalg.norm(np.cross(points[triangles[:, 1]] - a, points[triangles[:, 2]] - a), axis=1)
+
+
+def sampleSurface(meshArrays, count, rng=None):
+    """ Draw points uniformly over the surface: triangles are picked in
+        proportion to their area through the prefix sum of the areas, and a
+        uniform barycentric coordinate is drawn inside each picked triangle.
+        Args:
+            meshArrays (MeshArrays)
+            count      (int)
+            rng        (numpy.random.Generator)
+        Returns:
+            numpy.ndarray : (count,) triangle index of every sample
+            numpy.ndarray : (count, 3) barycentric coordinates
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    areaTable = meshArrays.areaTable()
+    if len(areaTable) == 0 or areaTable[-1] <= 0:
+        raise ValueError("The mesh has no surface to put drops on!")
+
+    triangleIds = np.searchsorted(areaTable, rng.random(count) * areaTable[-1], side="right")
+    triangleIds = np.minimum(triangleIds, len(areaTable) - 1)
+
+    # sqrt 保证在三角形内部均匀分布
+    r1 = np.sqrt(rng.random(count))
+    r2 = rng.random(count)
+    barycentric = np.stack([1.0 - r1, r1 * (1.0 - r2), r1 * r2], axis=1)
+
+    return triangleIds, barycentric
+
+
+def vertexTriangles(meshArrays, vertexIds):
+    """ Express vertices as surface samples: one triangle using each vertex and
+        a barycentric coordinate of 1 on that corner.
+        Args:
+            meshArrays (MeshArrays)
+            vertexIds  (numpy.ndarray) : (n,)
+        Returns:
+            numpy.ndarray : (n,) triangle index
+            numpy.ndarray : (n, 3) barycentric coordinates
+    """
+    triangles = meshArrays.triangles()[0]
+    cornerTriangle = np.full(meshArrays.numVertices, -1, dtype=np.int64)
+    cornerIndex = np.zeros(meshArrays.numVertices, dtype=np.int64)
+    for corner in range(3):
+        cornerTriangle[triangles[:, corner]] = np.arange(len(triangles))
+        cornerIndex[triangles[:, corner]] = corner
+
+    vertexIds = np.asarray(vertexIds, dtype=np.int64)
+    if (cornerTriangle[vertexIds] < 0).any():
+        raise ValueError("Some drops sit on vertices without a face!")
+
+    barycentric = np.zeros((len(vertexIds), 3), dtype=np.float64)
+    barycentric[np.arange(len(vertexIds)), cornerIndex[vertexIds]] = 1.0
+    return cornerTriangle[vertexIds], barycentric
+
+
+def surfacePoints(meshArrays, triangleIds, barycentric):
+    """ Return the positions and the interpolated normals of surface samples.
+        Without vertex normals the flat triangle normal is used.
+        Args:
+            meshArrays  (MeshArrays)
+            triangleIds (numpy.ndarray) : (n,)
+            barycentric (numpy.ndarray) : (n, 3)
+        Returns:
+            numpy.ndarray : (n, 3) positions
+            numpy.ndarray : (n, 3) normals
+    """
+    corners = meshArrays.triangles()[0][triangleIds]
+    weights = barycentric[:, :, None]
+    positions = (meshArrays.points[corners] * weights).sum(axis=1)
+
+    if meshArrays.normals is not None:
+        normals = (meshArrays.normals[corners] * weights).sum(axis=1)
+    else:
+        p = meshArrays.points[corners]
+        normals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+
+    return positions, _normalize(normals)
+
+
+def _surfaceChunk(meshArrays, count, minDropSize, maxDropSize, seed, chunkIndex):
+    rng = chunkRng(seed, chunkIndex)
+    triangleIds, barycentric = sampleSurface(meshArrays, count, rng)
+    sizes = rng.uniform(minDropSize, maxDropSize, size=count)
+    return triangleIds, barycentric, sizes
+
+
+def surfaceCandidates(meshArrays, count, minDropSize, maxDropSize, seed, workers=1):
+    """ Draw count surface samples with a random size each, chunk by chunk.
+        Args:
+            meshArrays  (MeshArrays)
+            count       (int)
+            minDropSize (float)
+            maxDropSize (float)
+            seed        (int)
+            workers     (int)
+        Returns:
+            numpy.ndarray : (count,) triangle index of every sample
+            numpy.ndarray : (count, 3) barycentric coordinates
+            numpy.ndarray : (count,) sizes
+    """
+    # 先在主进程里建好面积表，子进程拿到的网格就不用各自再算一遍
+    meshArrays.areaTable()
+
+    chunks = mapChunks(_surfaceChunk, meshArrays,
+                       [(n, minDropSize, maxDropSize, seed, i) for i, n in enumerate(chunkCounts(count))],
+                       workers)
+    if not chunks:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 3)), np.zeros(0)
+
+    return (np.concatenate([c[0] for c in chunks]),
+            np.concatenate([c[1] for c in chunks]),
+            np.concatenate([c[2] for c in chunks]))
+
+
+def scatterOnSurface(meshArrays, dropDensity, minDropSize, maxDropSize, seed=None, workers=1):
+    """ Scatter dropDensity drops over the surface, weighted by area.
+        Unlike scatterOnVertices the density is not limited by the vertex count,
+        so no subdivided proxy mesh is needed.
+        Args:
+            meshArrays  (MeshArrays)
+            dropDensity (int)
+            minDropSize (float)
+            maxDropSize (float)
+            seed        (int) : None draws a random seed
+            workers     (int) : processes used for the chunks
+        Returns:
+            numpy.ndarray : (n,) triangle index of every drop
+            numpy.ndarray : (n, 3) barycentric coordinates of every drop
+            numpy.ndarray : (n,) size of every drop
+    """
+    return surfaceCandidates(meshArrays, dropDensity, minDropSize, maxDropSize, resolveSeed(seed), workers)
+
+
+def poissonDiskOnSurface(meshArrays, dropDensity, minDropSize, maxDropSize, seed=None, workers=1, oversample=4):
+    """ Scatter up to dropDensity drops over the surface so that no two drops
+        overlap (blue noise). Every drop gets a radius of half its size, taken
+        from minDropSize..maxDropSize, and a candidate is rejected when it is
+        closer than the sum of the radii to an accepted drop.
+
+        Candidates are drawn with sampleSurface and tested against a uniform
+        grid spatial hash whose cells are maxDropSize wide, so a test only
+        looks at the 27 cells around the candidate. The candidates are tested
+        in batches: one candidate per cell, cells of the same (x % 3, y % 3, z % 3)
+        colour together, which can never conflict with each other.
+        Only the candidates are drawn in parallel chunks; the selection is a
+        serial greedy pass over them, so the result doesn't depend on workers.
+        Args:
+            meshArrays  (MeshArrays)
+            dropDensity (int)
+            minDropSize (float)
+            maxDropSize (float)
+            seed        (int) : None draws a random seed
+            workers     (int) : processes used for the chunks
+            oversample  (int) : candidates drawn per requested drop
+        Returns:
+            numpy.ndarray : (n,) triangle index of every drop, n <= dropDensity
+            numpy.ndarray : (n, 3) barycentric coordinates of every drop
+            numpy.ndarray : (n,) size of every drop
+    """
+    triangleIds, barycentric, sizes = surfaceCandidates(meshArrays, dropDensity * oversample, minDropSize,
+                                                        maxDropSize, resolveSeed(seed), workers)
+    positions, _ = surfacePoints(meshArrays, triangleIds, barycentric)
+
+    accepted = poissonDiskSelect(positions, sizes / 2.0, dropDensity, maxDropSize)
+
+    return triangleIds[accepted], barycentric[accepted], sizes[accepted]
+
+
+# 27 个相邻格子的偏移
+_NEIGHBOUR_CELLS = np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def _hashCells(cells, tableMask):
+    # 空间哈希：三个大质数异或，冲突只会多检查几个点，不影响结果
+    h = (cells[..., 0] * 73856093) ^ (cells[..., 1] * 19349663) ^ (cells[..., 2] * 83492791)
+    return h & tableMask
+
+
+def poissonDiskSelect(positions, radii, maxCount, cellSize):
+    """ Greedily keep candidates whose disk doesn't overlap an already kept one.
+        The candidates go in passes of rising rank (the n-th candidate of every
+        cell), and the selection stops after a whole pass keeps nothing: the
+        surface is full and the later passes would only be rejected.
+        Args:
+            positions (numpy.ndarray) : (n, 3) candidate positions
+            radii     (numpy.ndarray) : (n,) candidate radii, 2 * radii <= cellSize
+            maxCount  (int)
+            cellSize  (float)
+        Returns:
+            numpy.ndarray : sorted indices of the kept candidates
+    """
+    count = len(positions)
+    if count == 0 or maxCount <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    cells = np.floor((positions - positions.min(axis=0)) / cellSize).astype(np.int64)
+
+    # 每个候选点在自己格子里的序号(rank)，以及格子的颜色
+    extent = cells.max(axis=0) + 1
+    cellKeys = cells[:, 0] + extent[0] * (cells[:, 1] + extent[1] * cells[:, 2])
+    order = np.argsort(cellKeys, kind="stable")
+    groupStarts = np.concatenate(([0], np.nonzero(np.diff(cellKeys[order]))[0] + 1))
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count) - np.repeat(groupStarts, np.diff(np.append(groupStarts, count)))
+    colour = (cells[:, 0] % 3) * 9 + (cells[:, 1] % 3) * 3 + cells[:, 2] % 3
+
+    # 哈希表的每个桶是一条链表：head[桶] -> 最后插入的点，nextKept[点] -> 同一个桶里的前一个点
+    tableSize = 1
+    while tableSize < 2 * len(groupStarts):
+        tableSize *= 2
+    tableMask = tableSize - 1
+    head = np.full(tableSize, -1, dtype=np.int64)
+    nextKept = np.full(count, -1, dtype=np.int64)
+
+    kept = []
+    numKept = 0
+    batchOrder = np.lexsort((np.arange(count), colour, rank))
+    batchKeys = rank[batchOrder] * 27 + colour[batchOrder]
+    batchStarts = np.concatenate(([0], np.nonzero(np.diff(batchKeys))[0] + 1, [count]))
+
+    # 同一个 rank 的 27 个颜色批次都没有新点时，说明表面已经放满了，后面的批次只会被拒绝
+    batchRanks = rank[batchOrder[batchStarts[:-1]]]
+    passRank = 0
+    passKept = 0
+    for start, end, batchRank in zip(batchStarts[:-1], batchStarts[1:], batchRanks):
+        if batchRank != passRank:
+            if passKept == 0:
+                break
+            passRank = batchRank
+            passKept = 0
+        batch = batchOrder[start:end]
+
+        # 沿着 27 个相邻桶的链表，只检查真正存在的点
+        neighbourBuckets = _hashCells(cells[batch][:, None, :] + _NEIGHBOUR_CELLS[None, :, :], tableMask)
+        owner = np.repeat(np.arange(len(batch)), 27)
+        current = head[neighbourBuckets.ravel()]
+        alive = current >= 0
+        owner = owner[alive]
+        current = current[alive]
+        rejected = np.zeros(len(batch), dtype=bool)
+        while len(current):
+            candidate = batch[owner]
+            offset = positions[current] - positions[candidate]
+            reach = radii[current] + radii[candidate]
+            rejected[owner[np.einsum("ij,ij->i", offset, offset) < reach * reach]] = True
+            current = nextKept[current]
+            alive = (current >= 0) & ~rejected[owner]
+            owner = owner[alive]
+            current = current[alive]
+
+        batch = batch[~rejected][:maxCount - numKept]
+        if len(batch) == 0:
+            continue
+
+        # 插入链表，同一批里落进同一个桶的点先互相串起来
+        buckets = _hashCells(cells[batch], tableMask)
+        bucketOrder = np.argsort(buckets, kind="stable")
+        sortedBuckets = buckets[bucketOrder]
+        sortedPoints = batch[bucketOrder]
+        firstOfBucket = np.ones(len(batch), dtype=bool)
+        firstOfBucket[1:] = sortedBuckets[1:] != sortedBuckets[:-1]
+        previous = np.empty(len(batch), dtype=np.int64)
+        previous[firstOfBucket] = head[sortedBuckets[firstOfBucket]]
+        previous[~firstOfBucket] = sortedPoints[np.nonzero(~firstOfBucket)[0] - 1]
+        nextKept[sortedPoints] = previous
+        head[sortedBuckets] = sortedPoints  # 同一个桶重复赋值时最后一个生效
+
+        kept.append(batch)
+        numKept += len(batch)
+        passKept += len(batch)
+        if numKept >= maxCount:
+            break
+
+    if not kept:
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate(kept))
+
+
+def poissonDiskLimits(positions, radii, free, cellSize):
+    """ Return the largest size every free drop can take without overlapping
+        another drop, with the rule of poissonDiskSelect. Two free drops each
+        keep to their distance, so they can't overlap whatever both draw.
+        Args:
+            positions (numpy.ndarray) : (n, 3) all drops
+            radii     (numpy.ndarray) : (n,) radii of the fixed drops, the values of the free drops are not used
+            free      (numpy.ndarray) : (k,) indices of the drops getting a new size
+            cellSize  (float) : at least the largest size any drop can have
+        Returns:
+            numpy.ndarray : (k,) largest size, np.inf when nothing is close
+    """
+    free = np.asarray(free, dtype=np.int64)
+    limits = np.full(len(free), np.inf)
+    if not len(free):
+        return limits
+
+    # 所有水滴放进空间哈希，每个要改尺寸的水滴只看周围 27 个格子
+    cells = np.floor(positions / cellSize).astype(np.int64)
+    tableSize = 1
+    while tableSize < 2 * len(positions):
+        tableSize *= 2
+    buckets = _hashCells(cells, tableSize - 1)
+    order = np.argsort(buckets, kind="stable")
+    sortedBuckets = buckets[order]
+
+    neighbourBuckets = _hashCells(cells[free][:, None, :] + _NEIGHBOUR_CELLS[None, :, :], tableSize - 1).ravel()
+    starts = np.searchsorted(sortedBuckets, neighbourBuckets, side="left")
+    counts = np.searchsorted(sortedBuckets, neighbourBuckets, side="right") - starts
+    owner = np.repeat(np.repeat(np.arange(len(free)), 27), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    other = order[np.repeat(starts, counts) + offsets]
+
+    keep = other != free[owner]
+    owner = owner[keep]
+    other = other[keep]
+    distance = np.linalg.norm(positions[other] - positions[free[owner]], axis=1)
+    isFree = np.zeros(len(positions), dtype=bool)
+    isFree[free] = True
+    limit = np.where(isFree[other], distance, 2.0 * (distance - radii[other]))
+    np.minimum.at(limits, owner, limit)
+    return limits
+
+
+# "Use an optimised randomness combination" 勾选时使用的模板组合：
+# preMadeDrop_1 和 preMadeDrop_2 各三次，preMadeDrop_3、preMadeDrop_4 各一次，preMadeDrop_7 两次
+OPTIMISED_TEMPLATES = np.array([0, 0, 0, 1, 1, 1, 2, 3, 6, 6])
+NUM_TEMPLATES = 8
+
+
+def chooseTemplates(count, randomness, optimised, rng=None):
+    """ Pick a premade drop template index for every drop.
+        Args:
+            count      (int)
+            randomness (int)  : use the first `randomness` templates when not optimised
+            optimised  (bool) : use OPTIMISED_TEMPLATES
+            rng        (numpy.random.Generator)
+        Returns:
+            numpy.ndarray : (count,) template indices
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if optimised:
+        return rng.choice(OPTIMISED_TEMPLATES, size=count)
+
+    randomness = min(max(int(randomness), 1), NUM_TEMPLATES)
+    return rng.integers(0, randomness, size=count)
+
+
+def dropJitter(sizes, rng=None):
+    """ Random offset of every drop, in the drop's own axes (normal, up, side).
+        The drops sink up to a third of their size into the surface and slide
+        up to their size along it, so they don't appear as structured.
+        Args:
+            sizes (numpy.ndarray) : (n,)
+            rng   (numpy.random.Generator)
+        Returns:
+            numpy.ndarray : (n, 3)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    sizes = np.asarray(sizes, dtype=np.float64)
+    jitter = np.empty((len(sizes), 3), dtype=np.float64)
+    jitter[:, 0] = rng.uniform(-sizes / 3, 0)
+    jitter[:, 1] = rng.uniform(-sizes, sizes)
+    jitter[:, 2] = rng.uniform(-sizes, sizes)
+    return jitter
+
+
+def _attributeChunk(meshArrays, sizes, randomness, optimised, seed, chunkIndex):
+    rng = chunkRng(seed, chunkIndex, STREAM_ATTRIBUTES)
+    return dropJitter(sizes, rng), chooseTemplates(len(sizes), randomness, optimised, rng)
+
+
+def dropAttributes(sizes, randomness, optimised, seed=None, workers=1):
+    """ Jitter and template choice of every drop, drawn chunk by chunk.
+        Args:
+            sizes      (numpy.ndarray) : (n,)
+            randomness (int)
+            optimised  (bool)
+            seed       (int) : None draws a random seed
+            workers    (int)
+        Returns:
+            numpy.ndarray : (n, 3) jitter, see dropJitter
+            numpy.ndarray : (n,) template indices, see chooseTemplates
+    """
+    seed = resolveSeed(seed)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    starts = np.cumsum([0] + chunkCounts(len(sizes)))
+    chunks = mapChunks(_attributeChunk, None,
+                       [(sizes[start:end], randomness, optimised, seed, i)
+                        for i, (start, end) in enumerate(zip(starts[:-1], starts[1:]))],
+                       workers)
+    if not chunks:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64)
+
+    return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
+
+
+def _normalize(vectors):
+    lengths = np.linalg.norm(vectors, axis=1)
+    lengths[lengths == 0] = 1.0
+    return vectors / lengths[:, None]
+
+
+def dropMatrices(positions, normals, sizes, jitter, upVector=(0, 1, 0)):
+    """ Return one 4x4 transform matrix (Maya row-vector layout) per drop.
+        The drop's x axis follows the surface normal and its y axis stays as
+        close as possible to upVector, which is what
+        normalConstraint(aimVector=(0, 0, 1), upVector=(0, 1, 0)) followed by
+        xform(ro=(0, -90, 0)) used to produce. Size and jitter are folded in.
+        Args:
+            positions (numpy.ndarray) : (n, 3)
+            normals   (numpy.ndarray) : (n, 3)
+            sizes     (numpy.ndarray) : (n,)
+            jitter    (numpy.ndarray) : (n, 3), see dropJitter
+            upVector  (tuple)
+        Returns:
+            numpy.ndarray : (n, 4, 4)
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    jitter = np.asarray(jitter, dtype=np.float64).reshape(-1, 3)
+    count = len(positions)
+
+    # 法线为零的顶点（孤立点）默认朝向 z 轴
+    normalLengths = np.linalg.norm(normals, axis=1)
+    normals = normals.copy()
+    normals[normalLengths < 1e-12] = (0.0, 0.0, 1.0)
+    normals = _normalize(normals)
+
+    # up 向量投影到切平面上；法线和 up 平行时改用 x 轴
+    up = np.broadcast_to(np.asarray(upVector, dtype=np.float64), (count, 3))
+    tangents = up - (up * normals).sum(axis=1)[:, None] * normals
+    parallel = np.linalg.norm(tangents, axis=1) < 1e-6
+    if parallel.any():
+        side = np.array([1.0, 0.0, 0.0])
+        tangents[parallel] = side - (normals[parallel] @ side)[:, None] * normals[parallel]
+    tangents = _normalize(tangents)
+    bitangents = np.cross(normals, tangents)
+
+    matrices = np.zeros((count, 4, 4), dtype=np.float64)
+    matrices[:, 0, :3] = normals * sizes[:, None]
+    matrices[:, 1, :3] = tangents * sizes[:, None]
+    matrices[:, 2, :3] = bitangents * sizes[:, None]
+    matrices[:, 3, :3] = (positions
+                          + jitter[:, 0:1] * normals
+                          + jitter[:, 1:2] * tangents
+                          + jitter[:, 2:3] * bitangents)
+    matrices[:, 3, 3] = 1.0
+
+    return matrices
+
+
+class DropBinding(object):
+    """ Drops bound to a mesh by (triangle, barycentric, local offset), set up
+        once so every frame of a deformation recomputes all drop matrices in
+        one vectorised pass over reused buffers. Gives the same matrices as
+        surfacePoints followed by dropMatrices with the default upVector.
+        The drops are kept sorted by triangle, so the per-frame gathers read
+        the points in order; the results follow self.order.
+        Args:
+            meshArrays  (MeshArrays) : the mesh the drops were made on
+            triangleIds (numpy.ndarray) : (n,)
+            barycentric (numpy.ndarray) : (n, 3)
+            sizes       (numpy.ndarray) : (n,)
+            unitJitter  (numpy.ndarray) : (n, 3) local offset divided by the size
+    """
+
+    def __init__(self, meshArrays, triangleIds, barycentric, sizes, unitJitter):
+        triangleIds = np.asarray(triangleIds, dtype=np.int64)
+        self.order = np.argsort(triangleIds, kind="stable")
+        self.numVertices = meshArrays.numVertices
+
+        # 按列(structure of arrays)存放，每一步都是连续内存上的整行运算
+        self.corners = np.ascontiguousarray(meshArrays.triangles()[0][triangleIds[self.order]].T)
+        self.barycentric = np.ascontiguousarray(np.asarray(barycentric, dtype=np.float64)[self.order].T)
+        self.sizes = np.asarray(sizes, dtype=np.float64)[self.order]
+        self.unitJitter = np.ascontiguousarray(np.asarray(unitJitter, dtype=np.float64)[self.order].T)
+
+        # 每一帧复用的缓冲区：顶点的 (位置, 法线)、插值结果和转置存放的矩阵
+        count = len(self.sizes)
+        self._frame = np.zeros((6, self.numVertices), dtype=np.float64)
+        self._sample = np.empty((6, count), dtype=np.float64)
+        self._corner = np.empty((6, count), dtype=np.float64)
+        self._scratch = np.empty((3, count), dtype=np.float64)
+        self._matrices = np.zeros((4, 4, count), dtype=np.float64)
+        self._matrices[3, 3] = 1.0
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def _interpolate(self, rows):
+        # sample = sum(w_k * frame[:, corner_k])，三次 take 都按顶点顺序读
+        sample = self._sample[rows]
+        corner = self._corner[rows]
+        frame = self._frame[rows]
+        np.take(frame, self.corners[0], axis=1, out=sample)
+        sample *= self.barycentric[0]
+        for k in (1, 2):
+            np.take(frame, self.corners[k], axis=1, out=corner)
+            corner *= self.barycentric[k]
+            sample += corner
+
+    def _flatNormals(self):
+        p0, p1, p2 = (np.take(self._frame[:3], self.corners[k], axis=1) for k in range(3))
+        self._sample[3:] = np.cross(p1 - p0, p2 - p0, axis=0)
+
+    def evaluate(self, points, normals=None):
+        """ Recompute the drops on the deformed points.
+            Args:
+                points  (numpy.ndarray) : (numVertices, 3)
+                normals (numpy.ndarray) : (numVertices, 3) vertex normals, the flat triangle normals when None
+            Returns:
+                numpy.ndarray : (n, 3) positions, in self.order
+                numpy.ndarray : (n, 3) unit normals, in self.order
+                numpy.ndarray : (n, 4, 4) matrices in self.order, a view of a buffer overwritten by the next call
+        """
+        self._frame[:3] = np.asarray(points, dtype=np.float64).reshape(-1, 3).T
+        if normals is None:
+            self._interpolate(slice(0, 3))
+            self._flatNormals()
+        else:
+            self._frame[3:] = np.asarray(normals, dtype=np.float64).reshape(-1, 3).T
+            self._interpolate(slice(0, 6))
+
+        px, py, pz, nx, ny, nz = self._sample
+        length, s, scale = self._scratch
+
+        np.sqrt(nx * nx + ny * ny + nz * nz, out=length)
+        degenerate = length < 1e-12
+        if degenerate.any():
+            length[degenerate] = 1.0
+            nx[degenerate] = 0.0
+            ny[degenerate] = 0.0
+            nz[degenerate] = 1.0
+        nx /= length
+        ny /= length
+        nz /= length
+
+        # up=(0, 1, 0) 时切线和副切线有解析式：
+        # tangent = (-ny*nx, 1 - ny*ny, -ny*nz) / s, bitangent = (-nz, 0, nx) / s, s = sqrt(1 - ny*ny)
+        np.multiply(ny, ny, out=s)
+        np.subtract(1.0, s, out=s)
+        np.maximum(s, 0.0, out=s)
+        np.sqrt(s, out=s)
+        parallel = s < 1e-6
+        if parallel.any():
+            s[parallel] = 1.0
+        np.divide(self.sizes, s, out=scale)
+
+        m = self._matrices
+        np.multiply(nx, self.sizes, out=m[0, 0])
+        np.multiply(ny, self.sizes, out=m[0, 1])
+        np.multiply(nz, self.sizes, out=m[0, 2])
+        np.multiply(ny, nx, out=m[1, 0])
+        m[1, 0] *= scale
+        np.negative(m[1, 0], out=m[1, 0])
+        np.multiply(s, self.sizes, out=m[1, 1])
+        np.multiply(ny, nz, out=m[1, 2])
+        m[1, 2] *= scale
+        np.negative(m[1, 2], out=m[1, 2])
+        np.multiply(nz, scale, out=m[2, 0])
+        np.negative(m[2, 0], out=m[2, 0])
+        np.multiply(nx, scale, out=m[2, 2])
+
+        # 平移 = 位置 + 局部偏移在 (法线, 切线, 副切线) 上展开；旋转行已经乘过 size
+        j0, j1, j2 = self.unitJitter
+        for axis, position in enumerate((px, py, pz)):
+            translation = m[3, axis]
+            np.multiply(j0, m[0, axis], out=translation)
+            np.multiply(j1, m[1, axis], out=length)
+            translation += length
+            np.multiply(j2, m[2, axis], out=length)
+            translation += length
+            translation += position
+
+        positions = self._sample[:3].T
+        normals = self._sample[3:].T
+        matrices = m.transpose(2, 0, 1)
+
+        # 法线和 up 平行的水滴很少，交给 dropMatrices 处理
+        if parallel.any():
+            matrices[parallel] = dropMatrices(positions[parallel], normals[parallel], self.sizes[parallel],
+                                              self.unitJitter.T[parallel] * self.sizes[parallel, None])
+
+        return positions, normals, matrices
+
+
+def matrixToEulerXYZ(matrices):
+    """ Decompose drop matrices into scale and XYZ euler rotation in degrees.
+        Args:
+            matrices (numpy.ndarray) : (n, 4, 4), rows may be scaled
+        Returns:
+            numpy.ndarray : (n, 3) rotation in degrees
+            numpy.ndarray : (n, 3) scale
+    """
+    matrices = np.asarray(matrices, dtype=np.float64)
+    scales = np.linalg.norm(matrices[:, :3, :3], axis=2)
+    rotation = matrices[:, :3, :3] / np.where(scales == 0, 1.0, scales)[:, :, None]
+
+    # Maya 行向量约定下 M = Rx * Ry * Rz
+    ry = np.arcsin(np.clip(-rotation[:, 0, 2], -1.0, 1.0))
+    rx = np.arctan2(rotation[:, 1, 2], rotation[:, 2, 2])
+    rz = np.arctan2(rotation[:, 0, 1], rotation[:, 0, 0])
+
+    # 万向节锁：cos(ry) 接近 0 时把 rz 置零，rx 吸收全部旋转
+    locked = np.abs(np.cos(ry)) < 1e-6
+    if locked.any():
+        rz[locked] = 0.0
+        rx[locked] = np.arctan2(-rotation[locked, 2, 1], rotation[locked, 1, 1])
+
+    return np.degrees(np.stack([rx, ry, rz], axis=1)), scales
+
+
+def combineDrops(templates, templateIds, matrices):
+    """ Transform the template of every drop and merge them into one mesh.
+        Args:
+            templates   (list) : (points, faceCounts, faceConnects) per template
+            templateIds (numpy.ndarray) : (n,) template index of every drop
+            matrices    (numpy.ndarray) : (n, 4, 4) drop matrices
+        Returns:
+            numpy.ndarray : (numVertices, 3) points
+            numpy.ndarray : faceCounts
+            numpy.ndarray : faceConnects
+    """
+    templateIds = np.asarray(templateIds, dtype=np.int64)
+    numPoints = np.array([len(t[0]) for t in templates], dtype=np.int64)
+    numFaces = np.array([len(t[1]) for t in templates], dtype=np.int64)
+    numConnects = np.array([len(t[2]) for t in templates], dtype=np.int64)
+
+    # 每个水滴在合并网格里的起始顶点、起始面、起始面顶点
+    pointStarts = np.concatenate(([0], np.cumsum(numPoints[templateIds])))
+    faceStarts = np.concatenate(([0], np.cumsum(numFaces[templateIds])))
+    connectStarts = np.concatenate(([0], np.cumsum(numConnects[templateIds])))
+
+    points = np.empty((pointStarts[-1], 3), dtype=np.float64)
+    faceCounts = np.empty(faceStarts[-1], dtype=np.int64)
+    faceConnects = np.empty(connectStarts[-1], dtype=np.int64)
+
+    for t in np.unique(templateIds):
+        templatePoints, templateCounts, templateConnects = templates[t]
+        templatePoints = np.asarray(templatePoints, dtype=np.float64).reshape(-1, 3)
+        drops = np.nonzero(templateIds == t)[0]
+        m = matrices[drops]
+
+        transformed = np.einsum("kj,nji->nki", templatePoints, m[:, :3, :3]) + m[:, None, 3, :3]
+        points[pointStarts[drops][:, None] + np.arange(len(templatePoints))] = transformed
+        faceCounts[faceStarts[drops][:, None] + np.arange(len(templateCounts))] = templateCounts
+        faceConnects[connectStarts[drops][:, None] + np.arange(len(templateConnects))] = (
+                np.asarray(templateConnects)[None, :] + pointStarts[drops][:, None])
+
+    return points, faceCounts, faceConnects
+
+
+def templateInstancePoints(templatePoints, templateIds, matrices):
+    """ Transform the template of every drop when all templates share one
+        topology, e.g. to update a combined mesh without building its faces again.
+        Args:
+            templatePoints (numpy.ndarray) : (numTemplates, numVertices, 3)
+            templateIds    (numpy.ndarray) : (n,)
+            matrices       (numpy.ndarray) : (n, 4, 4)
+        Returns:
+            numpy.ndarray : (n, numVertices, 3), in the vertex order of combineDrops
+    """
+    points = np.einsum("nvj,njk->nvk", templatePoints[templateIds], matrices[:, :3, :3])
+    points += matrices[:, None, 3, :3]
+    return points
+
+
+def pixelSizes(positions, sizes, cameraPosition, horizontalFov, imageWidth):
+    """ Return how many pixels every drop covers in a rendered image, using the
+        distance to the camera (a drop behind the camera is measured the same way).
+        Args:
+            positions      (numpy.ndarray) : (n, 3)
+            sizes          (numpy.ndarray) : (n,)
+            cameraPosition (tuple) : world space
+            horizontalFov  (float) : radians
+            imageWidth     (int)   : render width in pixels
+        Returns:
+            numpy.ndarray : (n,)
+    """
+    distances = np.linalg.norm(np.asarray(positions, dtype=np.float64) - np.asarray(cameraPosition), axis=1)
+    pixelsPerUnit = imageWidth / (2.0 * np.tan(horizontalFov / 2.0) * np.maximum(distances, 1e-9))
+    return np.asarray(sizes, dtype=np.float64) * pixelsPerUnit
@@ -0,0 +1,79 @@
+# import modules
+import os
+
+import numpy as np
+
+# 预制水滴模板库：8个水滴形状的顶点(points)和面(faceCounts/faceConnects)
+# 以压缩的 .npz 保存在本文件旁边，第一次用到时才读取，之后一直缓存在内存里。
+# 8个模板都来自同一个 polyCube + polySmooth(divisions=2) + 删除背面 的网格，
+# 所以它们共享同一套拓扑，只有顶点位置不同。
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rainTemplates.npz")
+
+_templateCache = {}
+
+
+class DropTemplates(object):
+    """ The premade drop shapes as arrays.
+        Args:
+            points       (numpy.ndarray) : (numTemplates, numVertices, 3) object space positions
+            faceCounts   (numpy.ndarray) : shared topology, None when the file has none
+            faceConnects (numpy.ndarray) : shared topology, None when the file has none
+    """
+
+    def __init__(self, points, faceCounts=None, faceConnects=None):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.faceCounts = None if faceCounts is None else np.asarray(faceCounts, dtype=np.int64)
+        self.faceConnects = None if faceConnects is None else np.asarray(faceConnects, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.points)
+
+    def hasTopology(self):
+        return self.faceCounts is not None and self.faceConnects is not None
+
+    def asList(self):
+        """ Return [(points, faceCounts, faceConnects), ...] as used by rainScatter.combineDrops. """
+        return [(p, self.faceCounts, self.faceConnects) for p in self.points]
+
+
+def loadTemplates(path=TEMPLATE_FILE):
+    """ Load the template library, reading the file only on the first call.
+        Args:
+            path (str)
+        Returns:
+            DropTemplates
+    """
+    templates = _templateCache.get(path)
+    if templates is None:
+        with np.load(path) as data:
+            templates = DropTemplates(data["points"],
+                                      data["faceCounts"] if "faceCounts" in data.files else None,
+                                      data["faceConnects"] if "faceConnects" in data.files else None)
+        _templateCache[path] = templates
+
+    return templates
+
+
+def setTemplates(templates, path=TEMPLATE_FILE):
+    """ Replace the cached library without touching the file.
+        Args:
+            templates (DropTemplates)
+            path      (str)
+    """
+    _templateCache[path] = templates
+
+
+def saveTemplates(templates, path=TEMPLATE_FILE):
+    """ Refresh the cache and write the template library.
+        Args:
+            templates (DropTemplates)
+            path      (str)
+    """
+    setTemplates(templates, path)
+
+    arrays = {"points": templates.points.astype(np.float32)}
+    if templates.hasTopology():
+        arrays["faceCounts"] = templates.faceCounts.astype(np.int32)
+        arrays["faceConnects"] = templates.faceConnects.astype(np.int32)
+    np.savez_compressed(path, **arrays)
@@ -0,0 +1,18 @@
+#
+#  conftest.py
+#
+#  Shared setup of the headless tests: the modules under test and the
+#  synthetic meshes of the benchmarks are imported straight from the
+#  PythonScripts folder, no Maya needed:
+#
+#      python -m pytest -q tests
+#
+
+# import modules
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "benchmarks"))
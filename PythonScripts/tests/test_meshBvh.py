@@ -0,0 +1,96 @@
+# import modules
+import numpy as np
+import pytest
+
+import meshBvh
+import syntheticMeshes
+
+
+def sphereTriangles(rows=16, cols=24, radius=5.0):
+    """ Corner positions of a fan triangulated UV sphere. """
+    points, faceCounts, faceConnects = syntheticMeshes.sphere(rows, cols, radius)
+    faceStarts = np.concatenate(([0], np.cumsum(faceCounts)[:-1]))
+    triangles = []
+    for start, count in zip(faceStarts, faceCounts):
+        for k in range(1, count - 1):
+            triangles.append(faceConnects[[start, start + k, start + k + 1]])
+    return points[np.array(triangles)]
+
+
+def randomRays(count, seed=0):
+    """ Rays from a shell around the sphere, aimed roughly at it. """
+    rng = np.random.default_rng(seed)
+    origins = rng.normal(size=(count, 3))
+    origins *= 12.0 / np.linalg.norm(origins, axis=1)[:, None]
+    targets = rng.uniform(-6.0, 6.0, (count, 3))
+    return origins, targets - origins
+
+
+def testBoxBvhOrderAndEdits():
+    bvh = meshBvh.BoxBvh(leafSize=2)
+    for i in range(10):
+        bvh.setBox(i, (i * 2.0, -0.5, -0.5), (i * 2.0 + 1.0, 0.5, 0.5))
+    bvh.setBox("off", (0.0, 5.0, 0.0), (1.0, 6.0, 1.0))
+
+    hits = bvh.intersect((-1.0, 0.0, 0.0), (1.0, 0.0, 0.0))
+    assert [key for _, key in hits] == list(range(10))
+    assert [distance for distance, _ in hits] == pytest.approx([1.0 + i * 2.0 for i in range(10)])
+
+    hits = bvh.intersect((-1.0, 0.0, 0.0), (1.0, 0.0, 0.0), maxDistance=6.0)
+    assert [key for _, key in hits] == [0, 1, 2]
+
+    # 移动和删除之后结果跟着变
+    bvh.setBox(3, (0.0, 10.0, 0.0), (1.0, 11.0, 1.0))
+    bvh.remove(5)
+    hits = bvh.intersect((-1.0, 0.0, 0.0), (1.0, 0.0, 0.0))
+    assert [key for _, key in hits] == [0, 1, 2, 4, 6, 7, 8, 9]
+    assert 5 not in bvh
+    assert len(bvh) == 10
+
+    assert bvh.intersect((-1.0, 0.0, 0.0), (-1.0, 0.0, 0.0)) == []
+
+
+def testBoxBvhEmpty():
+    assert meshBvh.BoxBvh().intersect((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)) == []
+
+
+def testIntersectTriangles():
+    triangles = np.array([[[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+                          [[0.0, 0.0, 2.0], [1.0, 0.0, 2.0], [0.0, 1.0, 2.0]]])
+    origins = np.array([[0.2, 0.2, -1.0], [0.2, 0.2, 5.0], [0.9, 0.9, -1.0], [0.2, 0.2, -1.0]])
+    directions = np.array([[0.0, 0.0, 1.0], [0.0, 0.0, -2.0], [0.0, 0.0, 1.0], [0.0, 0.0, -1.0]])
+
+    distances, triangleIds = meshBvh.intersectTriangles(origins, directions, triangles)
+
+    # 距离以方向的长度为单位，背面也算
+    np.testing.assert_allclose(distances[:2], [1.0, 1.5])
+    assert triangleIds.tolist() == [0, 1, -1, -1]
+    assert np.all(np.isinf(distances[2:]))
+
+    distances, triangleIds = meshBvh.intersectTriangles(origins, directions, triangles, maxDistance=0.5)
+    assert triangleIds.tolist() == [-1, -1, -1, -1]
+
+
+@pytest.mark.parametrize("branching", [2, 16])
+def testTriangleBvhMatchesBruteForce(branching):
+    triangles = sphereTriangles()
+    origins, directions = randomRays(500)
+
+    expectedDistances, expectedIds = meshBvh.intersectTriangles(origins, directions, triangles)
+    distances, triangleIds = meshBvh.TriangleBvh(triangles, branching).intersect(origins, directions)
+
+    assert (expectedIds >= 0).any() and (expectedIds < 0).any()
+    np.testing.assert_array_equal(triangleIds, expectedIds)
+    np.testing.assert_allclose(distances, expectedDistances)
+
+
+def testTriangleBvhMaxDistance():
+    triangles = sphereTriangles()
+    origins, directions = randomRays(200, seed=1)
+
+    expectedDistances, expectedIds = meshBvh.intersectTriangles(origins, directions, triangles, maxDistance=0.6)
+    distances, triangleIds = meshBvh.TriangleBvh(triangles).intersect(origins, directions, maxDistance=0.6)
+
+    assert (expectedIds >= 0).any() and np.all(expectedDistances[expectedIds >= 0] <= 0.6)
+    np.testing.assert_array_equal(triangleIds, expectedIds)
+    np.testing.assert_allclose(distances, expectedDistances)
@@ -0,0 +1,70 @@
+# import modules
+import numpy as np
+import pytest
+
+import rainDrops
+import rainScatter
+import syntheticMeshes
+
+
+def testDefaultsAreValid():
+    params = rainDrops.DropParams()
+
+    assert params.samplingMode in rainDrops.SAMPLING_MODES
+    assert params.outputMode in rainDrops.OUTPUT_MODES
+
+
+@pytest.mark.parametrize("values", [
+    {"dropDensity": 0},
+    {"dropDensity": -5},
+    {"minDropSize": 0.0},
+    {"minDropSize": -0.1, "maxDropSize": 0.2},
+    {"minDropSize": 0.5, "maxDropSize": 0.2},
+    {"samplingMode": "Faces"},
+    {"outputMode": "Particles"},
+    {"cullPixels": -1.0},
+    {"cullPixels": 10.0, "lodPixels": 4.0},
+])
+def testValidateRejects(values):
+    with pytest.raises(ValueError):
+        rainDrops.DropParams(**values)
+
+
+def testValidateAfterEdit():
+    params = rainDrops.DropParams()
+    params.minDropSize = params.maxDropSize * 2
+    with pytest.raises(ValueError):
+        params.validate()
+
+
+@pytest.mark.parametrize("values", [
+    {"minDropSize": 0.3, "maxDropSize": 0.3},
+    {"cullPixels": 0.0, "lodPixels": 0.0},
+    {"samplingMode": rainDrops.SAMPLING_POISSON, "outputMode": rainDrops.OUTPUT_INSTANCER},
+])
+def testValidateAcceptsEdges(values):
+    rainDrops.DropParams(**values).validate()
+
+
+def testFromDictRoundTrip():
+    params = rainDrops.DropParams(dropDensity=50, seed=3, samplingMode=rainDrops.SAMPLING_SURFACE)
+
+    assert rainDrops.DropParams.fromDict(params.asDict()).asDict() == params.asDict()
+
+
+def testFromDictRejectsUnknownKeys():
+    with pytest.raises(ValueError):
+        rainDrops.DropParams.fromDict({"dropDensity": 10, "dropDensty": 20})
+
+
+def testSeedIsRandomUnlessSet():
+    meshArrays = rainScatter.MeshArrays(*syntheticMeshes.grid(20))
+    params = rainDrops.DropParams(dropDensity=100, samplingMode=rainDrops.SAMPLING_SURFACE)
+    assert params.seed is None
+    assert rainDrops.generateDrops(meshArrays, params).seed != rainDrops.generateDrops(meshArrays, params).seed
+
+    params.seed = 5
+    first = rainDrops.generateDrops(meshArrays, params)
+    again = rainDrops.generateDrops(meshArrays, params)
+    assert first.seed == again.seed == 5
+    np.testing.assert_array_equal(first.matrices, again.matrices)
@@ -0,0 +1,164 @@
+# import modules
+import numpy as np
+import pytest
+
+import rainScatter
+import syntheticMeshes
+
+
+def gridMesh(resolution=20, size=10.0):
+    """ Flat quad grid with +Y vertex normals. """
+    points, faceCounts, faceConnects = syntheticMeshes.grid(resolution, size)
+    normals = np.tile([0.0, 1.0, 0.0], (len(points), 1))
+    return rainScatter.MeshArrays(points, faceCounts, faceConnects, normals)
+
+
+def sphereMesh(rows=24, cols=32):
+    """ UV sphere without vertex normals, the flat triangle normals are used. """
+    return rainScatter.MeshArrays(*syntheticMeshes.sphere(rows, cols))
+
+
+def testBuildAdjacency():
+    # 2x2 个四边形: 中心点 4 和所有点相邻，角点 0 只和同一个面上的 1, 3, 4 相邻
+    points, faceCounts, faceConnects = syntheticMeshes.grid(2)
+    offsets, indices = rainScatter.buildAdjacency(len(points), faceCounts, faceConnects)
+
+    neighbours = [sorted(indices[offsets[v]:offsets[v + 1]].tolist()) for v in range(len(points))]
+    assert neighbours[4] == [0, 1, 2, 3, 5, 6, 7, 8]
+    assert neighbours[0] == [1, 3, 4]
+    assert neighbours[1] == [0, 2, 3, 4, 5]
+    assert all(v not in neighbours[v] for v in range(len(points)))
+
+
+def testBuildAdjacencyMixedFaces():
+    # 一个三角形和一个四边形共用边 (1, 2)
+    offsets, indices = rainScatter.buildAdjacency(5, [3, 4], [0, 1, 2, 1, 3, 4, 2])
+
+    neighbours = [sorted(indices[offsets[v]:offsets[v + 1]].tolist()) for v in range(5)]
+    assert neighbours == [[1, 2], [0, 2, 3, 4], [0, 1, 3, 4], [1, 2, 4], [1, 2, 3]]
+
+
+def testBuildAdjacencyEmpty():
+    offsets, indices = rainScatter.buildAdjacency(3, [], [])
+
+    assert offsets.tolist() == [0, 0, 0, 0]
+    assert len(indices) == 0
+
+
+@pytest.mark.parametrize("scatter", [rainScatter.scatterOnVertices, rainScatter.scatterOnSurface])
+def testScatterIsDeterministic(scatter):
+    # 点数和水滴数都超过 CHUNK_SIZE，分成好几块，workers 才真正用上进程池
+    meshArrays = gridMesh(140)
+    count = rainScatter.CHUNK_SIZE + 1000
+    assert meshArrays.numVertices > count
+
+    first = scatter(meshArrays, count, 0.01, 0.05, seed=7, workers=1)
+    again = scatter(meshArrays, count, 0.01, 0.05, seed=7, workers=1)
+    parallel = scatter(meshArrays, count, 0.01, 0.05, seed=7, workers=2)
+    other = scatter(meshArrays, count, 0.01, 0.05, seed=8, workers=1)
+
+    for a, b, c in zip(first, again, parallel):
+        np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(a, c)
+    assert not np.array_equal(first[-1], other[-1])
+
+
+def testScatterOnVerticesFits():
+    meshArrays = gridMesh(30)
+    vertices, sizes = rainScatter.scatterOnVertices(meshArrays, 500, 0.1, 0.6, seed=3)
+
+    assert len(np.unique(vertices)) == len(vertices)
+    assert np.all(sizes < meshArrays.maxNeighbourDistance()[vertices])
+    assert np.all((sizes >= 0.1) & (sizes <= 0.6))
+
+
+def testScatterOnVerticesTooManyDrops():
+    meshArrays = gridMesh(4)
+    with pytest.raises(ValueError):
+        rainScatter.scatterOnVertices(meshArrays, meshArrays.numVertices + 1, 0.1, 0.2, seed=0)
+
+
+def testPoissonDropsDontOverlap():
+    meshArrays = sphereMesh()
+    triangleIds, barycentric, sizes = rainScatter.poissonDiskOnSurface(meshArrays, 2000, 0.1, 0.5, seed=11)
+    positions, _ = rainScatter.surfacePoints(meshArrays, triangleIds, barycentric)
+
+    assert 0 < len(sizes) <= 2000
+    distances = np.linalg.norm(positions[:, None] - positions[None, :], axis=-1)
+    radii = sizes / 2.0
+    overlap = distances < radii[:, None] + radii[None, :]
+    np.fill_diagonal(overlap, False)
+    assert not overlap.any()
+
+
+def testPoissonDiskLimits():
+    rng = np.random.default_rng(5)
+    positions = rng.uniform(-2.0, 2.0, (300, 3))
+    radii = rng.uniform(0.05, 0.2, 300)
+    free = np.flatnonzero(rng.random(300) < 0.3)
+    cellSize = 0.4
+
+    limits = rainScatter.poissonDiskLimits(positions, radii, free, cellSize)
+
+    # 暴力求解：两个 free 的水滴各自不超过它们的距离，碰到固定的水滴时不超过 2 * (距离 - 半径)
+    isFree = np.zeros(len(positions), dtype=bool)
+    isFree[free] = True
+    for i, limit in zip(free, limits):
+        distances = np.linalg.norm(positions - positions[i], axis=1)
+        expected = np.where(isFree, distances, 2.0 * (distances - radii))
+        expected[i] = np.inf
+        expected = expected.min()
+        # 空间哈希只看 27 个格子，比 cellSize 小的限制一定能找到
+        if expected < cellSize:
+            assert limit == pytest.approx(expected)
+        else:
+            assert limit >= cellSize
+
+
+def testDropBindingMatchesDropMatrices():
+    rng = np.random.default_rng(1)
+    for meshArrays in (gridMesh(10), sphereMesh(12, 16)):
+        triangleIds, barycentric, sizes = rainScatter.scatterOnSurface(meshArrays, 300, 0.05, 0.2, seed=2)
+        unitJitter = rng.uniform(-0.1, 0.1, (len(sizes), 3))
+        binding = rainScatter.DropBinding(meshArrays, triangleIds, barycentric, sizes, unitJitter)
+
+        positions, normals = rainScatter.surfacePoints(meshArrays, triangleIds, barycentric)
+        expected = rainScatter.dropMatrices(positions, normals, sizes, unitJitter * sizes[:, None])
+
+        boundPositions, boundNormals, matrices = binding.evaluate(meshArrays.points, meshArrays.normals)
+        np.testing.assert_allclose(boundPositions, positions[binding.order], atol=1e-12)
+        np.testing.assert_allclose(boundNormals, normals[binding.order], atol=1e-12)
+        np.testing.assert_allclose(matrices, expected[binding.order], atol=1e-12)
+
+
+def testDropBindingFollowsDeformation():
+    meshArrays = sphereMesh(12, 16)
+    triangleIds, barycentric, sizes = rainScatter.scatterOnSurface(meshArrays, 200, 0.05, 0.2, seed=4)
+    unitJitter = np.zeros((len(sizes), 3))
+    binding = rainScatter.DropBinding(meshArrays, triangleIds, barycentric, sizes, unitJitter)
+
+    deformed = meshArrays.withPoints(meshArrays.points * (1.0, 2.0, 0.5) + (3.0, 0.0, -1.0))
+    positions, normals = rainScatter.surfacePoints(deformed, triangleIds, barycentric)
+    expected = rainScatter.dropMatrices(positions, normals, sizes, unitJitter)
+
+    _, _, matrices = binding.evaluate(deformed.points)
+    np.testing.assert_allclose(matrices, expected[binding.order], atol=1e-12)
+
+
+def testTopologyAndCornerHashes():
+    meshArrays = gridMesh(6)
+    moved = meshArrays.withPoints(meshArrays.points + 1.0)
+    triangleIds = np.arange(len(meshArrays.triangles()[0]))
+
+    assert meshArrays.topologyHash() == moved.topologyHash()
+    assert meshArrays.contentHash() != moved.contentHash()
+
+    hashes = rainScatter.cornerHashes(meshArrays, triangleIds)
+    assert hashes.shape == (len(triangleIds), 2)
+    np.testing.assert_array_equal(hashes, rainScatter.cornerHashes(meshArrays, triangleIds))
+
+    # 只移动一个顶点，只有用到它的三角形的哈希会变
+    points = meshArrays.points.copy()
+    points[10] += (0.0, 0.1, 0.0)
+    changed = np.any(hashes != rainScatter.cornerHashes(meshArrays.withPoints(points, meshArrays.normals), triangleIds), axis=1)
+    np.testing.assert_array_equal(changed, np.any(meshArrays.triangles()[0] == 10, axis=1))